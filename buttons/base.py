@@ -7,6 +7,7 @@ import disnake
 import utils
 from config.app_config import config
 from database.stats import ErrorEvent
+from features.error_aggregator import error_aggregator
 
 
 class BaseView(disnake.ui.View):
@@ -25,9 +26,14 @@ class BaseView(disnake.ui.View):
         if await self.error_log.ignore_errors(interaction, error):
             # error was handled
             return
+        error_key = error_aggregator.record(self.__class__.__name__, "on_button_error", error)
+        if error_key is None:
+            # repeated error, only counted
+            await interaction.message.edit(view=None)
+            return
 
         channel_out = interaction.bot.get_channel(config.bot_dev_channel)
-        embed = self.error_log.create_embed(
+        embed = await self.error_log.create_embed(
             command="on_button_error",
             args=interaction.data.custom_id,
             author=interaction.author,
@@ -48,6 +54,7 @@ class BaseView(disnake.ui.View):
             exception=type(error).__name__,
             traceback="\n".join(traceback.format_exception(type(error), error, error.__traceback__)),
         )
+        error_aggregator.logged(error_key, error_log.id)
 
         utils.embed.add_author_footer(
             embed, author=interaction.author, additional_text=[f"ID: {error_log.id}"]
@@ -2,6 +2,7 @@
 Cog controlling auto pinning of messages. Create priority pinned messages in channels.
 """
 
+import asyncio
 import datetime
 
 import disnake
@@ -15,9 +16,12 @@ from utils import cooldowns
 from utils.checks import PermissionsCheck
 from utils.constants import PINNED_MESSAGES_LIMIT
 
-from .features import AutopinFeatures
+from .features import AutopinFeatures, PinCache
 from .messages_cz import MessagesCZ
 
+# channels resolved at once by the list of priority pins
+LIST_CONCURRENCY = 5
+
 
 class AutoPin(Base, commands.Cog):
     def __init__(self, bot: Rubbergod):
@@ -27,6 +31,7 @@ class AutoPin(Base, commands.Cog):
         )
         self.bot = bot
         self.pin_features = AutopinFeatures(bot)
+        self.pin_cache = PinCache()
 
     async def api(self, message: commands.Context, params: dict):
         """Sending pins from channel to grillbot"""
@@ -35,7 +40,7 @@ class AutoPin(Base, commands.Cog):
                 channel = self.bot.get_channel(int(params["channel"]))
                 if channel is None:
                     return 1, "Channel not found"
-                pins = await channel.pins()
+                pins = await self.pin_cache.get_fresh(channel)
                 if not pins:
                     return 0, MessagesCZ.no_pins
                 if params["type"] == "markdown":
@@ -61,18 +66,18 @@ class AutoPin(Base, commands.Cog):
                 await inter.send(MessagesCZ.system_message)
                 return
 
-            if len(await message.channel.pins()) == PINNED_MESSAGES_LIMIT and not message.pinned:
+            pinned = await self.pin_cache.is_pinned(message)
+            if len(await self.pin_cache.get(message.channel)) >= PINNED_MESSAGES_LIMIT and not pinned:
                 await inter.send(MessagesCZ.max_pins_error)
                 return
 
             PinMapDB.add_or_update_channel(str(message.channel.id), str(message.id))
 
-            if not message.pinned:
-                await message.pin()
+            if not pinned:
+                await self.pin_cache.pin(message)
             else:
                 # If the message is already pinned, re-pin to promote it
-                await message.unpin()
-                await message.pin()
+                await self.pin_cache.repin(message)
 
             await inter.send(MessagesCZ.add_done)
         except commands.MessageNotFound:
@@ -99,22 +104,27 @@ class AutoPin(Base, commands.Cog):
             await inter.send(MessagesCZ.no_messages)
             return
 
-        lines: list[str] = []
-        for item in mappings:
-            try:
-                channel = await utils.general.get_or_fetch_channel(self.bot, int(item.channel_id))
-            except disnake.NotFound:
-                lines.append(MessagesCZ.list_unknown_channel(channel_id=item.channel_id))
-                PinMapDB.remove_channel(str(item.channel_id))
-                continue
-
-            try:
-                message: disnake.Message = await channel.fetch_message(int(item.message_id))
-                msg: str = MessagesCZ.list_item(channel=channel.mention, url=message.jump_url)
-            except disnake.NotFound:
-                msg = MessagesCZ.list_unknown_message(channel=channel.mention)
-            finally:
-                lines.append(msg)
+        semaphore = asyncio.Semaphore(LIST_CONCURRENCY)
+
+        async def list_line(item: PinMapDB) -> str:
+            async with semaphore:
+                try:
+                    channel = await utils.general.get_or_fetch_channel(self.bot, int(item.channel_id))
+                except disnake.NotFound:
+                    PinMapDB.remove_channel(str(item.channel_id))
+                    return MessagesCZ.list_unknown_channel(channel_id=item.channel_id)
+
+                # priority pin is pinned, so it's found in the cached pins without fetching it
+                message_id = int(item.message_id)
+                if not any(pin.id == message_id for pin in await self.pin_cache.get(channel)):
+                    try:
+                        await channel.fetch_message(message_id)
+                    except disnake.NotFound:
+                        return MessagesCZ.list_unknown_message(channel=channel.mention)
+                url = channel.get_partial_message(message_id).jump_url
+                return MessagesCZ.list_item(channel=channel.mention, url=url)
+
+        lines: list[str] = await asyncio.gather(*(list_line(item) for item in mappings))
 
         await inter.send(MessagesCZ.list_info)
         for part in utils.general.split_to_parts(lines, 10):
@@ -136,7 +146,7 @@ class AutoPin(Base, commands.Cog):
     ):
         """Get all pins from channel and send it to user in markdown file"""
         channel = inter.channel if channel is None else channel
-        pins = await channel.pins()
+        pins = await self.pin_cache.get_fresh(channel)
         if not pins:
             await inter.send(MessagesCZ.no_pins)
             return
@@ -155,13 +165,14 @@ class AutoPin(Base, commands.Cog):
         """
         repin priority pin if new pin is added
         """
+        self.pin_cache.pins_updated(channel.id)
         pin_map: PinMapDB = PinMapDB.find_channel_by_id(str(channel.id))
 
         # This channel is not used to check priority pins.
         if pin_map is None:
             return
 
-        pins: list[int] = [message.id for message in await channel.pins()]
+        pins: list[int] = [message.id for message in await self.pin_cache.get(channel)]
 
         # Mapped pin was removed. Remove from map.
         if int(pin_map.message_id) not in pins:
@@ -169,21 +180,15 @@ class AutoPin(Base, commands.Cog):
 
         # check priority pin is first
         elif pins[0] != int(pin_map.message_id):
-            message: disnake.Message = await channel.fetch_message(int(pin_map.message_id))
-
-            # Message doesn't exist. Remove from map.
-            if message is None:
-                PinMapDB.remove_channel(str(channel.id))
-                return
-
-            await message.unpin()
-            await message.pin()
+            message = self.pin_cache.find(channel.id, int(pin_map.message_id))
+            await self.pin_cache.repin(message)
 
     @commands.Cog.listener()
     async def on_raw_message_delete(self, payload: disnake.RawMessageDeleteEvent):
         """
         if the priority pin is deleted remove it from the map
         """
+        self.pin_cache.message_deleted(payload.channel_id, payload.message_id)
         pin_map: PinMapDB = PinMapDB.find_channel_by_id(str(payload.channel_id))
 
         if pin_map is None or pin_map.message_id != str(payload.message_id):
@@ -191,6 +196,10 @@ class AutoPin(Base, commands.Cog):
 
         PinMapDB.remove_channel(str(payload.channel_id))
 
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: disnake.RawMessageUpdateEvent):
+        self.pin_cache.message_edited(payload.channel_id, payload.message_id)
+
     async def handle_reaction(self, ctx: commands.Context):
         """
         if the message has X or more 'pushpin' emojis pin the message
@@ -204,13 +213,12 @@ class AutoPin(Base, commands.Cog):
             if (
                 reaction.emoji == "📌"
                 and reaction.count >= self.config.autopin_count
-                and not message.pinned
                 and not message.is_system()
                 and message.channel.id not in self.config.autopin_banned_channels
+                and not await self.pin_cache.is_pinned(message)
             ):
                 # prevent spamming max_pins_error message in channel
-                pin_count = await channel.pins()
-                if len(pin_count) == PINNED_MESSAGES_LIMIT:
+                if len(await self.pin_cache.get(channel)) >= PINNED_MESSAGES_LIMIT:
                     now = datetime.datetime.now(datetime.timezone.utc)
                     cooldown = datetime.timedelta(minutes=self.config.autopin_warning_cooldown)
                     if self.warning_time + cooldown < now:
@@ -222,6 +230,6 @@ class AutoPin(Base, commands.Cog):
 
                 users = await reaction.users().flatten()
                 await self.pin_features.log(message, users)
-                await message.pin()
+                await self.pin_cache.pin(message)
                 await message.clear_reaction("📌")
                 break
@@ -1,6 +1,9 @@
+import asyncio
 import datetime
 import io
 import json
+import time
+from collections import defaultdict, deque
 
 import disnake
 
@@ -8,6 +11,115 @@ import utils
 from config.app_config import config
 from rubbergod import Rubbergod
 
+# seconds in which a pins update event is expected after the bot's own pin or unpin
+OWN_UPDATE_WINDOW = 10
+# concurrent fetches of edited pinned messages
+REFRESH_CONCURRENCY = 5
+
+
+class PinCache:
+    """Pinned messages per channel, newest pin first like `channel.pins()`.
+
+    Channels are loaded on first use. Pins and unpins done through the cache update it directly,
+    pins update events of other changes only invalidate the channel (the event doesn't say what changed).
+    Edited pinned messages are marked stale and fetched again only for exports.
+    """
+
+    def __init__(self):
+        self.pins: dict[int, list[disnake.Message]] = {}
+        self.stale: dict[int, set[int]] = defaultdict(set)
+        # times of the bot's own pin changes which didn't get their event yet
+        self.own_updates: dict[int, deque[float]] = defaultdict(deque)
+
+    async def get(self, channel: disnake.abc.Messageable) -> list[disnake.Message]:
+        if getattr(channel, "guild", None) is None:
+            # there are no pins update events for DMs
+            return await channel.pins()
+        if channel.id not in self.pins:
+            self.pins[channel.id] = await channel.pins()
+            self.stale.pop(channel.id, None)
+        return self.pins[channel.id]
+
+    async def get_fresh(self, channel: disnake.abc.Messageable) -> list[disnake.Message]:
+        """Pins with edited messages fetched again"""
+        pins = await self.get(channel)
+        stale = self.stale.pop(channel.id, set())
+        if not stale:
+            return pins
+
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+        async def refresh(message: disnake.Message) -> disnake.Message | None:
+            if message.id not in stale:
+                return message
+            async with semaphore:
+                try:
+                    return await channel.fetch_message(message.id)
+                except disnake.NotFound:
+                    return None
+
+        refreshed = await asyncio.gather(*(refresh(message) for message in pins))
+        self.pins[channel.id] = [message for message in refreshed if message is not None]
+        return self.pins[channel.id]
+
+    def find(self, channel_id: int, message_id: int) -> disnake.Message | None:
+        """Cached pinned message, None if not pinned or the channel isn't loaded"""
+        for message in self.pins.get(channel_id, []):
+            if message.id == message_id:
+                return message
+        return None
+
+    async def is_pinned(self, message: disnake.Message) -> bool:
+        pins = await self.get(message.channel)
+        return any(pin.id == message.id for pin in pins)
+
+    async def pin(self, message: disnake.Message) -> None:
+        self._expect_update(message.channel.id)
+        await message.pin()
+        self._remove(message.channel.id, message.id)
+        if message.channel.id in self.pins:
+            self.pins[message.channel.id].insert(0, message)
+
+    async def unpin(self, message: disnake.Message) -> None:
+        self._expect_update(message.channel.id)
+        await message.unpin()
+        self._remove(message.channel.id, message.id)
+
+    async def repin(self, message: disnake.Message) -> None:
+        """Pin the message again to move it to the top"""
+        await self.unpin(message)
+        await self.pin(message)
+
+    def _expect_update(self, channel_id: int) -> None:
+        self.own_updates[channel_id].append(time.monotonic())
+
+    def _remove(self, channel_id: int, message_id: int) -> None:
+        if channel_id in self.pins:
+            self.pins[channel_id] = [pin for pin in self.pins[channel_id] if pin.id != message_id]
+        self.stale[channel_id].discard(message_id)
+
+    def pins_updated(self, channel_id: int) -> None:
+        """Handle the pins update event, invalidate the channel unless the change was done by the cache"""
+        own_updates = self.own_updates.get(channel_id)
+        now = time.monotonic()
+        while own_updates and now - own_updates[0] > OWN_UPDATE_WINDOW:
+            own_updates.popleft()
+        if own_updates:
+            own_updates.popleft()
+            return
+        self.invalidate(channel_id)
+
+    def invalidate(self, channel_id: int) -> None:
+        self.pins.pop(channel_id, None)
+        self.stale.pop(channel_id, None)
+
+    def message_edited(self, channel_id: int, message_id: int) -> None:
+        if self.find(channel_id, message_id) is not None:
+            self.stale[channel_id].add(message_id)
+
+    def message_deleted(self, channel_id: int, message_id: int) -> None:
+        self._remove(channel_id, message_id)
+
 
 class AutopinFeatures:
     def __init__(self, bot: Rubbergod):
@@ -230,6 +230,8 @@ class BetterMeme(Base, commands.Cog):
             title="BETTER MEMES LEADERBOARD",
             emote_name="trophy",
             member_id_col_name="member_ID",
+            order_by=(getattr(BetterMemeDB, order_by), BetterMemeDB.member_ID),
+            cache_key=f"bettermeme:{order_by}",
         )
         page_num = page_source.get_page_number(start)
         page = page_source.get_page(page_num)
@@ -10,7 +10,7 @@ from disnake.ext import commands
 import utils
 from buttons.general import TrashView
 from cogs.base import Base
-from database.contestvote import ContestVoteDB
+from database.contestvote import ContestVoteDB, ContestVoteTallyDB
 from features.reaction_context import ReactionContext
 from rubbergod import Rubbergod
 from utils import cooldowns
@@ -66,7 +66,12 @@ class ContestVote(Base, commands.Cog):
             await inter.send(MessagesCZ.no_reactions)
             return
 
-        contributions = await features.get_top_contributions(self.emojis, [message_url], 1)
+        contributions = features.get_top_contributions(
+            self.emojis, self.contest_vote_channel, 1, message_url.id
+        )
+        if not contributions:
+            await inter.send(MessagesCZ.no_votes)
+            return
 
         await inter.send("".join(contributions))
 
@@ -81,9 +86,7 @@ class ContestVote(Base, commands.Cog):
         number_of: int = commands.Param(default=5, gt=0, le=10, description=MessagesCZ.number_of_param),
     ):
         await inter.response.defer(ephemeral=PermissionsCheck.is_botroom(inter))
-        messages = await self.contest_vote_channel.history().flatten()
-
-        contributions = await features.get_top_contributions(self.emojis, messages, number_of)
+        contributions = features.get_top_contributions(self.emojis, self.contest_vote_channel, number_of)
 
         if not contributions:
             await inter.send(MessagesCZ.no_contributions)
@@ -175,13 +178,27 @@ class ContestVote(Base, commands.Cog):
     @contest_mod.sub_command(name="end", description=MessagesCZ.end_voting_brief)
     async def end_contest(self, inter: disnake.ApplicationCommandInteraction):
         await inter.send(MessagesCZ.vote_ending)
-        messages = await self.contest_vote_channel.history().flatten()
-        contributions = await features.get_top_contributions(self.emojis, messages, 5)
+        contributions = features.get_top_contributions(self.emojis, self.contest_vote_channel, 5)
         await self.contest_vote_channel.send(f"# Top 5 příspěvků\n{''.join(contributions)}")
 
         message = await inter.original_message()
         await message.edit(MessagesCZ.end_success)
 
+    @contest_mod.sub_command(name="rebuild_tally", description=MessagesCZ.rebuild_tally_brief)
+    async def rebuild_tally(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+        restart: bool = commands.Param(default=False, description=MessagesCZ.rebuild_tally_restart_param),
+    ):
+        await inter.send(MessagesCZ.rebuild_tally_start)
+        message = await inter.original_message()
+
+        async def report_progress(processed: int):
+            await message.edit(MessagesCZ.rebuild_tally_progress(processed=processed))
+
+        processed = await features.rebuild_tally(self.contest_vote_channel, restart, report_progress)
+        await message.edit(MessagesCZ.rebuild_tally_success(processed=processed))
+
     @contest_mod.sub_command(name="approve", description=MessagesCZ.approve_brief)
     async def approve(self, inter: disnake.ApplicationCommandInteraction, message: disnake.Message):
         if inter.channel.id != self.config.contest_vote_filter_channel:
@@ -210,10 +227,36 @@ class ContestVote(Base, commands.Cog):
 
         emoji_str = utils.general.str_emoji_id(ctx.emoji)
         message = ctx.message
-        user = await self.bot.get_or_fetch_user(ctx.member.id)
-        for r in message.reactions:
-            if utils.general.str_emoji_id(r.emoji) == emoji_str:
-                continue
-            if await r.users().find(lambda x: x.id == user.id):
-                await message.remove_reaction(ctx.emoji, user)
-                return
+        user_reactions = ContestVoteTallyDB.get_user_reactions(message.id, ctx.member.id)
+        if any(emoji != emoji_str for emoji in user_reactions):
+            await message.remove_reaction(ctx.emoji, ctx.member)
+            return
+        ContestVoteTallyDB.add(ctx.channel.id, message.id, ctx.member.id, emoji_str)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: disnake.RawReactionActionEvent):
+        if payload.channel_id != self.config.contest_vote_channel:
+            return
+        emoji_str = utils.general.str_emoji_id(payload.emoji)
+        ContestVoteTallyDB.remove(payload.message_id, payload.user_id, emoji_str)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload: disnake.RawReactionClearEvent):
+        if payload.channel_id == self.config.contest_vote_channel:
+            ContestVoteTallyDB.clear_message([payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: disnake.RawReactionClearEmojiEvent):
+        if payload.channel_id == self.config.contest_vote_channel:
+            emoji_str = utils.general.str_emoji_id(payload.emoji)
+            ContestVoteTallyDB.clear_message([payload.message_id], emoji_str)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: disnake.RawMessageDeleteEvent):
+        if payload.channel_id == self.config.contest_vote_channel:
+            ContestVoteTallyDB.clear_message([payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: disnake.RawBulkMessageDeleteEvent):
+        if payload.channel_id == self.config.contest_vote_channel:
+            ContestVoteTallyDB.clear_message(payload.message_ids)
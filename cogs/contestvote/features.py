@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import re
-from collections import Counter
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable
 
 import disnake
 
 import utils
+from database.contestvote import ContestVoteRebuildDB, ContestVoteTallyDB
 
 from .messages_cz import MessagesCZ
 
+# messages of the channel history between checkpoints of the tally rebuild
+REBUILD_CHECKPOINT_EVERY = 20
+
 
 class Image:
     def __init__(self, message_url: str, emojis: list[Emoji], invalid_votes: int = 0):
@@ -43,36 +48,36 @@ def get_contribution_id(content: str) -> int:
     return int(contribution_id.group(1))
 
 
-async def get_top_contributions(emojis: dict, messages: list[disnake.Message], number_of: int) -> list[str]:
-    images = []
-
-    # get all images and their votes
-    for message in messages:
-        # skip messages without reactions
-        if not message.reactions:
-            continue
+def tally_images(
+    emojis: dict, channel: disnake.TextChannel, reactions: list[tuple[int, int, str]]
+) -> list[Image]:
+    """Count votes from (message_id, user_id, emoji) rows of the tally"""
+    users_by_message: dict[int, dict[int, set[str]]] = defaultdict(lambda: defaultdict(set))
+    for message_id, user_id, emoji in reactions:
+        users_by_message[message_id][user_id].add(emoji)
 
-        # Create an empty list to store Emoji objects for this message
-        emojis_for_message = []
-
-        # Create a dictionary to store all reactions for this message only once
-        reactions_list = {}
-        duplicate_votes: Counter = Counter()
-        for r in message.reactions:
-            reactions_list[r] = {user.id for user in await r.users().flatten()}
-            duplicate_votes.update(user for user in reactions_list[r])
-        duplicate_user_votes = {user for user, count in duplicate_votes.items() if count > 1}
-
-        # iterate reactions and create Emoji objects for each reaction
-        for r, users in reactions_list.items():
-            users = users - duplicate_user_votes
-            emoji = utils.general.str_emoji_id(r.emoji)
-            if emoji in emojis:
-                emoji_obj = Emoji(emoji=emoji, count=len(users), value=emojis[emoji])
-                emojis_for_message.append(emoji_obj)
-        images.append(
-            Image(message.jump_url, emojis_for_message, len(duplicate_user_votes) - 1)
-        )  # -1 for the bot
+    images = []
+    for message_id, users in users_by_message.items():
+        # users with more reactions on one message are not counted
+        duplicate_user_votes = {user for user, user_emojis in users.items() if len(user_emojis) > 1}
+        counts: Counter = Counter(
+            next(iter(user_emojis)) for user, user_emojis in users.items() if user not in duplicate_user_votes
+        )
+        emojis_for_message = [
+            Emoji(emoji=emoji, count=counts[emoji], value=value)
+            for emoji, value in emojis.items()
+            if counts[emoji]
+        ]
+        message_url = channel.get_partial_message(message_id).jump_url
+        images.append(Image(message_url, emojis_for_message, len(duplicate_user_votes)))
+    return images
+
+
+def get_top_contributions(
+    emojis: dict, channel: disnake.TextChannel, number_of: int, message_id: int | None = None
+) -> list[str]:
+    """Top contributions of the channel (or the one message) computed from the tally"""
+    images = tally_images(emojis, channel, ContestVoteTallyDB.get_reactions(channel.id, message_id))
 
     messages = []
     # Sort the images by total_value in descending order and get the top n
@@ -90,3 +95,41 @@ async def get_top_contributions(emojis: dict, messages: list[disnake.Message], n
 
         messages.append(content)
     return messages
+
+
+async def rebuild_tally(
+    channel: disnake.TextChannel,
+    restart: bool = False,
+    progress: Callable[[int], Awaitable[None]] | None = None,
+) -> int:
+    """Load reactions of the whole channel history into the tally, returns number of messages.
+
+    Progress is checkpointed, an interrupted rebuild continues after the last saved message
+    unless `restart` is set.
+    """
+    checkpoint = None if restart else ContestVoteRebuildDB.get(channel.id)
+    if checkpoint is None:
+        ContestVoteTallyDB.clear_channel(channel.id)
+        after, processed = None, 0
+    else:
+        after, processed = disnake.Object(checkpoint.last_message_id), checkpoint.processed
+
+    async for message in channel.history(limit=None, after=after, oldest_first=True):
+        reactions = {}
+        for reaction in message.reactions:
+            if reaction.count == (1 if reaction.me else 0):
+                # only the bot reacted
+                continue
+            users = await reaction.users().flatten()
+            reactions[utils.general.str_emoji_id(reaction.emoji)] = [
+                user.id for user in users if not user.bot
+            ]
+        ContestVoteTallyDB.replace_message(channel.id, message.id, reactions)
+        processed += 1
+        if processed % REBUILD_CHECKPOINT_EVERY == 0:
+            ContestVoteRebuildDB.save(channel.id, message.id, processed)
+            if progress is not None:
+                await progress(processed)
+
+    ContestVoteRebuildDB.finish(channel.id)
+    return processed
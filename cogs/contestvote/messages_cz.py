@@ -8,6 +8,7 @@ class MessagesCZ(GlobalMessages):
     approve_brief = "Schválí příspěvek a pošle ho do contest kanálu"
     get_author_brief = "Vypíše autora příspěvku"
     start_voting_brief = "Spustí se hlasování. Reakce budou přidány na příspěvky"
+    rebuild_tally_brief = "Načte hlasy z historie contest kanálu, pokud se nějaké reakce nezapočítaly"
     end_voting_brief = "Hlasování se ukončí. Reakce budou smazány a výsledky budou odeslány do contest kanálu"
     number_of_param = "Počet top příspěvků"
     no_reactions = "Tato zpráva nemá žádné reakce"
@@ -31,3 +32,7 @@ class MessagesCZ(GlobalMessages):
     approve_success = "Příspěvek byl úspěšně schválen a poslán do contest kanálu."
     not_filter_channel = "Tento příkaz lze použít pouze v contest kanálu."
     not_contest_channel = "Tento příkaz lze použít pouze pro příspěvky v contest kanálu."
+    rebuild_tally_restart_param = "Začít znovu od začátku místo pokračování od poslední uložené zprávy"
+    rebuild_tally_start = "Načítám hlasy z historie contest kanálu"
+    rebuild_tally_progress = "Načítám hlasy z historie contest kanálu, zpracováno zpráv: {processed}"
+    rebuild_tally_success = "Hlasy byly načteny z historie. Zpracováno zpráv: {processed}"
@@ -1,19 +1,28 @@
+from __future__ import annotations
+
+import asyncio
 import collections
 import datetime
+import hashlib
+import json
+import logging
 import math
 import re
+from dataclasses import dataclass
 
+import aiohttp
 import disnake
-import requests
 from bs4 import BeautifulSoup
 from bs4.element import NavigableString
 
 import utils
 from buttons.embed import PaginationView
 from config.app_config import config
-from database.exams import ExamsTermsMessageDB
+from database.exams import ExamsTermsMessageDB, ExamsTermsSnapshotDB
 from rubbergod import Rubbergod
 
+rubbergod_logger = logging.getLogger("rubbergod")
+
 year_regex = r"[1-3][BM]IT"
 YEAR_LIST = ["1BIT", "2BIT", "3BIT", "1MIT", "2MIT"]
 CLEANR = re.compile(r"<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});")
@@ -21,20 +30,216 @@ CLEANR = re.compile(r"<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});")
 DATE_OFFSET = 14
 TIME_OFFSET = 14
 
+# kinds of rows of the exams table
+NOTE = "note"  # row without subject
+TEXT = "text"  # credit without a term
+DAY = "day"  # term without time
+TERMS = "terms"  # terms with time
+
+
+@dataclass(frozen=True)
+class ExamTerm:
+    name: str
+    date: str  # ISO date
+    start: str  # HH:MM
+    end: str  # HH:MM
+
+
+@dataclass(frozen=True)
+class ExamRow:
+    """One row of the exams table, normalized so it can be stored and compared"""
+
+    kind: str
+    subject: str = ""
+    text: str = ""
+    date: str = ""  # ISO date of DAY row
+    date_text: str = ""  # date of DAY row as written on the web
+    terms: tuple[ExamTerm, ...] = ()
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "subject": self.subject,
+            "text": self.text,
+            "date": self.date,
+            "date_text": self.date_text,
+            "terms": [term.__dict__ for term in self.terms],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> ExamRow:
+        data = dict(data)
+        terms = tuple(ExamTerm(**term) for term in data.pop("terms"))
+        return cls(**data, terms=terms)
+
+
+@dataclass
+class ExamTerms:
+    rows: list[ExamRow]
+    # rows differ from the previous snapshot
+    changed: bool
+
+
+def list_int(input) -> list[int]:
+    """Convert any list to list of integers"""
+    return list(map(int, input))
+
+
+def parse_date(date_str: str) -> datetime.date:
+    date_splits = list_int(date_str.split("."))
+    date_splits.reverse()  # from DDMMYYYY to YYYYMMDD
+    return datetime.date(*date_splits)  # type: ignore
+
+
+def parse_terms(html: str | bytes) -> list[ExamRow]:
+    """Parse exams table of the timetable web, CPU bound so it's run in a worker thread"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    table = soup.find("table", {"class": "exam"})
+    body = table.find("tbody") if table is not None else None
+    if body is None:
+        # There is no table so no terms
+        return []
+
+    rows = []
+    for exam in body.find_all("tr"):
+        # Every exams row start with link tag
+        tag = exam.find("a")
+        cols = exam.find_all("td")
+
+        # Check if tag is not None and get strong and normal subject tag
+        subject_tag = (tag.find("strong") or tag.contents[0]) if tag is not None else None
+
+        if subject_tag is None:
+            rows.append(ExamRow(NOTE, text=re.sub(CLEANR, "", str(cols[0]))))
+            continue
+
+        del cols[0]
+        if not isinstance(subject_tag, NavigableString):
+            subject_tag = subject_tag.contents[0]
+        subject = str(subject_tag)
+
+        if len(cols) == 1:
+            # Support for credits
+            col = cols[0]
+            strong_tag = col.find("strong")
+            if strong_tag is None:
+                # There is no term - Only text
+                rows.append(ExamRow(TEXT, subject, text=str(col.contents[0])))
+            else:
+                # Mainly for terms without specified time
+                term_date_str = strong_tag.contents[0].replace("\xa0", "").replace(" ", "")
+                term_date = parse_date(term_date_str)
+                rows.append(
+                    ExamRow(
+                        DAY,
+                        subject,
+                        text=str(col.contents[0]),
+                        date=term_date.isoformat(),
+                        date_text=term_date_str,
+                    )
+                )
+            continue
+
+        # Classic terms
+        terms = []
+        for idx, col in enumerate(cols):
+            col_terms = col.find_all("strong")
+            times = col.find_all("em")
+            number_of_terms = len(col_terms)
+
+            for idx2, (term_date_str, time) in enumerate(zip(col_terms, times)):
+                term_date_str = term_date_str.contents[0].replace("\xa0", "").replace(" ", "")
+                term_time_str = "".join(str(c) for c in time.contents)
+                term_time_str = term_time_str.replace("<sup>", ":").replace("</sup>", "")
+
+                start_time_str_parts = list_int(term_time_str.split("-")[0].replace(" ", "").split(":"))
+                end_time_str_parts = list_int(term_time_str.split("-")[1].replace(" ", "").split(":"))
+                start_time = datetime.time(*start_time_str_parts)  # type: ignore
+                end_time = datetime.time(*end_time_str_parts)  # type: ignore
+
+                name = f"{idx + 1}.  {subject}" if number_of_terms == 1 else f"{idx + 1}.{idx2 + 1} {subject}"
+                terms.append(
+                    ExamTerm(
+                        name=name,
+                        date=parse_date(term_date_str).isoformat(),
+                        start=start_time.strftime("%H:%M"),
+                        end=end_time.strftime("%H:%M"),
+                    )
+                )
+        rows.append(ExamRow(TERMS, subject, terms=tuple(terms)))
+    return rows
+
+
+def diff_terms(old: list[ExamRow], new: list[ExamRow]) -> tuple[list[ExamRow], list[ExamRow]]:
+    """Rows added to and removed from the previous snapshot"""
+    old_rows = set(old)
+    new_rows = set(new)
+    added = [row for row in new if row not in old_rows]
+    removed = [row for row in old if row not in new_rows]
+    return added, removed
+
+
+def semester_urls(year: str | None) -> tuple[str, int, str, str]:
+    """Semester, calendar year of its start and URLs of all exams and exams of the year"""
+    date = datetime.date.today()
+
+    semester = "ZS"
+    if 3 < date.month < 9:
+        semester = "LS"
+
+    cal_year = date.year
+    if date.month < 9:
+        cal_year -= 1
+
+    all_url = f"https://rozvrhy.fit.vut.cz/{semester}{cal_year}/zkousky"
+    return semester, cal_year, all_url, f"{all_url}/{year}"
+
 
 class Features:
     def __init__(self, bot: Rubbergod) -> None:
         self.bot = bot
+        # digest of the last content of term messages, unchanged messages are not edited
+        self.rendered: dict[int, str] = {}
 
     @staticmethod
     def process_match(match):
         year = match.string[match.regs[0][0] : match.regs[0][1]]
         return year
 
-    @staticmethod
-    def list_int(input) -> list[int]:
-        """Convert any list to list of integers"""
-        return list(map(int, input))
+    async def get_terms(self, url: str) -> ExamTerms | None:
+        """Terms from the web, requests are conditional so unchanged page is not downloaded and parsed.
+
+        Returns the stored snapshot if the web is not available, None if there is none.
+        """
+        snapshot = ExamsTermsSnapshotDB.get(url)
+        old_rows = [ExamRow.from_dict(row) for row in snapshot.data] if snapshot is not None else []
+        headers = {}
+        if snapshot is not None and snapshot.etag:
+            headers["If-None-Match"] = snapshot.etag
+        if snapshot is not None and snapshot.last_modified:
+            headers["If-Modified-Since"] = snapshot.last_modified
+
+        try:
+            async with self.bot.exams_session.get(url, headers=headers) as response:
+                if response.status == 304 and snapshot is not None:
+                    return ExamTerms(old_rows, changed=False)
+                if response.status != 200:
+                    # Site returned fail code
+                    return None
+                html = await response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            rubbergod_logger.warning(f"Exams from {url} could not be fetched: {error!r}")
+            return ExamTerms(old_rows, changed=False) if snapshot is not None else None
+
+        rows = await asyncio.to_thread(parse_terms, html)
+        added, removed = diff_terms(old_rows, rows)
+        if added or removed:
+            rubbergod_logger.info(f"Exams {url} changed: {len(added)} rows added, {len(removed)} removed")
+        ExamsTermsSnapshotDB.save(url, [row.to_dict() for row in rows], etag, last_modified)
+        return ExamTerms(rows, changed=bool(added or removed))
 
     async def get_message_destination(self, channel: disnake.TextChannel, message_index: int = 0):
         saved_messages = ExamsTermsMessageDB.get_message_from_channel(channel.id)
@@ -58,64 +263,55 @@ class Features:
 
         return dest
 
-    async def update_exam_terms(self, guild: disnake.Guild, author: disnake.User = None):
-        updated = 0
-
+    def get_term_channels(self, guild: disnake.Guild) -> dict[disnake.TextChannel, list[str]]:
+        """Term channels of the guild with years of their messages in order"""
+        channels: dict[disnake.TextChannel, list[str]] = {}
         for channel in guild.channels:
             if not isinstance(channel, disnake.TextChannel):
                 continue
 
             for channel_name in config.exams_term_channels:
-                if channel_name.lower() == channel.name.lower():
-                    if not channel_name[0].isdigit():
-                        if channel_name[:3].upper() == "MIT":
-                            dest1 = await self.get_message_destination(channel, 0)
-                            dest2 = await self.get_message_destination(channel, 1)
-
-                            await self.process_exams(dest1, "1MIT", author)
-                            await self.process_exams(dest2, "2MIT", author)
-                            updated += 1
-                    else:
-                        match = re.match(year_regex, channel_name[:4].upper())
-                        if match is not None:
-                            year = self.process_match(match)
-                            if year is not None:
-                                dest = await self.get_message_destination(channel)
-
-                                await self.process_exams(dest, year, author)
-                                updated += 1
-
-        return updated
-
-    async def process_exams(
-        self,
-        target: disnake.ApplicationCommandInteraction | disnake.TextChannel | disnake.Message,
-        year: str | None,
-        author: disnake.User = None,
-    ):
-        """
-        Get exams data from web, parse and send/update message
-
-        params:
-            target:
-                Interaction: called from `exam` command
-                TextChannel: called on `term` start command
-                Message: called on `term` update cron job
-            year: one of `YEAR_LIST` or None, get just specified year info
-            author: author of command to display in embed footer
-        """
-        date = datetime.date.today()
-
-        semester = "ZS"
-        if 3 < date.month < 9:
-            semester = "LS"
+                if channel_name.lower() != channel.name.lower():
+                    continue
+                if not channel_name[0].isdigit():
+                    if channel_name[:3].upper() == "MIT":
+                        channels[channel] = ["1MIT", "2MIT"]
+                else:
+                    match = re.match(year_regex, channel_name[:4].upper())
+                    if match is not None:
+                        channels[channel] = [self.process_match(match)]
+        return channels
+
+    async def update_exam_terms(self, guild: disnake.Guild, author: disnake.User = None) -> int:
+        """Update term messages of all term channels, returns number of channels with edited messages"""
+        channels = self.get_term_channels(guild)
+        years = sorted({year for channel_years in channels.values() for year in channel_years})
+        urls = {year: semester_urls(year)[3] for year in years}
+        results = await asyncio.gather(*(self.get_terms(urls[year]) for year in years))
+        terms = dict(zip(years, results))
+
+        async def update_channel(channel: disnake.TextChannel, channel_years: list[str]) -> bool:
+            updated = False
+            # messages of one channel are created in order
+            for index, year in enumerate(channel_years):
+                if terms[year] is None:
+                    continue
+                dest = await self.get_message_destination(channel, index)
+                updated |= await self.send_terms(dest, year, terms[year], author)
+            return updated
+
+        updated = await asyncio.gather(
+            *(update_channel(channel, channel_years) for channel, channel_years in channels.items())
+        )
+        return sum(updated)
 
-        cal_year = date.year
-        if date.month < 9:
-            cal_year -= 1
+    def create_embed(self, title: str, description: str, author: disnake.User = None) -> disnake.Embed:
+        embed = disnake.Embed(title=title, description=description, color=disnake.Color.dark_blue())
+        utils.embed.add_author_footer(embed, author if author is not None else self.bot.user)
+        return embed
 
-        all_url = f"https://rozvrhy.fit.vut.cz/{semester}{cal_year}/zkousky"
-        year_url = f"{all_url}/{year}"
+    def get_title(self, year: str | None) -> tuple[str, str]:
+        semester, cal_year, all_url, year_url = semester_urls(year)
         description = f"[Odkaz na zkoušky ročníku]({year_url})\n" if year else ""
         description += f"[Odkaz na všechny zkoušky]({all_url})"
 
@@ -124,187 +320,132 @@ class Features:
             if year
             else f"Zkoušky {semester}{cal_year}-{cal_year + 1}"
         )
+        return title, description
 
-        r = requests.get(year_url)
-        if r.status_code != 200:
-            # Site returned fail code
-            embed = disnake.Embed(title=title, description=description, color=disnake.Color.dark_blue())
-            utils.embed.add_author_footer(embed, author if author is not None else self.bot.user)
-            if isinstance(target, disnake.ApplicationCommandInteraction):
-                await target.send(embed=embed)
-            return
-
-        soup = BeautifulSoup(r.content, "html.parser")
-
-        table = soup.find("table", {"class": "exam"})
-        body = table.find("tbody")
-
-        if body is None:
-            # There is no table so no terms
-            embed = disnake.Embed(title=title, description=description, color=disnake.Color.dark_blue())
-            utils.embed.add_author_footer(embed, author if author is not None else self.bot.user)
-
-            if isinstance(target, disnake.ApplicationCommandInteraction):
-                await target.send(embed=embed)
-                return
-
-        # There is body so start parsing table
-        exams = body.find_all("tr")
+    def render_terms(
+        self, rows: list[ExamRow], title: str, description: str, author: disnake.User = None
+    ) -> tuple[list[disnake.Embed], dict[datetime.datetime, str]]:
+        """Pages of the exams command and upcoming terms for term channels by their start"""
+        now = datetime.datetime.now()
+        today = now.date()
 
-        number_of_exams = len(exams)
         bs = config.exams_page_size
-        number_of_batches = math.ceil(number_of_exams / bs)
-        exam_batches = [exams[i * bs : bs + i * bs] for i in range(number_of_batches)]
+        number_of_batches = math.ceil(len(rows) / bs)
+        row_batches = [rows[i * bs : bs + i * bs] for i in range(number_of_batches)]
 
         term_strings_dict = {}
         pages = []
-        for exam_batch in exam_batches:
-            embed = disnake.Embed(title=title, description=description, color=disnake.Color.dark_blue())
-            utils.embed.add_author_footer(embed, author if author is not None else self.bot.user)
-
-            for exam in exam_batch:
-                # Every exams row start with link tag
-                tag = exam.find("a")
-                cols = exam.find_all("td")
-
-                # Check if tag is not None and get strong and normal subject tag
-                subject_tag = (tag.find("strong") or tag.contents[0]) if tag is not None else None
+        for row_batch in row_batches:
+            embed = self.create_embed(title, description, author)
+
+            for row in row_batch:
+                if row.kind == NOTE:
+                    embed.add_field(name="Poznámka", value=row.text, inline=False)
+                elif row.kind == TEXT:
+                    embed.add_field(name=row.subject, value=row.text, inline=False)
+                elif row.kind == DAY:
+                    subject = row.subject
+                    term_date = datetime.date.fromisoformat(row.date)
+                    # Without actual time set time to end of the day
+                    term_datetime = datetime.datetime.combine(term_date, datetime.time(23, 59))
+                    term_content = f"{row.date_text}\n{row.text}"
+
+                    # Calculate character offsets
+                    padded_term_date = datetime.date.strftime(term_date, "%d.%m.%Y")
+                    date_offset = " " * (DATE_OFFSET - len(subject))
+                    time_offset = " " * (TIME_OFFSET - len(padded_term_date))  # Here used as data offset
+                    term_string = f"{subject}{date_offset}{padded_term_date}{time_offset}{row.text}"
+
+                    if term_date == today:
+                        term_strings_dict[term_datetime] = f"- {term_string}"
+                    elif term_datetime < now:
+                        subject = f"~~{subject}~~"
+                        term_content = f"~~{term_content}~~"
+                    else:
+                        term_strings_dict[term_datetime] = f"+ {term_string}"
 
-                if subject_tag is None:
-                    content = re.sub(CLEANR, "", str(cols[0]))
-                    embed.add_field(name="Poznámka", value=content, inline=False)
+                    embed.add_field(name=subject, value=term_content, inline=False)
                 else:
-                    del cols[0]
-
-                    if not isinstance(subject_tag, NavigableString):
-                        subject_tag = subject_tag.contents[0]
+                    for term in row.terms:
+                        name = term.name
+                        term_date = datetime.date.fromisoformat(term.date)
+                        term_datetime = datetime.datetime.combine(
+                            term_date, datetime.time.fromisoformat(term.start)
+                        )
+                        term_time_str = f"{term.start} - {term.end}"
+                        padded_term_date = datetime.date.strftime(term_date, "%d.%m.%Y")
+                        term_date_time_string = f"{padded_term_date} {term_time_str}"
+
+                        # Calculate character offsets
+                        date_offset = " " * (DATE_OFFSET - len(name))
+                        time_offset = " " * (TIME_OFFSET - len(padded_term_date))
+                        term_string = f"{name}{date_offset}{padded_term_date}{time_offset}{term_time_str}"
+
+                        if term_date == today:
+                            term_strings_dict[term_datetime] = f"- {term_string}"
+                        elif term_datetime < now:
+                            name = f"~~{name}~~"
+                            term_date_time_string = f"~~{term_date_time_string}~~"
+                        else:
+                            term_strings_dict[term_datetime] = f"+ {term_string}"
 
-                    col_count = len(cols)
-                    if col_count == 1:
-                        # Support for credits
-                        col = cols[0]
-                        strong_tag = col.find("strong")
+                        embed.add_field(name=name, value=term_date_time_string)
 
-                        if strong_tag is None:
-                            # There is no term - Only text
-                            embed.add_field(name=subject_tag, value=col.contents[0], inline=False)
-                        else:
-                            # Mainly for terms without specified time
-                            term_date_str = strong_tag.contents[0].replace("\xa0", "").replace(" ", "")
-
-                            date_splits = self.list_int(term_date_str.split("."))
-                            date_splits.reverse()  # from DDMMYYYY to YYYYMMDD
-                            # Without actual time set time to end of the day
-                            term_datetime = datetime.datetime(*date_splits, 23, 59)  # type: ignore
-
-                            term_date = datetime.date(*date_splits)
-
-                            term_content = f"{term_date_str}\n{col.contents[0]}"
-
-                            # Calculate character offsets
-                            padded_term_date = datetime.date.strftime(term_date, "%d.%m.%Y")
-                            date_offset = " " * (DATE_OFFSET - len(subject_tag))
-                            time_offset = " " * (
-                                TIME_OFFSET - len(padded_term_date)
-                            )  # Here used as data offset
-                            term_string = f"{subject_tag}{date_offset}{padded_term_date}"
-                            term_string += f"{time_offset}{col.contents[0]}"
-
-                            if term_date == datetime.date.today():
-                                term_strings_dict[term_datetime] = f"- {term_string}"
-                            elif term_datetime < datetime.datetime.now():
-                                subject_tag = f"~~{subject_tag}~~"
-                                term_content = f"~~{term_content}~~"
-                            else:
-                                term_strings_dict[term_datetime] = f"+ {term_string}"
-
-                            embed.add_field(name=subject_tag, value=term_content, inline=False)
-                    else:
-                        # Classic terms
-                        whole_term_count = 0
-                        for idx, col in enumerate(cols):
-                            terms = col.find_all("strong")
-                            times = col.find_all("em")
-
-                            number_of_terms = len(terms)
-                            whole_term_count += number_of_terms
-
-                            for idx2, (term_date_str, time) in enumerate(zip(terms, times)):
-                                term_date_str = term_date_str.contents[0].replace("\xa0", "").replace(" ", "")
-                                term_time_str = ""
-                                for c in time.contents:
-                                    term_time_str += str(c)
-                                term_time_str = term_time_str.replace("<sup>", ":").replace("</sup>", "")
-
-                                date_splits = self.list_int(term_date_str.split("."))
-                                date_splits.reverse()  # from DDMMYYYY to YYYYMMDD
-
-                                start_time_str_parts = self.list_int(
-                                    term_time_str.split("-")[0].replace(" ", "").split(":")
-                                )
-                                end_time_str_parts = self.list_int(
-                                    term_time_str.split("-")[1].replace(" ", "").split(":")
-                                )
-
-                                term_datetime = datetime.datetime(
-                                    *date_splits,  # type: ignore
-                                    *start_time_str_parts,  # type: ignore
-                                )
-
-                                term_date = datetime.date(*date_splits)
-
-                                if start_time_str_parts is not None and end_time_str_parts is not None:
-                                    start_time = datetime.time(*start_time_str_parts)  # type: ignore
-                                    start_time_str = datetime.time.strftime(start_time, "%H:%M")
-                                    end_time = datetime.time(*end_time_str_parts)  # type: ignore
-                                    end_time_str = datetime.time.strftime(end_time, "%H:%M")
-                                    term_time_str = f"{start_time_str} - {end_time_str}"
-
-                                padded_term_date = datetime.date.strftime(term_date, "%d.%m.%Y")
-                                term_date_time_string = f"{padded_term_date} {term_time_str}"
-
-                                name = (
-                                    f"{idx + 1}.  {subject_tag}"
-                                    if number_of_terms == 1
-                                    else f"{idx + 1}.{idx2 + 1} {subject_tag}"
-                                )
-
-                                # Calculate character offsets
-                                date_offset = " " * (DATE_OFFSET - len(name))
-                                time_offset = " " * (TIME_OFFSET - len(padded_term_date))
-                                term_string = f"{name}{date_offset}{padded_term_date}"
-                                term_string += f"{time_offset}{term_time_str}"
-
-                                if term_date == datetime.date.today():
-                                    term_strings_dict[term_datetime] = f"- {term_string}"
-                                elif term_datetime < datetime.datetime.now():
-                                    name = f"~~{name}~~"
-                                    term_date_time_string = f"~~{term_date_time_string}~~"
-                                else:
-                                    term_strings_dict[term_datetime] = f"+ {term_string}"
-
-                                embed.add_field(name=name, value=term_date_time_string)
-
-                        to_add = math.ceil(whole_term_count / 3) * 3 - whole_term_count
-                        for _ in range(to_add):
-                            embed.add_field(name="\u200b", value="\u200b")
+                    whole_term_count = len(row.terms)
+                    to_add = math.ceil(whole_term_count / 3) * 3 - whole_term_count
+                    for _ in range(to_add):
+                        embed.add_field(name="\u200b", value="\u200b")
 
             pages.append(embed)
 
         if len(pages) == 0:
-            embed = disnake.Embed(title=title, description=description, color=disnake.Color.dark_blue())
-            utils.embed.add_author_footer(embed, author if author is not None else self.bot.user)
-            pages.append(embed)
-        if isinstance(target, disnake.ApplicationCommandInteraction):
-            view = PaginationView(target.author, pages)
-            view.message = await target.edit_original_response(embed=pages[0], view=view)
-        else:
-            header = disnake.Embed(title=title, description=description, color=disnake.Color.dark_blue())
-            await self.handle_exams_with_database_access(term_strings_dict, header, target)
+            pages.append(self.create_embed(title, description, author))
+        return pages, term_strings_dict
 
-    async def handle_exams_with_database_access(
-        self, src_data: dict, header: disnake.Embed, dest: disnake.TextChannel | disnake.Message
+    async def process_exams(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+        year: str | None,
+        author: disnake.User = None,
     ):
+        """
+        Get exams data from web, parse and send them as paginated embeds
+
+        params:
+            inter: interaction of the `exams` command
+            year: one of `YEAR_LIST` or None, get just specified year info
+            author: author of command to display in embed footer
+        """
+        title, description = self.get_title(year)
+        terms = await self.get_terms(semester_urls(year)[3])
+        if terms is None:
+            await inter.send(embed=self.create_embed(title, description, author))
+            return
+
+        pages, _ = self.render_terms(terms.rows, title, description, author)
+        view = PaginationView(inter.author, pages)
+        view.message = await inter.edit_original_response(embed=pages[0], view=view)
+
+    async def send_terms(
+        self,
+        dest: disnake.TextChannel | disnake.Message,
+        year: str,
+        terms: ExamTerms,
+        author: disnake.User = None,
+    ) -> bool:
+        """Send or edit the term message of the year, returns False if the message was up to date"""
+        title, description = self.get_title(year)
+        _, term_strings_dict = self.render_terms(terms.rows, title, description, author)
+        header = disnake.Embed(title=title, description=description, color=disnake.Color.dark_blue())
+        return await self.handle_exams_with_database_access(term_strings_dict, header, dest, terms.changed)
+
+    async def handle_exams_with_database_access(
+        self,
+        src_data: dict,
+        header: disnake.Embed,
+        dest: disnake.TextChannel | disnake.Message,
+        changed: bool = True,
+    ) -> bool:
         sorted_src_data = collections.OrderedDict(sorted(src_data.items()))
 
         too_much_terms = False
@@ -347,11 +488,22 @@ class Features:
                 src_data_string = f"{src_data_string}\n\nZbytek termínů v odkazu"
             src_data_string = f"```diff\n{src_data_string}\n```"
 
+        # content of the message depends on the date too, not only on the terms
+        digest = hashlib.sha256(
+            json.dumps([src_data_string, header.to_dict()], sort_keys=True).encode()
+        ).hexdigest()
+
         if isinstance(dest, disnake.TextChannel):
             # No previous message in channel
             send_message = await dest.send(content=src_data_string, embed=header)
             if send_message is not None:
                 ExamsTermsMessageDB.create_term_message(send_message.id, send_message.channel.id)
-        else:
-            # Message already exists
-            await dest.edit(content=src_data_string, embed=header)
+                self.rendered[send_message.id] = digest
+            return True
+
+        # Message already exists
+        if not changed and self.rendered.get(dest.id) == digest:
+            return False
+        await dest.edit(content=src_data_string, embed=header)
+        self.rendered[dest.id] = digest
+        return True
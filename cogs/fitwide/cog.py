@@ -2,7 +2,6 @@
 Cog implementing management of year roles and database of user logins.
 """
 
-import asyncio
 import json
 from datetime import datetime, timezone
 from io import BytesIO
@@ -13,7 +12,10 @@ from disnake.ext import commands
 
 import utils
 from cogs.base import Base
+from database import session
 from database.verification import PermitDB, ValidPersonDB, VerifyStatus
+from features.autocomplete import login_autocomplete
+from features.bulk_mutation import Mutation, run_bulk_job
 from features.prompt import PromptSession
 from features.verification import Verification
 from features.verify_helper import VerifyHelper
@@ -25,11 +27,9 @@ from utils.general import edit_msg
 from . import features
 from .messages_cz import MessagesCZ
 
-user_logins: list[str] = []
-
 
 async def autocomp_user_logins(inter: disnake.ApplicationCommandInteraction, user_input: str):
-    return [user for user in user_logins if user_input.lower() in user][:25]
+    return login_autocomplete.search(user_input)
 
 
 class FitWide(Base, commands.Cog):
@@ -38,16 +38,7 @@ class FitWide(Base, commands.Cog):
         self.bot = bot
         self.verification = Verification(bot)
         self.helper = VerifyHelper(bot)
-        self.get_all_logins()
-
-    def get_all_logins(self):
-        global user_logins
-        user_logins_verified = PermitDB.get_all_logins()
-        user_logins_not_verified = ValidPersonDB.get_all_logins()
-        verified_logins = [user[0] for user in user_logins_verified]
-        not_verified_logins = [user[0] for user in user_logins_not_verified]
-        user_logins = set(verified_logins + not_verified_logins)
-        user_logins = sorted(user_logins)
+        login_autocomplete.refresh()
 
     @cooldowns.default_cooldown
     @PermissionsCheck.is_bot_admin()
@@ -57,14 +48,12 @@ class FitWide(Base, commands.Cog):
         await inter.send(MessagesCZ.role_check_start)
         message = await inter.original_response()
         guild = inter.guild
-        verified = await features.get_verified_members(guild)
-
-        permitted = PermitDB.get_all_users()
-        permitted_ids = [int(person.discord_ID) for person in permitted]
+        report = features.reconcile(guild)
 
-        for member in verified:
-            if member.id not in permitted_ids:
-                await message.reply(MessagesCZ.verify_check_user_not_found(user=member.id, id=member.id))
+        for member in report.verified_without_permit:
+            await message.reply(MessagesCZ.verify_check_user_not_found(user=member.id, id=member.id))
+        if report.permits_not_on_server:
+            await message.reply(MessagesCZ.verify_check_left_server(count=len(report.permits_not_on_server)))
 
         await message.reply(MessagesCZ.role_check_end)
 
@@ -76,26 +65,12 @@ class FitWide(Base, commands.Cog):
         await inter.send(MessagesCZ.role_check_start)
         message = await inter.original_response()
         guild = inter.guild
-        verified = await features.get_verified_members(guild)
-
-        for member in verified:
-            users = PermitDB.get_all_users_by_id(member.id)
-            if not users:
-                continue
-            if len(users) > 1:
-                await message.reply(MessagesCZ.status_check_user_duplicate(user=member.id, id=member.id))
-                continue
-
-            user = users[0]
+        report = features.reconcile(guild)
 
-            person = ValidPersonDB.get_user_by_login(user.login)
-            if person is None:
-                continue
-
-            if person.status != VerifyStatus.Verified.value:
-                await message.reply(
-                    MessagesCZ.status_check_wrong_status(user=user.discord_ID, id=user.discord_ID)
-                )
+        for member in report.duplicate_permits:
+            await message.reply(MessagesCZ.status_check_user_duplicate(user=member.id, id=member.id))
+        for member, _ in report.wrong_status:
+            await message.reply(MessagesCZ.status_check_wrong_status(user=member.id, id=member.id))
 
         await message.reply(MessagesCZ.role_check_end)
 
@@ -108,7 +83,7 @@ class FitWide(Base, commands.Cog):
         message = await inter.original_response()
         guild = inter.guild
 
-        unmatching_members = await features.get_members_with_unmatching_year(guild)
+        unmatching_members = features.reconcile(guild).unmatching_year
 
         for source_role, target_data in unmatching_members.items():
             for target_role, target_members in target_data.items():
@@ -135,7 +110,7 @@ class FitWide(Base, commands.Cog):
         message = await inter.original_response()
         guild = inter.guild
 
-        unmatching_members = await features.get_members_with_unmatching_year(guild)
+        unmatching_members = features.reconcile(guild).unmatching_year
 
         for source_role, target_data in unmatching_members.items():
             for target_role, target_members in target_data.items():
@@ -157,9 +132,11 @@ class FitWide(Base, commands.Cog):
                     await message.reply(MessagesCZ.role_check_debug_mode)
                     continue
 
+                mutations = []
                 for member in target_members:
-                    await member.add_roles(target_role)
-                    await member.remove_roles(source_role)
+                    mutations.append(Mutation.add_role(member, target_role))
+                    mutations.append(Mutation.remove_role(member, source_role))
+                await run_bulk_job(self.bot, f"{source_year} -> {target_year}", guild, mutations, message)
 
         await message.reply(MessagesCZ.role_check_end)
 
@@ -172,7 +149,7 @@ class FitWide(Base, commands.Cog):
         message = await inter.original_response()
         guild = inter.guild
 
-        unmatching_members = await features.get_members_with_unmatching_year(guild)
+        unmatching_members = features.reconcile(guild).unmatching_year
 
         for source_role, target_data in unmatching_members.items():
             for target_role, target_members in target_data.items():
@@ -194,9 +171,11 @@ class FitWide(Base, commands.Cog):
                     await message.reply(MessagesCZ.role_check_debug_mode)
                     continue
 
+                mutations = []
                 for member in target_members:
-                    await member.add_roles(target_role)
-                    await member.remove_roles(source_role)
+                    mutations.append(Mutation.add_role(member, target_role))
+                    mutations.append(Mutation.remove_role(member, source_role))
+                await run_bulk_job(self.bot, f"{source_year} -> {target_year}", guild, mutations, message)
 
         await message.reply(MessagesCZ.role_check_end)
 
@@ -214,7 +193,7 @@ class FitWide(Base, commands.Cog):
 
         ex_student_alternatives = [survivor, king]
 
-        unmatching_members = await features.get_members_with_unmatching_year(guild)
+        unmatching_members = features.reconcile(guild).unmatching_year
 
         for source_role, target_data in unmatching_members.items():
             for target_role, target_members in target_data.items():
@@ -234,10 +213,12 @@ class FitWide(Base, commands.Cog):
                         await message.reply(MessagesCZ.role_check_debug_mode)
                         continue
 
+                    mutations = []
                     for member in target_members:
                         if not (any(role in member.roles for role in ex_student_alternatives)):
-                            await member.add_roles(target_role)
-                        await member.remove_roles(source_role)
+                            mutations.append(Mutation.add_role(member, target_role))
+                        mutations.append(Mutation.remove_role(member, source_role))
+                    await run_bulk_job(self.bot, f"{source_year} -> {target_year}", guild, mutations, message)
 
         await message.reply(MessagesCZ.role_check_end)
 
@@ -250,7 +231,7 @@ class FitWide(Base, commands.Cog):
         message = await inter.original_response()
         guild = inter.guild
 
-        unmatching_members = await features.get_members_with_unmatching_year(guild)
+        unmatching_members = features.reconcile(guild).unmatching_year
 
         for source_role, target_data in unmatching_members.items():
             for target_role, target_members in target_data.items():
@@ -285,17 +266,11 @@ class FitWide(Base, commands.Cog):
         VUT = disnake.utils.get(guild.roles, name="VUT")
 
         # give 3bit/2mit users 2bit/1mit role
-        for index, member in enumerate(BIT_roles[3].members):
-            await member.add_roles(BIT_roles[2])
-            if (index % 50) == 0:
-                progress_bar = utils.general.create_bar(index, len(BIT_roles[3].members))
-                await message.edit(f"Přidávání role 3bit: {progress_bar}")
-
-        for index, member in enumerate(MIT_roles[2].members):
-            if (index % 50) == 0:
-                progress_bar = utils.general.create_bar(index, len(MIT_roles[2].members))
-                await message.edit(f"Přidávání role 2mit: {progress_bar}")
-            await member.add_roles(MIT_roles[1])
+        mutations = [Mutation.add_role(member, BIT_roles[2]) for member in BIT_roles[3].members]
+        mutations += [Mutation.add_role(member, MIT_roles[1]) for member in MIT_roles[2].members]
+        # progress of the job is saved, continue an interrupted run with `/bulk_job resume`,
+        # running the command again would rename and create the roles once more
+        await run_bulk_job(self.bot, "increment roles", guild, mutations, message)
 
         # increment roles and create 0bit and 0mit
         BIT_COLORS = [role.color for role in BIT_roles]
@@ -382,7 +357,7 @@ class FitWide(Base, commands.Cog):
         bit_terminy_channels.insert(0, terminy_1bit_channel)
 
         await features.set_channel_permissions_for_new_students(
-            message, guild, BIT_roles[0], MIT_roles[0], bit_terminy_channels, info_channels
+            self.bot, message, guild, BIT_roles[0], MIT_roles[0], bit_terminy_channels, info_channels
         )
 
         await inter.edit_original_response(MessagesCZ.increment_roles_success)
@@ -438,38 +413,42 @@ class FitWide(Base, commands.Cog):
         await inter.send(MessagesCZ.update_db_start)
         message = await inter.original_response()
 
-        all_persons = ValidPersonDB.get_all_vut_persons()
-        exstudent_count = 0
+        persons = {person.login: person for person in ValidPersonDB.get_all_vut_persons()}
+        last_report = 0
 
-        if continue_from_login:
-            for index, person in enumerate(all_persons):
-                if person.login == continue_from_login:
-                    all_persons = all_persons[index:]
-                    break
-
-        persons_count = len(all_persons)
-        for index, person in enumerate(all_persons):
-            if (index % 50) == 0:
-                progress_bar = utils.general.create_bar(index, persons_count)
-                await message.edit(MessagesCZ.update_db_progress(progress_bar=progress_bar))
-
-            if (index % 8) == 0:
-                # The simplest solution we could think of so that we don't hit rate limit
-                await asyncio.sleep(60)
-
-            self.bot.logger.info(f"Checking {person.login}")
-            updated_person = await self.helper.check_api(person.login)
-            if updated_person is None:
+        async def update_person(login: str, user: dict | None) -> bool:
+            """Returns True if the person became ExStudent"""
+            if user is None:
+                person = persons[login]
                 if person.year != "MUNI" and person.year != "ExStudent":
                     person.year = "ExStudent"
-                    exstudent_count += 1
-                continue
+                    session.commit()
+                    return True
+                return False
 
             # This will have the side-effect of mixing up "0bit"/"0mit" with the others again
             # until the enrollment to the next year
+            updated_person = await self.helper.save_user_details(user)
             ValidPersonDB.merge_person(updated_person)
+            return False
+
+        async def report_progress(done: int, total: int) -> None:
+            nonlocal last_report
+            if done - last_report >= 50 or done == total:
+                last_report = done
+                progress_bar = utils.general.create_bar(done, total)
+                await message.edit(MessagesCZ.update_db_progress(progress_bar=progress_bar))
+
+        # unfinished update continues where it stopped
+        job = await self.bot.vutapi.bulk_refresh(
+            "update_db",
+            list(persons),
+            update_person,
+            progress=report_progress,
+            continue_from=continue_from_login or None,
+        )
 
-        await message.reply(MessagesCZ.update_db_done(exstudent_count=exstudent_count))
+        await message.reply(MessagesCZ.update_db_done(exstudent_count=job.exstudents))
 
     @verify_db.sub_command(name="get_login", description=MessagesCZ.get_login_brief)
     async def get_login(self, inter: disnake.ApplicationCommandInteraction, member: disnake.User):
@@ -1,11 +1,14 @@
 import logging
+from collections import defaultdict
+from typing import NamedTuple
 
 import disnake
 from disnake.ext import commands
 
 import utils
 from config.app_config import config
-from database.verification import PermitDB, ValidPersonDB
+from database.verification import PermitDB, ValidPersonDB, VerifyStatus
+from features.bulk_mutation import Mutation, run_bulk_job
 from features.verification import Verification
 
 CATEGORIES_NAMES = [
@@ -31,6 +34,7 @@ async def send_masstag_messages(ctx: commands.Context, prefix: str, target_ids:
 
 
 async def set_channel_permissions_for_new_students(
+    bot: disnake.Client,
     message: disnake.Message,
     guild: disnake.Guild,
     bit0: disnake.Role,
@@ -46,38 +50,38 @@ async def set_channel_permissions_for_new_students(
 
     # give 0mit access to mit-general
     mit_general = disnake.utils.get(guild.channels, name="mit-general")
-    await mit_general.set_permissions(mit0, read_messages=True)
+    mutations = [Mutation.set_permissions(mit_general, mit0, read_messages=True)]
 
     mit_channels_names = ["mit-terminy", "mit-info"]
     mit_channels = [
         disnake.utils.get(guild.channels, name=channel_name) for channel_name in mit_channels_names
     ]
     for channel in mit_channels:
-        await channel.set_permissions(bit0, read_messages=True)
-        await channel.set_permissions(mit0, read_messages=True)
+        mutations.append(Mutation.set_permissions(channel, bit0, read_messages=True))
+        mutations.append(Mutation.set_permissions(channel, mit0, read_messages=True))
 
     # Xbit-info channels overwrites
     for channel in info_channels:
-        await channel.set_permissions(bit0, read_messages=True)
+        mutations.append(Mutation.set_permissions(channel, bit0, read_messages=True))
 
     # Xbit-terminy overwrites
     for terminy_channel in bit_terminy_channels:
-        await terminy_channel.set_permissions(bit0, read_messages=True)
+        mutations.append(Mutation.set_permissions(terminy_channel, bit0, read_messages=True))
 
     # for every channel in category set overwrite
-    for index, category in enumerate(categories):
-        progress_bar = utils.general.create_bar(index, len(categories))
-        await message.edit(f"Přídávám práva pro roomky: {progress_bar}")
+    for category in categories:
         for channel in category.channels:
-            await channel.set_permissions(bit0, read_messages=True)
-            await channel.set_permissions(mit0, read_messages=True)
+            mutations.append(Mutation.set_permissions(channel, bit0, read_messages=True))
+            mutations.append(Mutation.set_permissions(channel, mit0, read_messages=True))
 
     # skolni-info, cvicici-info, stream-links, senat-unie-drby room overwrites
     channel_names = ["skolni-info", "vyucujici-info", "stream-links", "senat-unie-drby", "bp-szz", "dp-szz"]
     channels = [disnake.utils.get(guild.channels, name=channel_name) for channel_name in channel_names]
     for channel in channels:
-        await channel.set_permissions(bit0, read_messages=True)
-        await channel.set_permissions(mit0, read_messages=True)
+        mutations.append(Mutation.set_permissions(channel, bit0, read_messages=True))
+        mutations.append(Mutation.set_permissions(channel, mit0, read_messages=True))
+
+    await run_bulk_job(bot, "permissions for new students", guild, mutations, message)
 
 
 async def get_teacher_roles(guild: disnake.Guild) -> list[disnake.Role]:
@@ -157,94 +161,136 @@ async def update_teacher_info(
     return None, new_perms_list
 
 
-async def get_verified_members(guild: disnake.Guild) -> list[disnake.Member]:
-    members = guild.members
+YEARS = [
+    "0BIT",
+    "1BIT",
+    "2BIT",
+    "3BIT+",
+    "0MIT",
+    "1MIT",
+    "2MIT+",
+    "Doktorand",
+    "Vyucujici/Zamestnanec",
+    "VUT",
+    "ExStudent",
+]
+
 
+def get_verified_members(guild: disnake.Guild) -> list[disnake.Member]:
     verify = disnake.utils.get(guild.roles, name="Verify")
-    host = disnake.utils.get(guild.roles, name="Host")
-    bot = disnake.utils.get(guild.roles, name="Bot")
-    poradce = disnake.utils.get(guild.roles, name="Poradce")
-    vut = disnake.utils.get(guild.roles, name="VUT")
-
-    verified = [
-        member
-        for member in members
-        if verify in member.roles
-        and host not in member.roles
-        and bot not in member.roles
-        and poradce not in member.roles
-        and vut not in member.roles
+    if verify is None:
+        return []
+    excluded = [
+        role.id
+        for role in (disnake.utils.get(guild.roles, name=name) for name in ("Host", "Bot", "Poradce", "VUT"))
+        if role is not None
     ]
+    return [member for member in verify.members if not any(member.get_role(role_id) for role_id in excluded)]
 
-    return verified
 
+class PermitRecord(NamedTuple):
+    login: str
+    discord_id: int
+    # False if the login is not in the valid persons
+    valid_person: bool
+    year: str | None
+    status: int | None
 
-async def get_members_with_unmatching_year(
-    guild: disnake.Guild,
-) -> dict[disnake.Role, dict[disnake.Role, list[disnake.Member]]]:
-    verified = await get_verified_members(guild)
-
-    ex_student = disnake.utils.get(guild.roles, name="ExStudent")
-    survivor = disnake.utils.get(guild.roles, name="Survivor")
-    king = disnake.utils.get(guild.roles, name="King")
-
-    ex_student_alternatives = [survivor, king]
-
-    years = [
-        "0BIT",
-        "1BIT",
-        "2BIT",
-        "3BIT+",
-        "0MIT",
-        "1MIT",
-        "2MIT+",
-        "Doktorand",
-        "Vyucujici/Zamestnanec",
-        "VUT",
-        "ExStudent",
-    ]
 
-    year_roles = {year: disnake.utils.get(guild.roles, name=year) for year in years}
+class ReconciliationReport:
+    """Differences between verified members of the guild and the permit and valid person tables.
 
-    unmatching_members: dict[disnake.Role, dict[disnake.Role, list[disnake.Member]]] = {
-        year_y: {year_x: [] for year_x in year_roles.values()} for year_y in year_roles.values()
-    }
+    - `unmatching_year` - the first key is the year role member has, the second the role they should have
+    - `verified_without_permit` - members with the verify role and no login
+    - `duplicate_permits` - members with more logins, their year is audited by the primary one
+    - `wrong_status` - members whose login isn't in the verified state
+    - `permits_not_on_server` - logins of users who left the server
+    """
 
-    # collects all members whose database "year" doesn't match their role
-    # the first dictionary key is the role they have currently
-    # while the value is another dictionary with keys of the role they should have
-    for member in verified:
-        user = PermitDB.get_user_by_id(member.id)
-        if user is None:
-            continue
+    def __init__(self, year_roles: dict[str, disnake.Role]):
+        self.year_roles = year_roles
+        self.unmatching_year: dict[disnake.Role, dict[disnake.Role, list[disnake.Member]]] = {
+            year_y: {year_x: [] for year_x in year_roles.values()} for year_y in year_roles.values()
+        }
+        self.verified_without_permit: list[disnake.Member] = []
+        self.duplicate_permits: list[disnake.Member] = []
+        self.wrong_status: list[tuple[disnake.Member, PermitRecord]] = []
+        self.permits_not_on_server: list[PermitRecord] = []
 
-        person = ValidPersonDB.get_user_by_login(user.login)
-        if person is None:
-            continue
 
-        year = Verification.transform_year(person.year)
+def reconcile(guild: disnake.Guild) -> ReconciliationReport:
+    """Compare verified members with the database.
 
-        if year is None:
-            year = "ExStudent"
-
-        correct_role = disnake.utils.get(guild.roles, name=year)
+    Permits with their valid persons are loaded by one query and indexed by Discord ID,
+    so the whole report needs one pass over the verified members.
+    """
+    permits: dict[int, list[PermitRecord]] = defaultdict(list)
+    for login, discord_id, person_login, year, status in PermitDB.get_all_with_person():
+        try:
+            permits[int(discord_id)].append(
+                PermitRecord(login, int(discord_id), person_login is not None, year, status)
+            )
+        except (TypeError, ValueError):
+            rubbergod_logger.warning(f"Invalid discord ID {discord_id} of login {login}")
+
+    year_roles = {year: role for year in YEARS if (role := disnake.utils.get(guild.roles, name=year))}
+    report = ReconciliationReport(year_roles)
+    ex_student = year_roles.get("ExStudent")
+    ex_student_alternatives = [
+        role.id
+        for role in (disnake.utils.get(guild.roles, name=name) for name in ("Survivor", "King"))
+        if role
+    ]
+    # raw years repeat a lot, transform each of them once
+    correct_roles: dict[str, disnake.Role | None] = {}
 
-        if correct_role not in year_roles.values():
-            rubbergod_logger.error(f"Unexpected correct_role found {member.id}, {correct_role}, {year}")
+    for member in get_verified_members(guild):
+        member_permits = permits.get(member.id)
+        if not member_permits:
+            report.verified_without_permit.append(member)
             continue
-
-        if correct_role not in member.roles:
-            for role in year_roles.values():
-                if role in member.roles:
-                    unmatching_members[role][correct_role].append(member)
-                    break
-            else:
-                if correct_role == ex_student and any(
-                    role in member.roles for role in ex_student_alternatives
-                ):
-                    # if the desired role is ExStudent but the user has a ExStudent alternative role then skip
-                    continue
-                # otherwise just add them to the ExStudent -> correct_role list
-                unmatching_members[ex_student][correct_role].append(member)
-
-    return unmatching_members
+        duplicate = len(member_permits) > 1
+        if duplicate:
+            report.duplicate_permits.append(member)
+
+        # year of members with more logins is audited by the primary one,
+        # the first login in the valid persons, verified if there is any
+        permit = max(
+            member_permits,
+            key=lambda permit: (permit.valid_person, permit.status == VerifyStatus.Verified.value),
+        )
+        if not permit.valid_person:
+            # login is not in the valid persons
+            continue
+        if not duplicate and permit.status != VerifyStatus.Verified.value:
+            report.wrong_status.append((member, permit))
+
+        if permit.year not in correct_roles:
+            year = (
+                Verification.transform_year(permit.year) if permit.year is not None else None
+            ) or "ExStudent"
+            correct_roles[permit.year] = year_roles.get(year)
+            if correct_roles[permit.year] is None:
+                rubbergod_logger.error(f"Unexpected correct_role found {member.id}, {year}")
+        correct_role = correct_roles[permit.year]
+
+        if correct_role is None or member.get_role(correct_role.id):
+            continue
+        current_role = next((role for role in year_roles.values() if member.get_role(role.id)), None)
+        if current_role is None:
+            if correct_role == ex_student and any(
+                member.get_role(role_id) for role_id in ex_student_alternatives
+            ):
+                # if the desired role is ExStudent but the user has a ExStudent alternative role then skip
+                continue
+            # otherwise just add them to the ExStudent -> correct_role list
+            current_role = ex_student
+        if current_role is not None:
+            report.unmatching_year[current_role][correct_role].append(member)
+
+    member_ids = {member.id for member in guild.members}
+    for discord_id, member_permits in permits.items():
+        if discord_id not in member_ids:
+            report.permits_not_on_server.extend(member_permits)
+
+    return report
@@ -9,6 +9,7 @@ class MessagesCZ(GlobalMessages):
     increment_roles_success = "3/3 - Holy fuck, všechno se povedlo, tak zase za rok <:Cauec:602052606210211850>"
     verify_check_brief = "Zkontroluje uživatelům s verify rolí zda jsou v databázi"
     verify_check_user_not_found = "Ve verified databázi jsem nenašel: {user} ({id})"
+    verify_check_left_server = "V permit databázi je {count} loginů uživatelů, kteří nejsou na serveru."
     status_check_brief = "Zkontroluje uživatelům jestli stav jejich loginu v databázi je \"použit\""
     status_check_user_duplicate = "{user} ({id}) je v permit databázi víckrát?"
     status_check_wrong_status = "Status nesedí u: {user} ({id})"
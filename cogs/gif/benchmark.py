@@ -0,0 +1,135 @@
+"""
+Benchmark of pet, catnap and bonk rendering with fake avatars.
+
+Compares rendering on the event loop with templates opened for every GIF (as the commands did before)
+with GifRenderer, first with distinct avatars and then with repeated requests served from the cache.
+Lag of the event loop is measured by a task which wakes up every millisecond, the fake avatar
+download waits for a fixed latency.
+
+Usage: python -m cogs.gif.benchmark [--requests 60] [--users 20] [--concurrency 6] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from cogs.gif import features
+from cogs.gif.features import GifRenderer, render_gif
+
+COMMANDS = ("pet", "catnap", "bonk")
+
+
+def random_avatar(size: int = 128) -> bytes:
+    image = Image.effect_noise((size, size), 64).convert("RGBA")
+    with BytesIO() as image_binary:
+        image.save(image_binary, format="png")
+        return image_binary.getvalue()
+
+
+class FakeAsset:
+    def __init__(self, key: str, avatar: bytes, latency: float):
+        self.key = key
+        self.avatar = avatar
+        self.latency = latency
+
+    def replace(self, size: int, format: str) -> "FakeAsset":
+        return self
+
+    async def read(self) -> bytes:
+        await asyncio.sleep(self.latency)
+        return self.avatar
+
+
+class FakeUser:
+    def __init__(self, id: int, latency: float):
+        self.id = id
+        self.display_avatar = FakeAsset(f"avatar{id}", random_avatar(), latency)
+
+
+class LagMonitor:
+    """Longest delay of a task sleeping for 1 ms"""
+
+    def __init__(self):
+        self.max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            self.max_lag = max(self.max_lag, time.perf_counter() - start - 0.001)
+
+    def __enter__(self) -> "LagMonitor":
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._task.cancel()
+
+
+async def run_requests(render, requests: list[tuple[str, FakeUser]], concurrency: int) -> tuple[float, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(command: str, user: FakeUser) -> None:
+        async with semaphore:
+            await render(command, user)
+
+    with LagMonitor() as monitor:
+        start = time.perf_counter()
+        await asyncio.gather(*(request(command, user) for command, user in requests))
+        elapsed = time.perf_counter() - start
+    return elapsed, monitor.max_lag
+
+
+async def inline(command: str, user: FakeUser) -> bytes:
+    avatar = await user.display_avatar.replace(size=features.AVATAR_SIZES[command], format="png").read()
+    # templates were opened from disk for every GIF
+    features._templates = None
+    return render_gif(command, avatar)
+
+
+def report(name: str, count: int, elapsed: float, max_lag: float) -> None:
+    print(f"{name}: {count / elapsed:.1f} GIFs/s, max event loop lag {max_lag * 1000:.0f} ms")
+
+
+async def run(args: argparse.Namespace) -> None:
+    users = [FakeUser(i, args.latency) for i in range(args.users)]
+    requests = [(random.choice(COMMANDS), random.choice(users)) for _ in range(args.requests)]
+    distinct = list(dict.fromkeys(requests))
+
+    elapsed, max_lag = await run_requests(inline, distinct, args.concurrency)
+    report(f"event loop, {len(distinct)} distinct", len(distinct), elapsed, max_lag)
+
+    renderer = GifRenderer()
+    renderer.preload()
+    # wait for the workers loading templates
+    await asyncio.get_running_loop().run_in_executor(renderer.pool, time.sleep, 0)
+    try:
+        elapsed, max_lag = await run_requests(renderer.render, distinct, args.concurrency)
+        report(f"worker pool, {len(distinct)} distinct", len(distinct), elapsed, max_lag)
+
+        elapsed, max_lag = await run_requests(renderer.render, requests, args.concurrency)
+        report(f"worker pool, {len(requests)} repeated", len(requests), elapsed, max_lag)
+        print(f"GIF cache: {renderer.gifs.hits} hits, {renderer.gifs.misses} misses")
+    finally:
+        renderer.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=6, help="requests in flight")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per avatar download")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,51 @@
+"""
+Rendering of the avatar GIFs in worker processes, so PIL never blocks the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
 from pathlib import Path
 
+import disnake
 from PIL import Image, ImageDraw
 
+from config.app_config import config
+from features.worker_pool import WorkerPool
+
 IMAGES_PATH = Path("cogs/gif/images")
 
+# avatar size requested from Discord, avatars are scaled down to about this size anyway
+AVATAR_SIZES = {"pet": 128, "catnap": 64, "bonk": 64}
+FILENAMES = {"pet": "pet.gif", "catnap": "steal.gif", "bonk": "bonk.gif"}
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+_templates: dict[str, list[Image.Image]] | None = None
+
+
+def load_templates() -> dict[str, list[Image.Image]]:
+    """Frame templates of all GIFs, loaded once per process"""
+    global _templates
+    if _templates is None:
+
+        def load(path: Path) -> Image.Image:
+            with Image.open(path) as image:
+                return image.convert("RGBA")
+
+        _templates = {
+            "pet": [load(IMAGES_PATH / "pet" / f"{i}.png") for i in range(5)],
+            "catnap": [load(IMAGES_PATH / "cat_steal" / name) for name in ("catyay.png", "catpaw.png")],
+            "bonk": [load(IMAGES_PATH / "bonk" / f"{i + 1:02d}.png") for i in range(8)],
+        }
+    return _templates
+
 
 class ImageHandler:
     @classmethod
@@ -20,18 +61,48 @@ class ImageHandler:
         result.paste(image, (0, 0), mask=circle_alpha)
         return result
 
+    @classmethod
+    def get_pet_frames(cls, avatar: Image.Image) -> list[Image.Image]:
+        """Get frames for the pet"""
+        frames = []
+        deformWidth = [-1, -2, 1, 2, 1]
+        deformHeight = [4, 3, 1, 1, -4]
+        width, height = 80, 80
+        x, y = 112, 122
+
+        avatar = cls.square_to_circle(avatar)
+
+        for i, hand in enumerate(load_templates()["pet"]):
+            frame = Image.new("RGBA", (x, y), (0, 0, 0, 0))
+            width = width - deformWidth[i]
+            height = height - deformHeight[i]
+            avatar = avatar.resize((width, height))
+            avatar = avatar.convert("P", palette=Image.ADAPTIVE, colors=200).convert("RGBA")
+
+            frame.paste(avatar, (x - width, y - height), avatar)
+            frame.paste(hand, (0, 0), hand)
+            frames.append(frame)
+
+        return frames
+
     @classmethod
     def render_catnap(cls, image_binary: BytesIO, avatar: Image.Image, avatar_offset=(48, 12)):
         speed = 60
         hop_size = 4
         frame_count = 11
 
-        images_path = IMAGES_PATH / "cat_steal"
+        width, height = avatar.size
+        if width != 64 or height != 64:
+            avatar = avatar.resize((64, 64))
+
+        # clear alpha channel
+        avatar = avatar.convert("P", palette=Image.ADAPTIVE, colors=200).convert("RGBA")
+        avatar = cls.square_to_circle(avatar)
+        avatar = avatar.convert("P", palette=Image.ADAPTIVE, colors=200).convert("RGBA")
 
         im = Image.new("RGBA", (150, 200), (0, 0, 0, 0))
 
-        background = Image.open(images_path / "catyay.png").convert("RGBA")
-        catpaw = Image.open(images_path / "catpaw.png").convert("RGBA")
+        background, catpaw = load_templates()["catnap"]
 
         x, y = avatar_offset
         width, height = 150, 150
@@ -77,12 +148,8 @@ class ImageHandler:
 
         avatar = cls.square_to_circle(avatar.resize((100, 100)))
 
-        images_path = IMAGES_PATH / "bonk"
-
-        for i in range(8):
-            img = "%02d" % (i + 1)
+        for i, bat in enumerate(load_templates()["bonk"]):
             frame = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-            bat = Image.open(f"{images_path}/{img}.png").convert("RGBA")
             avatar = avatar.resize((100, 100 - deformation[i]))
             frame_avatar = avatar.convert("P", palette=Image.ADAPTIVE, colors=200).convert("RGBA")
 
@@ -91,3 +158,120 @@ class ImageHandler:
             frames.append(frame)
 
         return frames
+
+
+def render_gif(command: str, avatar_bytes: bytes) -> bytes:
+    """Runs in the worker process, returns the GIF of the command"""
+    avatar = Image.open(BytesIO(avatar_bytes)).convert("RGBA")
+    with BytesIO() as image_binary:
+        if command == "catnap":
+            ImageHandler.render_catnap(image_binary, avatar)
+            return image_binary.getvalue()
+
+        if command == "pet":
+            frames = ImageHandler.get_pet_frames(avatar)
+            options = {"duration": 40, "transparency": 0}
+        else:
+            frames = ImageHandler.get_bonk_frames(avatar)
+            options = {"duration": 30}
+        frames[0].save(
+            image_binary,
+            format="GIF",
+            save_all=True,
+            append_images=frames[1:],
+            loop=0,
+            disposal=2,
+            optimize=False,
+            **options,
+        )
+        return image_binary.getvalue()
+
+
+class BytesLRU:
+    """Bounded LRU cache of rendered or downloaded images"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[tuple, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: tuple) -> bytes | None:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item
+
+    def put(self, key: tuple, item: bytes) -> None:
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+
+class GifRenderer:
+    """Renders avatar GIFs in a pool of worker processes.
+
+    Every worker loads the frame templates once. Avatars are cached by the avatar hash
+    and size, finished GIFs by the command and the avatar hash, so a changed avatar is rendered again.
+    Concurrent requests for the same GIF share one render. A render which doesn't finish
+    within `gif_render_time_budget` seconds raises `asyncio.TimeoutError` and restarts the workers
+    (see `WorkerPool`).
+    """
+
+    def __init__(self):
+        self.workers = WorkerPool("GIF render", config.gif_workers, initializer=load_templates)
+        self.avatars = BytesLRU(config.gif_avatar_cache_size)
+        self.gifs = BytesLRU(config.gif_cache_size)
+        self._in_flight: dict[tuple[str, str], asyncio.Future[bytes]] = {}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        return self.workers.pool
+
+    def preload(self) -> None:
+        """Start the workers, which load the templates"""
+        for _ in range(config.gif_workers):
+            self.pool.submit(time.sleep, 0)
+
+    def stop(self) -> None:
+        self.workers.stop()
+
+    async def get_avatar(self, asset: disnake.Asset, size: int) -> bytes:
+        key = (asset.key, size)
+        avatar = self.avatars.get(key)
+        if avatar is None:
+            avatar = await asset.replace(size=size, format="png").read()
+            self.avatars.put(key, avatar)
+        return avatar
+
+    async def _render(self, command: str, asset: disnake.Asset) -> bytes:
+        avatar = await self.get_avatar(asset, AVATAR_SIZES[command])
+        try:
+            return await self.workers.run(config.gif_render_time_budget, render_gif, command, avatar)
+        except BrokenProcessPool:
+            rubbergod_logger.exception("GIF worker pool broke, starting a new one")
+            raise
+
+    async def render(self, command: str, user: disnake.abc.User) -> disnake.File:
+        asset = user.display_avatar
+        key = (command, asset.key)
+        gif = self.gifs.get(key)
+        if gif is None:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(self._render(command, asset))
+                self._in_flight[key] = future
+                future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            gif = await asyncio.shield(future)
+            self.gifs.put(key, gif)
+        return disnake.File(fp=BytesIO(gif), filename=FILENAMES[command])
+
+
+gif_renderer = GifRenderer()
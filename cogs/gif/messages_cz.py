@@ -5,3 +5,4 @@ class MessagesCZ(GlobalMessages):
     bonk_brief = "Bonk na uživatele"
     unsupported_image = "Tento avatar aktuálne není podporovaný <:sadcat:576171980118687754>"
     pet_brief = "Vytvoří gif z uživatele."
+    render_timeout = "Gif se nepodařilo vytvořit včas, zkus to prosím znovu."
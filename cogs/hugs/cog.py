@@ -59,6 +59,8 @@ class Hugs(Base, commands.Cog):
             row_formatter=_tophugs_formatter,
             title="HUGBOARD",
             emote_name="peepoHugger",
+            order_by=(HugsTableDB.given, HugsTableDB.received, HugsTableDB.member_id),
+            cache_key="hugboard",
         )
 
         page = page_source.get_page(0)
@@ -83,6 +85,8 @@ class Hugs(Base, commands.Cog):
             row_formatter=self._tophuggers_formatter,
             title="TOP HUGGERS",
             emote_name="peepoHugger",
+            order_by=(HugsTableDB.given, HugsTableDB.member_id),
+            cache_key="huggersboard",
         )
 
         page = page_source.get_page(0)
@@ -107,6 +111,8 @@ class Hugs(Base, commands.Cog):
             row_formatter=self._tophugged_formatter,
             title="TOP HUGGED",
             emote_name="peepoHugger",
+            order_by=(HugsTableDB.received, HugsTableDB.member_id),
+            cache_key="mosthugged",
         )
 
         page = page_source.get_page(0)
@@ -46,6 +46,19 @@ class Icons(Base, commands.Cog):
             view.add_item(component)
         await inter.edit_original_response(view=view)
 
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: disnake.Role):
+        features.icon_autocomplete.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: disnake.Role, after: disnake.Role):
+        if before.name != after.name:
+            features.icon_autocomplete.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: disnake.Role):
+        features.icon_autocomplete.invalidate(role.guild.id)
+
     @commands.Cog.listener()
     async def on_button_click(self, inter: disnake.MessageInteraction):
         if inter.component.custom_id != MessagesCZ.icon_delete_id:
@@ -2,6 +2,7 @@ import disnake
 
 import utils
 from cogs.base import Base
+from features.autocomplete import GuildAutocompleteSource
 from rubbergod import Rubbergod
 
 
@@ -37,6 +38,9 @@ def get_icon_roles(guild: disnake.Guild) -> list[disnake.Role]:
     return [role for role in guild.roles if role.id in Base.config.icon_roles]
 
 
+icon_autocomplete = GuildAutocompleteSource(lambda guild: [icon_name(role) for role in get_icon_roles(guild)])
+
+
 async def can_assign(icon: disnake.Role, user: disnake.Member) -> bool:
     """Whether a given user can have a given icon"""
     rules = Base.config.icon_rules[icon.id]
@@ -64,9 +68,7 @@ async def do_set_icon(icon: disnake.Role, user: disnake.Member) -> None:
 
 
 async def icon_autocomp(inter: disnake.ApplicationCommandInteraction, partial: str) -> list[str]:
-    icon_roles = get_icon_roles(inter.guild)
-    names = (icon_name(role) for role in icon_roles)
-    return [name for name in names if partial.casefold() in name.casefold()]
+    return icon_autocomplete.get(inter.guild).search(partial)
 
 
 def get_icon_emoji(icon: disnake.Role) -> str | disnake.Emoji | disnake.PartialEmoji:
@@ -11,7 +11,7 @@ import utils
 from buttons.embed import PaginationView
 from cogs.base import Base
 from cogs.grillbotapi.cog import GrillbotApi
-from database.karma import KarmaDB
+from database.karma import KarmaDB, karma_ledger
 from features.leaderboard import LeaderboardPageSource
 from features.reaction_context import ReactionContext
 from rubbergod import Rubbergod
@@ -31,7 +31,7 @@ class Karma(Base, commands.Cog):
         self._leaderboard_formatter = utils.general.make_pts_column_row_formatter(KarmaDB.karma.name)
         self._positive_formatter = utils.general.make_pts_column_row_formatter(KarmaDB.positive.name)
         self._negative_formatter = utils.general.make_pts_column_row_formatter(KarmaDB.negative.name)
-        self.tasks = [self.sync_with_grillbot_task.start()]
+        self.tasks = [self.sync_with_grillbot_task.start(), self.flush_karma_task.start()]
 
     async def handle_reaction(self, ctx: ReactionContext):
         # handle karma vote
@@ -98,19 +98,21 @@ class Karma(Base, commands.Cog):
     @_karma.sub_command(description=MessagesCZ.karma_brief)
     async def me(self, inter: disnake.ApplicationCommandInteraction):
         await inter.response.send_message(
-            self.karma_helper.karma_get(inter.author), ephemeral=PermissionsCheck.is_botroom(inter)
+            await self.karma_helper.karma_get(inter.author), ephemeral=PermissionsCheck.is_botroom(inter)
         )
 
     @commands.user_command(name="Karma uživatele")
     async def stalk_app(self, inter: disnake.UserCommandInteraction, user: disnake.Member):
         await inter.response.send_message(
-            self.karma_helper.karma_get(inter.author, user), ephemeral=PermissionsCheck.is_botroom(inter)
+            await self.karma_helper.karma_get(inter.author, user),
+            ephemeral=PermissionsCheck.is_botroom(inter),
         )
 
     @_karma.sub_command(description=MessagesCZ.stalk_brief)
     async def stalk(self, inter: disnake.ApplicationCommandInteraction, user: disnake.User):
         await inter.response.send_message(
-            self.karma_helper.karma_get(inter.author, user), ephemeral=PermissionsCheck.is_botroom(inter)
+            await self.karma_helper.karma_get(inter.author, user),
+            ephemeral=PermissionsCheck.is_botroom(inter),
         )
 
     @commands.cooldown(rate=1, per=300.0, type=commands.BucketType.guild)
@@ -155,13 +157,13 @@ class Karma(Base, commands.Cog):
         Get karma leaderboard
         """
         await inter.response.defer(ephemeral=PermissionsCheck.is_botroom(inter))
+        await karma_ledger.flush()
 
+        query = KarmaDB.leaderboard_query()
         if direction == "descending":
-            query = KarmaDB.leaderboard_query(KarmaDB.karma.desc())
             title = "KARMA LEADERBOARD"
             emote = "trophy"
         else:
-            query = KarmaDB.leaderboard_query(KarmaDB.karma.asc())
             title = "KARMA LEADERBOARD REVERSED"
             emote = "coolStoryBob"
 
@@ -178,6 +180,9 @@ class Karma(Base, commands.Cog):
             title=title,
             emote_name=emote,
             member_id_col_name="member_ID",
+            order_by=(KarmaDB.karma, KarmaDB.member_ID),
+            descending=direction == "descending",
+            cache_key=f"karma:{direction}",
         )
 
         page_num = page_source.get_page_number(start)
@@ -201,10 +206,10 @@ class Karma(Base, commands.Cog):
         Get the biggest positive/negative karma givers
         """
         await inter.response.defer(ephemeral=PermissionsCheck.is_botroom(inter))
+        await karma_ledger.flush()
 
         karma_column = KarmaDB.positive if karma == "positive" else KarmaDB.negative
-        order_karma = karma_column.desc() if direction == "descending" else karma_column.asc()
-        query = KarmaDB.leaderboard_query(order_karma)
+        query = KarmaDB.leaderboard_query()
         formatter = self._positive_formatter if karma == "positive" else self._negative_formatter
         title = "KARMA GIVINGBOARD" if karma == "positive" else "KARMA NEGATIVE GIVINGBOARD"
         emote = "peepolove" if karma == "positive" else "gasbutton"
@@ -217,6 +222,9 @@ class Karma(Base, commands.Cog):
             title=title,
             emote_name=emote,
             member_id_col_name="member_ID",
+            order_by=(karma_column, KarmaDB.member_ID),
+            descending=direction == "descending",
+            cache_key=f"givingboard:{karma}:{direction}",
         )
 
         page_num = page_source.get_page_number(start)
@@ -271,6 +279,20 @@ class Karma(Base, commands.Cog):
 
     @tasks.loop(minutes=int(Base.config.grillbot_api_karma_sync_interval))
     async def sync_with_grillbot_task(self):
+        await karma_ledger.flush()
         items = list(KarmaDB.leaderboard_query(KarmaDB.karma.asc()))
         for chunk in utils.general.split_to_parts(items, 500):
             await self.grillbot_api.post_karma_store(chunk)
+
+    @tasks.loop(seconds=Base.config.karma_flush_interval)
+    async def flush_karma_task(self):
+        try:
+            await karma_ledger.flush()
+        except Exception:
+            # deltas are kept for the next flush, the loop must keep running
+            self.bot.logger.exception("Karma from reactions could not be written")
+
+    @flush_karma_task.after_loop
+    async def after_flush_karma_task(self):
+        # write the rest of pending karma when the cog is unloaded
+        await karma_ledger.flush()
@@ -224,7 +224,7 @@ class Karma(BaseFeature):
     ) -> None:
         members = await utils.user.get_members_from_tag(inter.guild, members_str)
         for member in members:
-            KarmaDB.update_karma(member.id, inter.author.id, karma)
+            await KarmaDB.update_karma(member.id, inter.author.id, karma)
         if karma >= 0:
             await inter.send(
                 MessagesCZ.give_success(
@@ -241,7 +241,7 @@ class Karma(BaseFeature):
     async def karma_transfer(
         self, inter: disnake.ApplicationCommandInteraction, from_user: disnake.User, to_user: disnake.User
     ) -> None:
-        transferred = KarmaDB.transfer_karma(from_user.id, to_user.id)
+        transferred = await KarmaDB.transfer_karma(from_user.id, to_user.id)
         if transferred is None:
             await inter.send(MessagesCZ.transfer_user_no_karma(user=from_user))
             return
@@ -255,10 +255,10 @@ class Karma(BaseFeature):
         )
         await inter.send(formated_message)
 
-    def karma_get(self, author: disnake.Member, target: disnake.Member = None) -> str:
+    async def karma_get(self, author: disnake.Member, target: disnake.Member = None) -> str:
         if target is None:
             target = author
-        k = KarmaDB.get_karma(target.id)
+        k = await KarmaDB.get_karma(target.id)
         return MessagesCZ.print_karma(
             user=author.id,
             karma=k.karma.value,
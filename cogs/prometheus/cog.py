@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import time
 from threading import Thread
 from wsgiref.simple_server import WSGIServer
 
@@ -6,24 +8,41 @@ import disnake
 from disnake import AutoShardedClient, Interaction, InteractionType
 from disnake.ext import commands, tasks
 from prometheus_client import REGISTRY, start_http_server
+from sqlalchemy import event
 
 from cogs.base import Base
+from database import database
+from database.karma import KarmaEmojiDB
 from rubbergod import Rubbergod
 
 from .features import (
     CHANNEL_GAUGE,
+    COMMAND_HISTOGRAM,
     COMMANDS_GAUGE,
     CONNECTION_GAUGE,
+    EVENT_HANDLER_HISTOGRAM,
     GUILD_GAUGE,
+    HTTP_HISTOGRAM,
+    IMAGE_ANALYSIS_HISTOGRAM,
+    KARMA_EMOJI_CACHE_COUNTER,
     LATENCY_GAUGE,
+    LOOP_LAG_HISTOGRAM,
+    MAIL_DELIVERY_HISTOGRAM,
     METRICS,
     ON_COMMAND_COUNTER,
     ON_INTERACTION_COUNTER,
+    SQL_HISTOGRAM,
+    SUBSCRIPTION_FANOUT_HISTOGRAM,
+    SUBSCRIPTION_NOTIFICATION_COUNTER,
     USER_GAUGE,
+    statement_label,
 )
 
 log = logging.getLogger("prometheus")
 
+# seconds between samples of the event loop lag
+LOOP_LAG_INTERVAL = 0.5
+
 
 class Prometheus(Base, commands.Cog):
     """
@@ -38,7 +57,12 @@ class Prometheus(Base, commands.Cog):
         self.prometheus_running: bool = False
         self.prometheus_server: WSGIServer
         self.prometheus_thread: Thread
-        self.tasks = [self.latency_loop.start()]
+        self.engines = {"sync": database.db, "async": database.async_db.sync_engine}
+        # start times of legacy commands by message id
+        self.command_starts: dict[int, float] = {}
+        # karma emoji cache lookups already added to the counter
+        self.karma_emoji_cache_sample = {"hits": 0, "misses": 0}
+        self.tasks = [self.latency_loop.start(), self.loop_lag_loop.start()]
 
     def init_gauges(self):
         log.info("Initializing gauges")
@@ -75,6 +99,55 @@ class Prometheus(Base, commands.Cog):
 
         self.prometheus_running = False
 
+    async def timed_run_event(self, coro, event_name: str, *args, **kwargs) -> None:
+        """Replaces `Client._run_event`, which runs every event listener"""
+        start = time.perf_counter()
+        try:
+            await type(self.bot)._run_event(self.bot, coro, event_name, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            handler = getattr(coro, "__qualname__", str(coro))
+            EVENT_HANDLER_HISTOGRAM.labels(event_name, handler).observe(duration)
+            if event_name == "on_application_command" and args:
+                # application commands are invoked from this bot event
+                command = getattr(args[0], "application_command", None)
+                if command is not None:
+                    COMMAND_HISTOGRAM.labels("/" + command.qualified_name).observe(duration)
+
+    def install_hooks(self) -> None:
+        self.bot._run_event = self.timed_run_event
+        for name, engine in self.engines.items():
+            event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+            event.listen(engine, "handle_error", self.handle_sql_error)
+
+    def remove_hooks(self) -> None:
+        self.bot.__dict__.pop("_run_event", None)
+        for engine in self.engines.values():
+            event.remove(engine, "before_cursor_execute", self.before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", self.after_cursor_execute)
+            event.remove(engine, "handle_error", self.handle_sql_error)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("prometheus_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["prometheus_start"].pop()
+        engine = "async" if conn.engine is self.engines["async"] else "sync"
+        SQL_HISTOGRAM.labels(engine, statement_label(statement)).observe(time.perf_counter() - start)
+
+    def handle_sql_error(self, exception_context):
+        # after_cursor_execute is not called for failed statements
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("prometheus_start"):
+            connection.info["prometheus_start"].pop()
+
+    @tasks.loop()
+    async def loop_lag_loop(self):
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        LOOP_LAG_HISTOGRAM.observe(max(time.perf_counter() - start - LOOP_LAG_INTERVAL, 0))
+
     @tasks.loop(seconds=5)
     async def latency_loop(self):
         COMMANDS_GAUGE.set(self.get_all_commands())
@@ -84,6 +157,11 @@ class Prometheus(Base, commands.Cog):
         else:
             LATENCY_GAUGE.labels(None).set(self.bot.latency)
 
+        cache_info = KarmaEmojiDB.cache_info()
+        for result, previous in self.karma_emoji_cache_sample.items():
+            KARMA_EMOJI_CACHE_COUNTER.labels(result).inc(cache_info[result] - previous)
+            self.karma_emoji_cache_sample[result] = cache_info[result]
+
     @commands.Cog.listener()
     async def on_ready(self):
         # some gauges needs to be initialized after each reconnect
@@ -100,9 +178,41 @@ class Prometheus(Base, commands.Cog):
 
     @commands.Cog.listener()
     async def on_command(self, ctx: commands.Context):
+        self.command_starts[ctx.message.id] = time.perf_counter()
         shard_id = ctx.guild.shard_id if ctx.guild else None
         ON_COMMAND_COUNTER.labels(shard_id, ctx.guild.id, ctx.command.name).inc()
 
+    def observe_command(self, ctx: commands.Context) -> None:
+        start = self.command_starts.pop(ctx.message.id, None)
+        if start is not None and ctx.command is not None:
+            COMMAND_HISTOGRAM.labels("?" + ctx.command.qualified_name).observe(time.perf_counter() - start)
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        self.observe_command(ctx)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx: commands.Context, error: Exception):
+        self.observe_command(ctx)
+
+    @commands.Cog.listener()
+    async def on_http_request(self, session: str, method: str, status: str, duration: float):
+        HTTP_HISTOGRAM.labels(session, method, status).observe(duration)
+
+    @commands.Cog.listener()
+    async def on_mail_delivery(self, kind: str, result: str, latency: float):
+        MAIL_DELIVERY_HISTOGRAM.labels(kind, result).observe(latency)
+
+    @commands.Cog.listener()
+    async def on_image_analysis(self, stage: str, result: str, duration: float):
+        IMAGE_ANALYSIS_HISTOGRAM.labels(stage, result).observe(duration)
+
+    @commands.Cog.listener()
+    async def on_subscription_fanout(self, duration: float, results: dict[str, int]):
+        SUBSCRIPTION_FANOUT_HISTOGRAM.observe(duration)
+        for result, count in results.items():
+            SUBSCRIPTION_NOTIFICATION_COUNTER.labels(result).inc(count)
+
     @commands.Cog.listener()
     async def on_interaction(self, interaction: Interaction):
         shard_id = interaction.guild.shard_id if interaction.guild else None
@@ -176,10 +286,12 @@ class Prometheus(Base, commands.Cog):
 
     async def cog_load(self):
         await super().cog_load()
+        self.install_hooks()
         if self.bot.is_initialized:
             # reloading the cog won't trigger on_ready so we need to call it manually to start the server
             await self.on_ready()
 
     def cog_unload(self) -> None:
         super().cog_unload()
+        self.remove_hooks()
         self.stop_prometheus()
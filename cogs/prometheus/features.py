@@ -1,7 +1,13 @@
-from prometheus_client import Counter, Gauge
+import re
+from functools import lru_cache
+
+from prometheus_client import Counter, Gauge, Histogram
 
 METRIC_PREFIX = "discord_"
 
+# seconds, from a fast DB query up to a slow API call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
 COMMANDS_GAUGE = Gauge(METRIC_PREFIX + "stat_total_commands", "Number of commands")
 
 USER_GAUGE = Gauge(METRIC_PREFIX + "stat_total_users", "Number of users this bot can see")
@@ -38,6 +44,80 @@ CHANNEL_GAUGE = Gauge(
     "Number of channels this bot is has access to",
 )
 
+KARMA_EMOJI_CACHE_COUNTER = Counter(
+    METRIC_PREFIX + "karma_emoji_cache_lookups",
+    "Lookups of karma emoji values, emoji with a value (hits) or without one (misses)",
+    ["result"],
+)
+
+EVENT_HANDLER_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "event_handler_duration",
+    "Execution time of event listeners",
+    ["event", "handler"],
+    unit="seconds",
+    buckets=LATENCY_BUCKETS,
+)
+
+COMMAND_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "command_duration",
+    "Execution time of commands",
+    ["command"],
+    unit="seconds",
+    buckets=LATENCY_BUCKETS,
+)
+
+SQL_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "sql_statement_duration",
+    "Duration of SQL statements",
+    ["engine", "statement"],
+    unit="seconds",
+    buckets=LATENCY_BUCKETS,
+)
+
+HTTP_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "http_request_duration",
+    "Duration of outbound HTTP requests",
+    ["session", "method", "status"],
+    unit="seconds",
+    buckets=LATENCY_BUCKETS,
+)
+
+LOOP_LAG_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "event_loop_lag",
+    "Delay of the event loop when waking up a sleeping task",
+    unit="seconds",
+    buckets=LATENCY_BUCKETS,
+)
+
+MAIL_DELIVERY_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "mail_delivery_latency",
+    "Time from queueing a mail to the delivery attempt",
+    ["kind", "result"],
+    unit="seconds",
+    buckets=LATENCY_BUCKETS + (60, 300, 1800),
+)
+
+SUBSCRIPTION_FANOUT_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "subscription_fanout_duration",
+    "Time to notify all subscribers of a forum thread",
+    unit="seconds",
+    buckets=LATENCY_BUCKETS + (60, 300),
+)
+
+SUBSCRIPTION_NOTIFICATION_COUNTER = Counter(
+    METRIC_PREFIX + "subscription_notifications",
+    "Notifications of forum subscriptions by result",
+    ["result"],
+)
+
+IMAGE_ANALYSIS_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "image_analysis_duration",
+    "Download, decoding and hashing of attached images",
+    ["stage", "result"],
+    unit="seconds",
+    buckets=LATENCY_BUCKETS,
+)
+
 METRICS = [
     COMMANDS_GAUGE,
     USER_GAUGE,
@@ -47,4 +127,24 @@ METRICS = [
     ON_COMMAND_COUNTER,
     GUILD_GAUGE,
     CHANNEL_GAUGE,
+    KARMA_EMOJI_CACHE_COUNTER,
+    EVENT_HANDLER_HISTOGRAM,
+    COMMAND_HISTOGRAM,
+    SQL_HISTOGRAM,
+    HTTP_HISTOGRAM,
+    LOOP_LAG_HISTOGRAM,
+    MAIL_DELIVERY_HISTOGRAM,
+    SUBSCRIPTION_FANOUT_HISTOGRAM,
+    SUBSCRIPTION_NOTIFICATION_COUNTER,
+    IMAGE_ANALYSIS_HISTOGRAM,
 ]
+
+STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_label(statement: str) -> str:
+    """Label of the SQL statement with bounded cardinality, e.g. `SELECT bot_karma`"""
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    table = STATEMENT_TABLE.search(statement)
+    return f"{verb} {table.group(1)}" if table else verb
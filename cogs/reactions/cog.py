@@ -3,11 +3,10 @@ Cog for handling reactions and delegating to specific cog.
 """
 
 import disnake
-import sqlalchemy
 from disnake.ext import commands
 
 from cogs.base import Base
-from database import session
+from features.message_cache import message_cache
 from features.reaction_context import ReactionContext
 from rubbergod import Rubbergod
 
@@ -20,6 +19,7 @@ class Reactions(Base, commands.Cog):
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: disnake.RawReactionActionEvent):
         """Catch reaction, get all properties and then call proper cog/s"""
+        message_cache.apply_reaction(self.bot, payload)
         ctx = await ReactionContext.from_payload(self.bot, payload)
         if ctx is None:
             return
@@ -62,7 +62,26 @@ class Reactions(Base, commands.Cog):
             if cog:
                 try:
                     await cog.handle_reaction(ctx)
-                except sqlalchemy.exc.InternalError:
-                    session.rollback()
                 except disnake.errors.DiscordServerError:
                     pass
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: disnake.RawReactionActionEvent):
+        """Keep reaction counts of cached messages up to date"""
+        message_cache.apply_reaction(self.bot, payload)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload: disnake.RawReactionClearEvent):
+        message_cache.invalidate(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: disnake.RawReactionClearEmojiEvent):
+        message_cache.invalidate(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: disnake.RawMessageUpdateEvent):
+        message_cache.invalidate(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: disnake.RawMessageDeleteEvent):
+        message_cache.invalidate(payload.message_id)
@@ -2,7 +2,6 @@
 Cog implementing review system for subjects.
 """
 
-import copy
 import datetime
 
 import disnake
@@ -11,12 +10,13 @@ from disnake.ext import commands
 import utils
 from buttons.embed import PaginationView
 from cogs.base import Base
-from database.review import ProgrammeDB, ReviewDB, SubjectDB, SubjectDetailsDB
+from database.review import ProgrammeDB, ReviewDB, SubjectDetailsDB
+from features.autocomplete import programme_autocomplete, subject_autocomplete
 from rubbergod import Rubbergod
 from utils import cooldowns
 from utils.checks import PermissionsCheck
 
-from .features import ReviewManager, TierEnum
+from .features import ReviewManager, TierboardPageSource, TierEnum
 from .messages_cz import MessagesCZ
 from .views import ReviewView
 
@@ -24,15 +24,14 @@ from .views import ReviewView
 async def autocomp_subjects_programmes(
     inter: disnake.ApplicationCommandInteraction, user_input: str
 ) -> list[str]:
-    input = user_input.lower()
-    subjects = SubjectDB.lookup(input)
-    programmes = ProgrammeDB.lookup(input)
+    subjects = subject_autocomplete.search(user_input, prefix_only=True)
+    programmes = programme_autocomplete.search(user_input, prefix_only=True)
     subjects_programmes = sorted(subjects + programmes)
     return subjects_programmes[:25]
 
 
 async def autocomp_subjects(inter: disnake.ApplicationCommandInteraction, user_input: str) -> list[str]:
-    return SubjectDB.lookup(user_input.lower())
+    return subject_autocomplete.search(user_input)
 
 
 class Review(Base, commands.Cog):
@@ -263,7 +262,6 @@ class Review(Base, commands.Cog):
         if degree is None:
             await inter.send(MessagesCZ.tierboard_missing_year, ephemeral=True)
             return
-        embeds = []
         embed = disnake.Embed(title="Tierboard")
         embed.timestamp = datetime.datetime.now(tz=datetime.timezone.utc)
         embed.add_field(name="Typ", value=type)
@@ -275,24 +273,9 @@ class Review(Base, commands.Cog):
             embed.add_field(name="Ročník", value=year)
         utils.embed.add_author_footer(embed, author)
 
-        pages_total = SubjectDetailsDB.get_tierboard_page_count(type, sem, degree, year)
-        for page in range(pages_total):
-            board = SubjectDetailsDB.get_tierboard(type, sem, degree, year, page * 10)
-            output = ""
-            cnt = 1
-            for line in board:
-                # grade format: "B (1.7)"
-                grade_num = TierEnum.tier_to_grade_num(line.avg_tier)
-                grade = f"{TierEnum(round(line.avg_tier)).name}({round(grade_num, 1)})"
-                output += f"{cnt} - **{line.shortcut}**: {grade}\n"
-                cnt += 1
-            embed.description = output
-            embeds.append(copy.copy(embed))
+        page_source = TierboardPageSource(embed, type, sem, degree, year)
+        embed = page_source.format_page(page_source.get_page(0))
 
-        if pages_total == 0:
-            embed.description = ""
-            embeds.append(embed)
-
-        view = PaginationView(inter.author, embeds)
-        await inter.response.send_message(embed=embeds[0], view=view)
+        view = PaginationView(inter.author, embeds=[embed], page_source=page_source)
+        await inter.response.send_message(embed=embed, view=view)
         view.message = await inter.original_message()
@@ -10,6 +10,7 @@ import utils
 from config.app_config import config
 from database.review import ProgrammeDB, ReviewDB, ReviewRelevanceDB, SubjectDB, SubjectDetailsDB
 from features import sports
+from features.leaderboard import DatabaseIteratorPageSource
 from rubbergod import Rubbergod
 from utils.colors import RubbergodColors
 
@@ -32,6 +33,31 @@ class TierEnum(Enum):
         return 1 + tier / 2
 
 
+class TierboardPageSource(DatabaseIteratorPageSource):
+    """Subjects sorted by average tier of their reviews"""
+
+    def __init__(self, embed: disnake.Embed, type: str, sem: str, degree: str, year: str):
+        self.embed = embed
+        query = SubjectDetailsDB.get_tierboard_query(type, sem, degree, year)
+        shortcut, avg_tier = (column["expr"] for column in query.column_descriptions)
+        super().__init__(
+            query,
+            order_by=(avg_tier, shortcut),
+            descending=False,
+            cache_key=f"tierboard:{type}:{sem}:{degree}:{year}",
+        )
+
+    def format_page(self, page) -> disnake.Embed:
+        output = ""
+        for position, line in enumerate(page, self.current_page * self.per_page + 1):
+            # grade format: "B (1.7)"
+            grade_num = TierEnum.tier_to_grade_num(line.avg_tier)
+            grade = f"{TierEnum(round(line.avg_tier)).name}({round(grade_num, 1)})"
+            output += f"{position} - **{line.shortcut}**: {grade}\n"
+        self.embed.description = output
+        return self.embed
+
+
 class ReviewManager:
     """Helper class for reviews"""
 
@@ -0,0 +1,170 @@
+"""
+Benchmark of bulk role and permission changes against a fake Discord HTTP backend.
+
+Compares awaiting one REST call at a time (as the commands did before)
+with BulkMutationExecutor. The fake backend has a fixed latency and per-route
+rate limit buckets which make requests wait like the disnake HTTP client does.
+
+Usage: python -m cogs.roles.benchmark [--members 200] [--channels 300] [--latency 0.05] [--noop 0.3]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import disnake
+
+from features.bulk_mutation import BulkMutationExecutor, Mutation
+
+GUILD_ID = 1
+ROLE_ID = 2
+OVERWRITE_ROLE_ID = 3
+
+
+class FakeBucket:
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            now = time.monotonic()
+            if now >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = now + self.per
+            if self.remaining == 0:
+                await asyncio.sleep(self.reset_at - now)
+                self.remaining = self.limit
+                self.reset_at = time.monotonic() + self.per
+            self.remaining -= 1
+
+
+class FakeHTTP:
+    """Role changes share a bucket per guild, permission overwrites have a bucket per channel"""
+
+    def __init__(self, latency: float, limit: int, per: float):
+        self.latency = latency
+        self.buckets: dict[tuple, FakeBucket] = defaultdict(lambda: FakeBucket(limit, per))
+        self.calls = 0
+
+    async def _request(self, route: tuple) -> None:
+        await self.buckets[route].acquire()
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+    async def add_role(self, guild_id, user_id, role_id, *, reason=None):
+        await self._request(("roles", guild_id))
+
+    async def remove_role(self, guild_id, user_id, role_id, *, reason=None):
+        await self._request(("roles", guild_id))
+
+    async def edit_channel_permissions(self, channel_id, target, allow, deny, type, *, reason=None):
+        await self._request(("permissions", channel_id))
+
+    async def delete_channel_permissions(self, channel_id, target, *, reason=None):
+        await self._request(("permissions", channel_id))
+
+
+class FakeRoles(set):
+    def has(self, role_id: int) -> bool:
+        return role_id in self
+
+
+class FakeMember:
+    def __init__(self, id: int, has_role: bool):
+        self.id = id
+        self._roles = FakeRoles([ROLE_ID] if has_role else [])
+
+
+class FakeChannel:
+    def __init__(self, id: int, has_overwrite: bool):
+        self.id = id
+        self.has_overwrite = has_overwrite
+
+    def overwrites_for(self, obj) -> disnake.PermissionOverwrite:
+        if self.has_overwrite:
+            return disnake.PermissionOverwrite(read_messages=True)
+        return disnake.PermissionOverwrite()
+
+
+class FakeGuild:
+    def __init__(self, members: list[FakeMember], channels: list[FakeChannel]):
+        self.id = GUILD_ID
+        self.members = {member.id: member for member in members}
+        self.channels = {channel.id: channel for channel in channels}
+
+    def get_member(self, id: int) -> FakeMember | None:
+        return self.members.get(id)
+
+    def get_channel(self, id: int) -> FakeChannel | None:
+        return self.channels.get(id)
+
+
+async def sequential(http: FakeHTTP, mutations: list[Mutation]) -> None:
+    for mutation in mutations:
+        if mutation.kind == "add_role":
+            await http.add_role(GUILD_ID, mutation.target_id, mutation.subject_id)
+        else:
+            await http.edit_channel_permissions(
+                mutation.target_id, mutation.subject_id, mutation.allow, mutation.deny, 0
+            )
+
+
+async def run(args: argparse.Namespace) -> None:
+    members = [FakeMember(1000 + i, random.random() < args.noop) for i in range(args.members)]
+    channels = [FakeChannel(10000 + i, random.random() < args.noop) for i in range(args.channels)]
+    guild = FakeGuild(members, channels)
+    role = disnake.Object(ROLE_ID)
+    overwrite_role = disnake.Object(OVERWRITE_ROLE_ID)
+
+    mutations = [Mutation.add_role(member, role) for member in members]
+    mutations += [
+        Mutation.set_permissions(channel, overwrite_role, read_messages=True) for channel in channels
+    ]
+
+    http = FakeHTTP(args.latency, args.limit, args.per)
+    start = time.perf_counter()
+    await sequential(http, mutations)
+    sequential_time = time.perf_counter() - start
+    print(f"sequential: {len(mutations)} calls in {sequential_time:.2f} s")
+
+    for concurrency in args.concurrency:
+        http = FakeHTTP(args.latency, args.limit, args.per)
+        executor = BulkMutationExecutor(guild, http, concurrency, args.route_concurrency)
+        results: dict[str, int] = defaultdict(int)
+
+        def on_result(item_id: int | None, result: str) -> None:
+            results[result] += 1
+
+        start = time.perf_counter()
+        await executor.run(((mutation, None) for mutation in mutations), on_result)
+        elapsed = time.perf_counter() - start
+        print(
+            f"executor (concurrency {concurrency}): {http.calls} calls, {results['skipped']} skipped "
+            f"in {elapsed:.2f} s ({sequential_time / elapsed:.1f}x)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--channels", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--limit", type=int, default=10, help="requests per bucket window")
+    parser.add_argument("--per", type=float, default=1.0, help="bucket window in seconds")
+    parser.add_argument("--noop", type=float, default=0.3, help="fraction of changes already applied")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--route-concurrency", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,9 @@ from disnake.ext import commands
 
 import utils
 from cogs.base import Base
+from database.bulk_job import BulkJobDB, BulkJobStatus
 from database.review import SubjectDetailsDB
+from features.bulk_mutation import BulkJob, Mutation, run_bulk_job, running_jobs
 from rubbergod import Rubbergod
 from utils.checks import PermissionsCheck
 
@@ -52,8 +54,11 @@ class Roles(Base, commands.Cog):
         Both channels are expected as tags or IDs
         """
         await inter.send(MessagesCZ.channel_copy_start)
-        for key in src.overwrites:
-            await dst.set_permissions(key, overwrite=src.overwrites[key])
+        message = await inter.original_response()
+        mutations = [
+            Mutation.set_permissions(dst, target, overwrite) for target, overwrite in src.overwrites.items()
+        ]
+        await run_bulk_job(self.bot, "channel copy", inter.guild, mutations, message)
         await inter.edit_original_response(MessagesCZ.channel_copy_done)
 
     @channel.sub_command(name="clone", description=MessagesCZ.role_channel_clone_brief)
@@ -79,13 +84,9 @@ class Roles(Base, commands.Cog):
         overwrites = {guild.default_role: disnake.PermissionOverwrite(view_channel=False)}
         channel = await guild.create_text_channel(channel_name, category=category, overwrites=overwrites)
 
-        for index, member in enumerate(role.members):
-            await channel.set_permissions(member, view_channel=True)
-            if index % rate == 0:
-                await inter.edit_original_response(
-                    f"• uživatelů: {len(role.members)}\n"
-                    + utils.general.create_bar(index + 1, len(role.members))
-                )
+        message = await inter.original_response()
+        mutations = [Mutation.set_permissions(channel, member, view_channel=True) for member in role.members]
+        await run_bulk_job(self.bot, "channel create", guild, mutations, message, progress_every=rate)
 
         await inter.edit_original_response(
             MessagesCZ.channel_create_done(channel=channel.mention, role=role.name, perms=len(role.members))
@@ -200,14 +201,14 @@ class Roles(Base, commands.Cog):
             for member, permission in channel.overwrites.items()
             if not isinstance(member, disnake.Role) and permission.view_channel
         }
-        for index, member in enumerate(channel_user_overwrites):
-            await channel.set_permissions(member, overwrite=None)
-            await member.add_roles(new_role)
-            if index % rate == 0:
-                await inter.edit_original_response(
-                    f"• overwrites: {index + 1}/{len(channel_user_overwrites)}\n"
-                    f"{utils.general.create_bar(index + 1, len(channel_user_overwrites))}"
-                )
+        message = await inter.original_response()
+        mutations = []
+        for member in channel_user_overwrites:
+            mutations.append(Mutation.set_permissions(channel, member, overwrite=None))
+            mutations.append(Mutation.add_role(member, new_role))
+        await run_bulk_job(
+            self.bot, "overwrites to role", inter.guild, mutations, message, progress_every=rate
+        )
         await inter.edit_original_response(MessagesCZ.channel_overwrites_to_role_done)
 
     @channel.sub_command(name="role_to_overwrites", description=MessagesCZ.channel_role_to_overwrites_brief)
@@ -227,13 +228,11 @@ class Roles(Base, commands.Cog):
         members = role.members
         await role.delete()
 
-        for index, member in enumerate(members):
-            await channel.set_permissions(member, view_channel=True)
-            if index % rate == 0:
-                await inter.edit_original_response(
-                    f"• overwrites: {index + 1}/{len(members)}\n"
-                    f"{utils.general.create_bar(index + 1, len(members))}"
-                )
+        message = await inter.original_response()
+        mutations = [Mutation.set_permissions(channel, member, view_channel=True) for member in members]
+        await run_bulk_job(
+            self.bot, "role to overwrites", inter.guild, mutations, message, progress_every=rate
+        )
         await inter.edit_original_response(MessagesCZ.channel_role_to_overwrites_done)
 
     @PermissionsCheck.is_mod_plus()
@@ -251,13 +250,9 @@ class Roles(Base, commands.Cog):
         members = source_role.members
         new_role = await inter.guild.create_role(name=new_role_name)
 
-        for index, member in enumerate(members):
-            await member.add_roles(new_role)
-            if index % rate == 0:
-                await inter.edit_original_response(
-                    f"• members: {index + 1}/{len(members)}\n"
-                    f"{utils.general.create_bar(index + 1, len(members))}"
-                )
+        message = await inter.original_response()
+        mutations = [Mutation.add_role(member, new_role) for member in members]
+        await run_bulk_job(self.bot, "copy role", inter.guild, mutations, message, progress_every=rate)
         await inter.edit_original_response(MessagesCZ.copy_role_done)
 
     @PermissionsCheck.is_mod_plus()
@@ -282,15 +277,68 @@ class Roles(Base, commands.Cog):
             await inter.send(MessagesCZ.role_no_exlusives)
             return
 
-        for index, member in enumerate(members):
-            await member.remove_roles(remove_role)
-            if index % rate == 0:
-                await inter.edit_original_response(
-                    f"• members: {index + 1}/{len(members)}\n"
-                    f"{utils.general.create_bar(index + 1, len(members))}"
-                )
+        message = await inter.original_response()
+        mutations = [Mutation.remove_role(member, remove_role) for member in members]
+        await run_bulk_job(
+            self.bot, "remove exclusive roles", inter.guild, mutations, message, progress_every=rate
+        )
         await inter.edit_original_response(MessagesCZ.remove_exclusive_roles_done)
 
+    @PermissionsCheck.is_mod_plus()
+    @commands.slash_command(name="bulk_job", description=MessagesCZ.bulk_job_brief)
+    async def bulk_job(self, inter: disnake.ApplicationCommandInteraction):
+        pass
+
+    @bulk_job.sub_command(name="list", description=MessagesCZ.bulk_job_list_brief)
+    async def bulk_job_list(self, inter: disnake.ApplicationCommandInteraction):
+        jobs = BulkJobDB.get_unfinished()
+        if not jobs:
+            await inter.send(MessagesCZ.bulk_job_none)
+            return
+        lines = []
+        for job in jobs:
+            processed = running_jobs[job.id].processed if job.id in running_jobs else job.processed_count
+            lines.append(MessagesCZ.bulk_job_format(job=job, processed=processed))
+        await inter.send("\n".join(lines))
+
+    @bulk_job.sub_command(name="resume", description=MessagesCZ.bulk_job_resume_brief)
+    async def bulk_job_resume(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+        id: int = commands.Param(description=MessagesCZ.bulk_job_id_param),
+        rate: int = commands.Param(ge=1, default=10, description=MessagesCZ.channel_rate_param),
+    ):
+        job = BulkJobDB.get(id)
+        if job is None or job.status != BulkJobStatus.running.value:
+            await inter.send(MessagesCZ.bulk_job_not_found(id=id))
+            return
+        if id in running_jobs:
+            await inter.send(MessagesCZ.bulk_job_running(id=id))
+            return
+
+        await inter.send(MessagesCZ.bulk_job_resume_start(id=id))
+        # progress of the resumed job goes to the new message
+        message = await inter.original_response()
+        job.channel_id, job.message_id = message.channel.id, message.id
+        await BulkJob(self.bot, job).run(progress_every=rate)
+        await message.reply(MessagesCZ.bulk_job_done(id=id))
+
+    @bulk_job.sub_command(name="cancel", description=MessagesCZ.bulk_job_cancel_brief)
+    async def bulk_job_cancel(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+        id: int = commands.Param(description=MessagesCZ.bulk_job_id_param),
+    ):
+        job = BulkJobDB.get(id)
+        if job is None or job.status != BulkJobStatus.running.value:
+            await inter.send(MessagesCZ.bulk_job_not_found(id=id))
+            return
+        if id in running_jobs:
+            await inter.send(MessagesCZ.bulk_job_running(id=id))
+            return
+        BulkJob(self.bot, job).cancel()
+        await inter.send(MessagesCZ.bulk_job_cancelled(id=id))
+
     @commands.Cog.listener()
     async def on_member_join(self, member: disnake.Member):
         if member.guild.id == Base.config.guild_id:  # We're on VUT FIT guild
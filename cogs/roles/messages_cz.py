@@ -51,3 +51,16 @@ class MessagesCZ(GlobalMessages):
     channel_add_topic_start = "Probíhá přidávání popisů"
     channel_add_topic_progress = channel_add_topic_start+"\n• kanálů: {index}/{total}\n{progress_bar}\nAktuální kanál: {channel}"
     channel_add_topic_done = "Popisy byly úspěšně přidány"
+
+    bulk_job_brief = "Správa hromadných změn rolí a oprávnění"
+    bulk_job_list_brief = "Vypíše nedokončené hromadné změny"
+    bulk_job_resume_brief = "Pokračuje v přerušené hromadné změně"
+    bulk_job_cancel_brief = "Zruší přerušenou hromadnou změnu"
+    bulk_job_id_param = "ID hromadné změny"
+    bulk_job_none = "Žádné nedokončené hromadné změny."
+    bulk_job_format = "#{job.id} **{job.name}** • {processed}/{job.total} • vytvořeno {job.created_at:%d.%m.%Y %H:%M}"
+    bulk_job_not_found = "Hromadná změna #{id} neexistuje nebo je dokončená."
+    bulk_job_running = "Hromadná změna #{id} právě běží."
+    bulk_job_resume_start = "Pokračuji v hromadné změně #{id}"
+    bulk_job_done = "Hromadná změna #{id} dokončena."
+    bulk_job_cancelled = "Hromadná změna #{id} zrušena."
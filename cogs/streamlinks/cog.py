@@ -15,8 +15,8 @@ from requests.packages.urllib3.util.retry import Retry  # type: ignore
 import utils
 from buttons.embed import PaginationView
 from cogs.base import Base
-from database.review import SubjectDB
 from database.streamlinks import StreamLinkDB
+from features.autocomplete import streamlink_subject_autocomplete, subject_autocomplete
 from features.list_message_sender import send_list_of_messages
 from features.prompt import PromptSession
 from rubbergod import Rubbergod
@@ -28,27 +28,23 @@ from .messages_cz import MessagesCZ
 # Pattern: "AnyText | [Subject] Page: CurrentPage / {TotalPages}"
 pagination_regex = re.compile(r"^\[([^\]]*)\]\s*Page:\s*(\d*)\s*\/\s*(\d*)")
 
-subjects: list[tuple[str]] = []
-subjects_with_stream: list[tuple[str]] = []
-
 escape = disnake.utils.escape_markdown
 
 
 async def autocomp_subjects(inter: disnake.ApplicationCommandInteraction, user_input: str):
-    return [subject[0] for subject in subjects if user_input.lower() in subject[0]][:25]
+    return subject_autocomplete.search(user_input)
 
 
 async def autocomp_subjects_with_stream(inter: disnake.ApplicationCommandInteraction, user_input: str):
-    return [subject[0] for subject in subjects_with_stream if user_input.lower() in subject[0]][:25]
+    return streamlink_subject_autocomplete.search(user_input)
 
 
 class StreamLinks(Base, commands.Cog):
     def __init__(self, bot: Rubbergod):
-        global subjects, subjects_with_stream
         super().__init__()
         self.bot = bot
-        subjects = SubjectDB.get_all()
-        subjects_with_stream = StreamLinkDB.get_subjects_with_stream()
+        subject_autocomplete.refresh()
+        streamlink_subject_autocomplete.refresh()
 
     @cooldowns.default_cooldown
     @commands.group(
@@ -5,13 +5,12 @@ Cog implementing subscriptions to forum posts based on their tags
 import disnake
 from disnake.ext import commands
 
-import utils
-from buttons.general import TrashView
 from cogs.base import Base
-from database.subscription import AlreadyNotifiedDB, SubscriptionDB
+from database.subscription import SubscriptionDB
 from rubbergod import Rubbergod
 from utils import cooldowns
 
+from .features import NotificationFanout
 from .messages_cz import MessagesCZ
 
 
@@ -34,6 +33,7 @@ class Subscriptions(Base, commands.Cog):
     def __init__(self, bot: Rubbergod):
         super().__init__()
         self.bot = bot
+        self.fanout = NotificationFanout(bot)
 
     @cooldowns.short_cooldown
     @commands.slash_command(name="subscription")
@@ -85,13 +85,7 @@ class Subscriptions(Base, commands.Cog):
             # thread without tags
             return
         tags = [tag.name for tag in thread.applied_tags]
-        subs = SubscriptionDB.get_channel(str(thread.parent_id))
-        already_notified = AlreadyNotifiedDB.get(str(thread.id))
-        for sub in subs:
-            if sub.tag in tags and sub.user_id not in already_notified:
-                await self.send_notification(sub.user_id, thread)
-                already_notified.append(sub.user_id)
-                AlreadyNotifiedDB.add(sub.user_id, str(thread.id))
+        await self.fanout.notify(thread, tags)
 
     @commands.Cog.listener()
     async def on_thread_update(self, before: disnake.Thread, after: disnake.Thread):
@@ -99,27 +93,5 @@ class Subscriptions(Base, commands.Cog):
             # thread without tags
             return
         tags = [tag.name for tag in filter(lambda x: x not in before.applied_tags, after.applied_tags)]
-        subs = SubscriptionDB.get_channel(str(after.parent_id))
-        already_notified = AlreadyNotifiedDB.get(str(after.id))
-        for sub in subs:
-            if sub.tag in tags and sub.user_id not in already_notified:
-                await self.send_notification(sub.user_id, after)
-                already_notified.append(sub.user_id)
-                AlreadyNotifiedDB.add(sub.user_id, str(after.id))
-
-    async def send_notification(self, user_id: str, thread: disnake.Thread):
-        user: disnake.User = await self.bot.get_or_fetch_user(user_id)
-        # get content of first message if available
-        first_message = await thread.history(limit=1, oldest_first=True).flatten()
-        content = first_message[0].content if first_message[0] else None
-        embed = disnake.Embed(
-            title=MessagesCZ.embed_title,
-            url=thread.jump_url,
-            description=content,
-        )
-        embed.add_field(name=MessagesCZ.embed_author, value=thread.owner.display_name)
-        embed.add_field(name=MessagesCZ.embed_channel, value=thread.mention)
-        tags = [f"`{tag.name}`" for tag in thread.applied_tags]
-        embed.add_field(name=MessagesCZ.embed_tags, value=", ".join(tags))
-        utils.embed.add_author_footer(embed, thread.owner)
-        await user.send(embed=embed, view=TrashView())
+        if tags:
+            await self.fanout.notify(after, tags)
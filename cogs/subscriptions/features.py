@@ -0,0 +1,142 @@
+"""
+Fan-out of notifications about new or retagged forum threads to subscribers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Iterable
+
+import disnake
+
+import utils
+from buttons.general import TrashView
+from config.app_config import config
+from database.subscription import AlreadyNotifiedDB, SubscriptionDB
+from features.rate_limit import TokenBucket
+from rubbergod import Rubbergod
+
+from .messages_cz import MessagesCZ
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+SENT = "sent"
+# DMs are closed or the user doesn't exist, not retried
+UNREACHABLE = "unreachable"
+# retried on the next tag change
+FAILED = "failed"
+
+
+class NotificationFanout:
+    """Notifies all subscribers of a thread at once.
+
+    The embed is built once per thread, users missing in the cache are fetched concurrently
+    and DMs are sent concurrently under a shared rate limit.
+    Delivered notifications are saved with one insert.
+    Each fan-out dispatches `on_subscription_fanout(duration, results)`.
+    """
+
+    def __init__(self, bot: Rubbergod):
+        self.bot = bot
+        self.rate_limiter = TokenBucket(
+            config.subscriptions_dm_rate_limit, config.subscriptions_dm_rate_period
+        )
+        self.semaphore = asyncio.Semaphore(config.subscriptions_dm_concurrency)
+        # users notified by running fan-outs by thread id, create and update events can overlap
+        self.in_progress: dict[int, set[str]] = defaultdict(set)
+
+    async def build_embed(self, thread: disnake.Thread) -> disnake.Embed:
+        # get content of first message if available
+        first_message = await thread.history(limit=1, oldest_first=True).flatten()
+        content = first_message[0].content if first_message else None
+        embed = disnake.Embed(
+            title=MessagesCZ.embed_title,
+            url=thread.jump_url,
+            description=content,
+        )
+        owner = thread.owner or await self.bot.get_or_fetch_user(thread.owner_id)
+        embed.add_field(name=MessagesCZ.embed_author, value=owner.display_name)
+        embed.add_field(name=MessagesCZ.embed_channel, value=thread.mention)
+        tags = [f"`{tag.name}`" for tag in thread.applied_tags]
+        embed.add_field(name=MessagesCZ.embed_tags, value=", ".join(tags))
+        utils.embed.add_author_footer(embed, owner)
+        return embed
+
+    async def resolve_users(self, user_ids: list[str]) -> dict[str, disnake.User | None]:
+        """Users from the cache, the rest is fetched concurrently.
+        None stands for a user who doesn't exist, users who failed to fetch are left out."""
+        users: dict[str, disnake.User | None] = {}
+        missing = []
+        for user_id in user_ids:
+            user = self.bot.get_user(int(user_id))
+            if user is None:
+                missing.append(user_id)
+            users[user_id] = user
+
+        async def fetch(user_id: str) -> None:
+            async with self.semaphore:
+                try:
+                    users[user_id] = await self.bot.fetch_user(int(user_id))
+                except disnake.NotFound:
+                    users[user_id] = None
+                except Exception:
+                    rubbergod_logger.exception(f"Subscriber {user_id} could not be fetched")
+                    del users[user_id]
+
+        await asyncio.gather(*(fetch(user_id) for user_id in missing))
+        return users
+
+    async def send(self, user: disnake.User | None, embed: disnake.Embed) -> str:
+        if user is None:
+            return UNREACHABLE
+        async with self.semaphore:
+            await self.rate_limiter.acquire()
+            try:
+                await user.send(embed=embed, view=TrashView())
+            except disnake.Forbidden:
+                return UNREACHABLE
+            except disnake.HTTPException as error:
+                rubbergod_logger.warning(f"Subscription notification to {user.id} failed: {error}")
+                return FAILED
+            except Exception:
+                # the other notifications still have to be saved
+                rubbergod_logger.exception(f"Subscription notification to {user.id} failed")
+                return FAILED
+        return SENT
+
+    async def notify(self, thread: disnake.Thread, tags: Iterable[str]) -> Counter:
+        """Notify subscribers of the tags who were not notified about the thread yet"""
+        start = time.perf_counter()
+        subscribers = SubscriptionDB.get_subscribers(str(thread.parent_id), tags)
+        notified = set(AlreadyNotifiedDB.get(str(thread.id))) | self.in_progress.get(thread.id, set())
+        user_ids = [user_id for user_id in subscribers if user_id not in notified]
+        results: Counter = Counter()
+        if not user_ids:
+            return results
+
+        self.in_progress[thread.id].update(user_ids)
+        try:
+            embed = await self.build_embed(thread)
+            users = await self.resolve_users(user_ids)
+
+            async def deliver(user_id: str) -> str:
+                if user_id not in users:
+                    # fetching of the user failed
+                    return FAILED
+                return await self.send(users[user_id], embed)
+
+            sent = await asyncio.gather(*(deliver(user_id) for user_id in user_ids))
+            AlreadyNotifiedDB.add_many(
+                (user_id for user_id, result in zip(user_ids, sent) if result != FAILED), str(thread.id)
+            )
+            results.update(sent)
+        finally:
+            self.in_progress[thread.id].difference_update(user_ids)
+            if not self.in_progress[thread.id]:
+                del self.in_progress[thread.id]
+
+        self.bot.dispatch("subscription_fanout", time.perf_counter() - start, results)
+        return results
@@ -4,16 +4,23 @@ Core cog for bot. Can't be unloaded. Contains commands for cog management.
 
 import platform
 import subprocess
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from io import BytesIO
 
 import disnake
-from disnake.ext import commands
+from disnake.ext import commands, tasks
 
 import utils
 from cogs.base import Base
+from database import database
+from database.cooldown import cooldown_store
 from database.error import ErrorLogDB
+from database.karma import karma_ledger
+from database.stats import UsageEvent, usage_log
 from features.error import ErrorLogger
+from features.error_aggregator import error_aggregator
+from features.error_image import accident_renderer
 from features.git import Git
 from rubbergod import Rubbergod
 from utils import cooldowns
@@ -26,15 +33,27 @@ from .views import View
 
 boottime = datetime.now().replace(microsecond=0)
 
+# start of a command without completion or error event is dropped after this (interaction token lifetime)
+STALE_COMMAND_START = 15 * 60
+
 
 class System(Base, commands.Cog):
     def __init__(self, bot: Rubbergod):
         super().__init__()
         self.bot = bot
         self.error_log = ErrorLogger(bot)
+        accident_renderer.preload()
         self.git = Git()
 
         self.unloadable_cogs = ["system"]
+        # start times of running commands by interaction or message id
+        self.command_starts: dict[int, float] = {}
+        self.tasks = [
+            self.flush_usage_task.start(),
+            self.flush_errors_task.start(),
+            self.flush_cooldowns_task.start(),
+            self.prune_cooldowns_task.start(),
+        ]
 
     @PermissionsCheck.is_bot_admin()
     @commands.slash_command(name="get_logs", description=MessagesCZ.get_logs_brief)
@@ -83,6 +102,13 @@ class System(Base, commands.Cog):
         await self.bot.rubbergod_session.close()
         await self.bot.grillbot_session.close()
         await self.bot.vutapi_session.close()
+        await self.bot.exams_session.close()
+        await self.bot.cdn_session.close()
+        await karma_ledger.flush()
+        await usage_log.flush()
+        await error_aggregator.flush()
+        await cooldown_store.flush()
+        await database.async_db.dispose()
         await self.bot.close()
 
     @PermissionsCheck.is_bot_admin()
@@ -153,7 +179,7 @@ class System(Base, commands.Cog):
             value=f"**{(end_streak - start_streak).days} day(s)**\n{start_streak} — {end_streak}",
             inline=False,
         )
-        self.error_log.set_image(embed, self.bot.user, count)
+        await self.error_log.set_image(embed, self.bot.user, count)
         await inter.edit_original_response(embed=embed)
 
     @cooldowns.default_cooldown
@@ -174,3 +200,146 @@ class System(Base, commands.Cog):
         embed.description = description
 
         await inter.edit_original_response(embed=embed)
+
+    @PermissionsCheck.is_bot_admin()
+    @commands.slash_command(name="usage", description=MessagesCZ.usage_brief)
+    async def usage(
+        self,
+        inter: disnake.ApplicationCommandInteraction,
+        days: int = commands.Param(7, ge=1, le=90, description=MessagesCZ.usage_days_param),
+    ):
+        await inter.response.defer()
+        await usage_log.flush()
+        since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+        rollups = await UsageEvent.rollup(since)
+        if not rollups:
+            await inter.send(MessagesCZ.usage_empty)
+            return
+
+        table = features.usage_table(rollups)
+        if len(table) < 1900:
+            await inter.send(f"```{table}```")
+            return
+        with BytesIO(bytes(table, "utf-8")) as file_binary:
+            await inter.send(file=disnake.File(fp=file_binary, filename="usage.txt"))
+
+    def record_usage(
+        self,
+        key: int,
+        kind: str,
+        command: commands.InvokableApplicationCommand | commands.Command | None,
+        guild: disnake.Guild | None,
+        error: Exception | None,
+    ) -> None:
+        start = self.command_starts.pop(key, None)
+        if start is None or command is None:
+            return
+        usage_log.record(
+            kind,
+            command.qualified_name,
+            command.cog_name,
+            guild.id if guild is not None else None,
+            time.perf_counter() - start,
+            features.usage_outcome(error),
+        )
+
+    def record_app_command(self, inter: disnake.ApplicationCommandInteraction, error: Exception = None):
+        kind = features.APP_COMMAND_KINDS.get(inter.data.type, str(inter.data.type))
+        self.record_usage(inter.id, kind, inter.application_command, inter.guild, error)
+
+    @commands.Cog.listener()
+    async def on_application_command(self, inter: disnake.ApplicationCommandInteraction):
+        self.command_starts[inter.id] = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_slash_command_completion(self, inter: disnake.ApplicationCommandInteraction):
+        self.record_app_command(inter)
+
+    @commands.Cog.listener()
+    async def on_user_command_completion(self, inter: disnake.ApplicationCommandInteraction):
+        self.record_app_command(inter)
+
+    @commands.Cog.listener()
+    async def on_message_command_completion(self, inter: disnake.ApplicationCommandInteraction):
+        self.record_app_command(inter)
+
+    @commands.Cog.listener()
+    async def on_slash_command_error(self, inter: disnake.ApplicationCommandInteraction, error: Exception):
+        self.record_app_command(inter, error)
+
+    @commands.Cog.listener()
+    async def on_user_command_error(self, inter: disnake.ApplicationCommandInteraction, error: Exception):
+        self.record_app_command(inter, error)
+
+    @commands.Cog.listener()
+    async def on_message_command_error(self, inter: disnake.ApplicationCommandInteraction, error: Exception):
+        self.record_app_command(inter, error)
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx: commands.Context):
+        self.command_starts[ctx.message.id] = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        self.record_usage(ctx.message.id, "prefix", ctx.command, ctx.guild, None)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx: commands.Context, error: Exception):
+        self.record_usage(ctx.message.id, "prefix", ctx.command, ctx.guild, error)
+
+    @tasks.loop(seconds=Base.config.stats_usage_flush_interval)
+    async def flush_usage_task(self):
+        now = time.perf_counter()
+        for key, start in list(self.command_starts.items()):
+            if now - start > STALE_COMMAND_START:
+                del self.command_starts[key]
+        try:
+            await usage_log.flush()
+        except Exception:
+            # events are kept for the next flush, the loop must keep running
+            self.bot.logger.exception("Command usage could not be written")
+
+    @flush_usage_task.after_loop
+    async def after_flush_usage_task(self):
+        # write the rest of pending usage when the cog is unloaded
+        await usage_log.flush()
+
+    @tasks.loop(seconds=Base.config.error_window)
+    async def flush_errors_task(self):
+        try:
+            suppressed = await error_aggregator.flush()
+        except Exception:
+            # counts are kept for the next window, the loop must keep running
+            self.bot.logger.exception("Error counts could not be written")
+            return
+        try:
+            await self.error_log.send_suppressed_errors(suppressed)
+        except disnake.HTTPException:
+            self.bot.logger.exception("Summary of suppressed errors could not be sent")
+
+    @flush_errors_task.before_loop
+    async def before_flush_errors_task(self):
+        await self.bot.wait_until_ready()
+
+    @flush_errors_task.after_loop
+    async def after_flush_errors_task(self):
+        await error_aggregator.flush()
+
+    @tasks.loop(seconds=Base.config.cooldown_flush_interval)
+    async def flush_cooldowns_task(self):
+        try:
+            await cooldown_store.flush()
+        except Exception:
+            # windows are kept for the next flush, the loop must keep running
+            self.bot.logger.exception("Cooldowns could not be written")
+
+    @flush_cooldowns_task.after_loop
+    async def after_flush_cooldowns_task(self):
+        await cooldown_store.flush()
+
+    @tasks.loop(seconds=Base.config.cooldown_prune_interval)
+    async def prune_cooldowns_task(self):
+        try:
+            await cooldown_store.prune()
+        except Exception:
+            self.bot.logger.exception("Expired cooldowns could not be removed")
@@ -2,9 +2,12 @@ import os
 from genericpath import isdir, isfile
 
 import disnake
+from disnake.ext import commands
 
 import utils
 from config.app_config import config
+from database.stats import UsageRollup
+from features.table_generator import TableGenerator
 from rubbergod import Rubbergod
 
 from . import features
@@ -96,3 +99,42 @@ def create_embed(bot: Rubbergod) -> disnake.Embed:
 
     embed.set_footer(text=MessagesCZ.override)
     return embed
+
+
+# kinds of application commands in usage telemetry
+APP_COMMAND_KINDS = {
+    disnake.ApplicationCommandType.chat_input: "slash",
+    disnake.ApplicationCommandType.user: "user",
+    disnake.ApplicationCommandType.message: "message",
+}
+
+
+def usage_outcome(error: Exception | None) -> str:
+    """Outcome of the command invocation stored in usage telemetry"""
+    if error is None:
+        return "ok"
+    if isinstance(error, commands.CommandOnCooldown):
+        return "cooldown"
+    if isinstance(error, commands.CheckFailure):
+        return "check"
+    if isinstance(error, commands.UserInputError):
+        return "user_input"
+    return "error"
+
+
+def usage_table(rollups: list[UsageRollup]) -> str:
+    table = TableGenerator(["Day", "Kind", "Command", "Count", "Failed", "p50 ms", "p95 ms"], 30)
+    table.align(["l", "l", "l", "r", "r", "r", "r"])
+    rows = [
+        [
+            str(rollup.day),
+            rollup.kind,
+            rollup.command,
+            str(rollup.count),
+            str(rollup.failed),
+            f"{rollup.p50 * 1000:.0f}",
+            f"{rollup.p95 * 1000:.0f}",
+        ]
+        for rollup in rollups
+    ]
+    return table.generate_table(rows)
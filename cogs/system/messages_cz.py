@@ -31,3 +31,7 @@ class MessagesCZ(GlobalMessages):
     commands = "Příkazy"
 
     command_checks_brief = "Vypíše příkazy a jejich omezení nastavené v kódu"
+
+    usage_brief = "Vypíše počty a délky běhu příkazů po dnech"
+    usage_days_param = "Počet dní"
+    usage_empty = "Za zvolené období nejsou žádné záznamy."
@@ -8,6 +8,7 @@ import utils
 from config.app_config import config
 from database.report import ReportDB
 from database.timeout import TimeoutDB, TimeoutUserDB
+from features.autocomplete import AutocompleteIndex
 from rubbergod import Rubbergod
 from utils.errors import ApiError, InvalidTime
 
@@ -30,6 +31,7 @@ TIMESTAMPS = [
     "4weeks",
     "Forever",
 ]
+timestamps_autocomplete = AutocompleteIndex(TIMESTAMPS)
 
 
 def create_embed(
@@ -303,8 +305,10 @@ async def send_to_grillbot(
 
 
 async def autocomplete_times(inter: disnake.ApplicationCommandInteraction, input: str) -> list[str]:
-    input = input.lower()
-    return [endtime for endtime in TIMESTAMPS if input in endtime.lower()]
+    if not input.strip():
+        # keep the chronological order of the full list
+        return TIMESTAMPS
+    return timestamps_autocomplete.search(input)
 
 
 async def send_dm_to_user(user: disnake.User, embed: disnake.Embed) -> None:
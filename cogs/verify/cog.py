@@ -5,11 +5,12 @@ Cog for verification system. Enables users to verify themselves with xlogin00 an
 from io import BytesIO
 
 import disnake
-from disnake.ext import commands
+from disnake.ext import commands, tasks
 
 from cogs.base import Base
 from database.verification import DynamicVerifyDB
 from features import verification
+from features.mail import mail_outbox
 from features.table_generator import TableGenerator
 from rubbergod import Rubbergod
 from utils import cooldowns
@@ -31,6 +32,22 @@ class Verify(Base, commands.Cog):
         self.bot = bot
         self.verification = verification.Verification(bot)
         self.dynamic_verify_manager = DynamicVerifyManager(bot)
+        self.tasks = [self.prune_mail_task.start()]
+
+    async def cog_load(self):
+        mail_outbox.start(self.bot)
+
+    @tasks.loop(hours=1)
+    async def prune_mail_task(self):
+        try:
+            mail_outbox.prune()
+        except Exception:
+            self.bot.logger.exception("Sent mails could not be removed")
+
+    @prune_mail_task.after_loop
+    async def after_prune_mail_task(self):
+        # stop the outbox worker when the cog is unloaded
+        await mail_outbox.stop()
 
     def is_valid_guild(ctx: disnake.ApplicationCommandInteraction) -> bool:
         return ctx.guild_id is None or ctx.guild_id == Base.config.guild_id
@@ -0,0 +1,84 @@
+"""
+Benchmark of repost lookup, linear scan over all hashes vs. HashIndex.
+
+Usage: python -m cogs.warden.benchmark [--sizes 10000 100000 1000000] [--queries 20]
+"""
+
+import argparse
+import random
+import time
+
+import dhash
+
+from .features_hash_index import HashIndex, IndexedImage
+
+HASH_BITS = 128
+LIMIT_SOFT = 14
+
+
+def flip_bits(img_hash: int, count: int) -> int:
+    for position in random.sample(range(HASH_BITS), count):
+        img_hash ^= 1 << position
+    return img_hash
+
+
+def linear_scan(posts: list[tuple[IndexedImage, str]], img_hash: int) -> tuple[IndexedImage, int] | None:
+    """Lookup the same way as Warden did before the index"""
+    hamming_min = HASH_BITS
+    duplicate = None
+    for image, post_dhash in posts:
+        hamming = dhash.get_num_bits_different(img_hash, int(post_dhash, 16))
+        if hamming < hamming_min:
+            duplicate = image
+            hamming_min = hamming
+    if duplicate is None or hamming_min > LIMIT_SOFT:
+        return None
+    return duplicate, hamming_min
+
+
+def run(size: int, queries: int) -> None:
+    hashes = [random.getrandbits(HASH_BITS) for _ in range(size)]
+    posts = [(IndexedImage(i, i, 0), hex(img_hash)) for i, img_hash in enumerate(hashes)]
+
+    start = time.perf_counter()
+    index = HashIndex(HASH_BITS)
+    for image, post_dhash in posts:
+        index.add(int(post_dhash, 16), image)
+    build_time = time.perf_counter() - start
+
+    # half of the queries are reposts with small changes, half are new images
+    targets = [flip_bits(random.choice(hashes), random.randint(0, LIMIT_SOFT)) for _ in range(queries // 2)]
+    targets += [random.getrandbits(HASH_BITS) for _ in range(queries - len(targets))]
+
+    start = time.perf_counter()
+    linear_results = [linear_scan(posts, target) for target in targets]
+    linear_time = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    index_results = [index.find_nearest(target, LIMIT_SOFT) for target in targets]
+    index_time = (time.perf_counter() - start) / queries
+
+    mismatches = sum(
+        (linear is None) != (indexed is None) or (linear is not None and linear[1] != indexed[1])
+        for linear, indexed in zip(linear_results, index_results)
+    )
+    print(
+        f"{size:>9} hashes | build {build_time:7.2f} s | linear {linear_time * 1000:9.3f} ms/query | "
+        f"index {index_time * 1000:7.3f} ms/query | speedup {linear_time / index_time:8.1f}x | "
+        f"mismatches {mismatches}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for size in args.sizes:
+        run(size, args.queries)
+
+
+if __name__ == "__main__":
+    main()
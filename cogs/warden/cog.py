@@ -13,10 +13,12 @@ from disnake.ext import commands
 import utils
 from cogs.base import Base
 from database.image import ImageDB
+from features.image_analysis import image_analyzer
 from rubbergod import Rubbergod
 from utils.checks import PermissionsCheck
 
 from . import features
+from .features_hash_index import HashIndex, IndexedImage
 from .messages_cz import MessagesCZ
 
 dhash.force_pil()
@@ -34,6 +36,18 @@ class Warden(Base, commands.Cog):
         self.limit_soft = 14
 
         self.message_channel = None
+        self.hash_index = HashIndex()
+        self.hash_index_ready = asyncio.Event()
+
+    async def cog_load(self):
+        image_analyzer.start(self.bot)
+        await features.load_hash_index(self.hash_index)
+        self.hash_index_ready.set()
+        self.bot.logger.info(f"Warden: loaded {len(self.hash_index)} image hashes")
+
+    def cog_unload(self) -> None:
+        super().cog_unload()
+        image_analyzer.stop()
 
     def doCheckRepost(self, message: disnake.Message):
         return (
@@ -53,6 +67,7 @@ class Warden(Base, commands.Cog):
     async def on_message_delete(self, message: disnake.Message):
         if self.doCheckRepost(message):
             ImageDB.deleteByMessage(message.id)
+            self.hash_index.remove_message(message.id)
 
             # try to detect repost embed
             messages = await message.channel.history(after=message, limit=10, oldest_first=True).flatten()
@@ -103,7 +118,8 @@ class Warden(Base, commands.Cog):
     @commands.bot_has_permissions(read_message_history=True)
     @scan.command(name="history", brief=MessagesCZ.scan_brief)
     async def scan_history(self, ctx: commands.Context, limit: int | str):
-        """Scan current channel for images and save them as hashes
+        """Scan current channel for images and save them as hashes.
+        Continues from the last scanned message of the channel.
         limit: [all | <int>]
         """
         # parse parameter
@@ -115,76 +131,57 @@ class Warden(Base, commands.Cog):
             except ValueError:
                 raise commands.BadArgument("Expected 'all' or positive integer")
 
-        messages = await ctx.channel.history(limit=limit if limit != "all" else None).flatten()
-
-        title = "**INITIATING...**\n\nLoaded {} messages"
-        await asyncio.sleep(0.5)
-        template = (
-            "**SCANNING IN PROGRESS**\n\n"
-            "Processed **{}** of **{}** messages ({:.1f} %)\n"
-            "Computed **{}** hashes"
-        )
-        msg = await ctx.send(title(len(messages)))
-
-        ctr_nofile = 0
-        ctr_hashes = 0
-        i = 0
+        await self.hash_index_ready.wait()
+        msg = await ctx.send(MessagesCZ.scan_started)
         now = time.time()
-        for i, message in enumerate(messages):
-            # update info on every 10th message
-            if i % 50 == 0:
-                await msg.edit(content=template(i, len(messages), (i / len(messages) * 100), ctr_hashes))
-
-            if len(message.attachments) == 0:
-                ctr_nofile += 1
-                continue
 
-            hashes = [x async for x in features.saveMessageHashes(message)]
-            ctr_hashes += len(hashes)
+        async def progress(result: features.ScanProgress) -> None:
+            await msg.edit(content=MessagesCZ.scan_progress(processed=result.processed, hashes=result.hashes))
 
+        result = await features.scan_channel(
+            ctx.channel, self.hash_index, limit if limit != "all" else None, progress
+        )
         await msg.edit(
-            content="**SCAN COMPLETE**\n\n"
-            f"Processed **{len(messages)}** messages.\n"
-            f"Computed **{ctr_hashes}** hashes in {(time.time() - now):.1f} seconds."
+            content=MessagesCZ.scan_complete(
+                processed=result.processed,
+                hashes=result.hashes,
+                failed=result.failed,
+                time=f"{time.time() - now:.1f}",
+            )
         )
 
-    @scan.command(name="message")
-    async def scan_message(self, ctx: Rubbergod, link):
-        """Scan message attachments in whole database"""
-        # TODO: implement
-        pass
+    @commands.guild_only()
+    @commands.bot_has_permissions(read_message_history=True)
+    @scan.command(name="message", brief=MessagesCZ.scan_message_brief)
+    async def scan_message(self, ctx: commands.Context, message: disnake.Message):
+        """Index or reindex images of the message
+        message: [link | id]
+        """
+        await self.hash_index_ready.wait()
+        hashes = await features.rescan_message(message, self.hash_index)
+        await ctx.reply(MessagesCZ.scan_message_done(hashes=len(hashes), link=message.jump_url))
 
     async def checkDuplicate(self, message: disnake.Message):
         """Check if uploaded files are known"""
-        hashes = [x async for x in features.saveMessageHashes(message)]
+        await self.hash_index_ready.wait()
+        hashes = [x async for x in features.saveMessageHashes(message, self.hash_index)]
 
         if len(message.attachments) > 0 and len(hashes) == 0:
             return
 
         duplicates = {}
-        posts = ImageDB.getAll()
         for img_hash in hashes:
-            hamming_min = 128
-            duplicate = None
-            for post in posts:
-                # skip current message
-                if post.message_id == message.id:
-                    continue
-                # do the comparison
-                post_hash = int(post.dhash, 16)
-                hamming = dhash.get_num_bits_different(img_hash, post_hash)
-                if hamming < hamming_min:
-                    duplicate = post
-                    hamming_min = hamming
-
-            if duplicate is not None:
+            # skip current message
+            nearest = self.hash_index.find_nearest(img_hash, self.limit_soft, exclude_message_id=message.id)
+            if nearest is not None:
+                duplicate, hamming_min = nearest
                 duplicates[duplicate] = hamming_min
 
         for duplicate, hamming_min in duplicates.items():
             if hamming_min <= self.limit_soft:
                 await self._announceDuplicate(message, duplicate, hamming_min)
 
-    async def _announceDuplicate(self, message: disnake.Message, original: ImageDB, hamming: int):
+    async def _announceDuplicate(self, message: disnake.Message, original: IndexedImage, hamming: int):
         """Send message that a post is a original
         original: object
         hamming: Hamming distance between the image and closest database entry
@@ -1,27 +1,163 @@
-from io import BytesIO
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable
 
-import dhash
 import disnake
-from PIL import Image
 
-from database.image import ImageDB
+from database import session
+from database.image import ImageDB, WardenScanDB
+from features.image_analysis import ImageAnalysisError, image_analyzer
 
+from .features_hash_index import HashIndex, IndexedImage
 
-async def saveMessageHashes(message: disnake.Message):
-    for f in message.attachments:
-        fp = BytesIO()
-        await f.save(fp)
-        try:
-            image = Image.open(fp)
-        except OSError:
-            # not an image
-            continue
-        img_hash = dhash.dhash_int(image)
+# messages fetched, hashed and saved at once, Discord returns history by 100 messages
+SCAN_PAGE_SIZE = 100
+# attachments downloaded at once, hashing itself is limited by the worker pool
+SCAN_CONCURRENCY = 8
+
+
+async def hash_attachments(
+    message: disnake.Message, raise_errors: bool = False
+) -> list[tuple[disnake.Attachment, int]]:
+    """Hash all attachments of the message concurrently, attachments which are not images are left out.
+    With `raise_errors` an attachment which failed to download or hash raises `ImageAnalysisError`."""
+    hashes = await asyncio.gather(
+        *(image_analyzer.hash_attachment(f, raise_errors) for f in message.attachments)
+    )
+    return [(f, img_hash) for f, img_hash in zip(message.attachments, hashes) if img_hash is not None]
 
-        ImageDB.add_image(
+
+async def saveMessageHashes(message: disnake.Message, index: HashIndex = None):
+    for f, img_hash in await hash_attachments(message):
+        db_image = ImageDB.add_image(
             channel_id=message.channel.id,
             message_id=message.id,
             attachment_id=f.id,
             dhash=str(hex(img_hash)),
         )
+        if db_image is not None and index is not None:
+            index.add(img_hash, IndexedImage(f.id, message.id, message.channel.id))
         yield img_hash
+
+
+async def rescan_message(message: disnake.Message, index: HashIndex) -> list[int]:
+    """Drop stored hashes of the message and hash its attachments again"""
+    ImageDB.deleteByMessage(message.id)
+    index.remove_message(message.id)
+    return [img_hash async for img_hash in saveMessageHashes(message, index)]
+
+
+@dataclass
+class ScanProgress:
+    processed: int = 0
+    hashes: int = 0
+    # messages with attachments that failed to download or hash
+    failed: int = 0
+    last_message_id: int | None = None
+
+
+async def save_page(
+    channel: disnake.abc.Messageable,
+    messages: list[disnake.Message],
+    index: HashIndex,
+    semaphore: asyncio.Semaphore,
+    advance: bool = True,
+) -> tuple[int, int]:
+    """Hash attachments of the page and save them together with the checkpoint.
+
+    The checkpoint moves only past messages whose attachments were all processed,
+    it stops before the first failed message, so the next scan tries it again.
+    With `advance` False the checkpoint stays where it is.
+    Returns number of computed hashes and failed messages.
+    """
+    indexed = ImageDB.get_indexed_messages([message.id for message in messages if message.attachments])
+
+    async def hash_message(message: disnake.Message) -> list[tuple[disnake.Attachment, int]] | None:
+        async with semaphore:
+            try:
+                return await hash_attachments(message, raise_errors=True)
+            except ImageAnalysisError:
+                return None
+
+    pending = [message for message in messages if message.attachments and message.id not in indexed]
+    hashed = await asyncio.gather(*(hash_message(message) for message in pending))
+    failed = {message.id for message, hashes in zip(pending, hashed) if hashes is None}
+
+    last_message_id = None
+    if advance:
+        for message in messages:
+            if message.id in failed:
+                break
+            last_message_id = message.id
+
+    images = [
+        {
+            "channel_id": channel.id,
+            "message_id": message.id,
+            "attachment_id": f.id,
+            "dhash": str(hex(img_hash)),
+        }
+        for message, hashes in zip(pending, hashed)
+        for f, img_hash in hashes or []
+    ]
+    try:
+        inserted = ImageDB.add_images(images)
+        WardenScanDB.checkpoint(channel.id, last_message_id, processed=len(messages), hashes=len(images))
+    except Exception:
+        session.rollback()
+        raise
+    for image in inserted:
+        index.add(
+            int(image["dhash"], 16),
+            IndexedImage(image["attachment_id"], image["message_id"], image["channel_id"]),
+        )
+    return len(images), len(failed)
+
+
+async def scan_channel(
+    channel: disnake.abc.Messageable,
+    index: HashIndex,
+    limit: int | None = None,
+    progress: Callable[[ScanProgress], Awaitable[None]] | None = None,
+) -> ScanProgress:
+    """Index images in the channel history from the oldest message.
+
+    History is streamed by pages and the scan continues after the last checkpoint,
+    so it can be resumed after a restart and later runs process only new messages.
+    `limit` is the maximum number of messages processed by this run.
+    """
+    checkpoint = WardenScanDB.get(channel.id)
+    after = disnake.Object(checkpoint.last_message_id) if checkpoint is not None else None
+    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+    result = ScanProgress()
+
+    page: list[disnake.Message] = []
+
+    async def flush() -> None:
+        # after a failed message the checkpoint can't move further in this run
+        hashes, failed = await save_page(channel, page, index, semaphore, advance=result.failed == 0)
+        result.hashes += hashes
+        result.failed += failed
+        result.processed += len(page)
+        result.last_message_id = page[-1].id
+        page.clear()
+        if progress is not None:
+            await progress(result)
+
+    async for message in channel.history(limit=limit, after=after, oldest_first=True):
+        page.append(message)
+        if len(page) >= SCAN_PAGE_SIZE:
+            await flush()
+    if page:
+        await flush()
+    return result
+
+
+async def load_hash_index(index: HashIndex) -> None:
+    """Fill index with all hashes stored in the database"""
+    async for row in ImageDB.stream_hashes():
+        if row.dhash is None:
+            continue
+        index.add(int(row.dhash, 16), IndexedImage(row.attachment_id, row.message_id, row.channel_id))
@@ -0,0 +1,108 @@
+"""
+In-memory Hamming distance index of image hashes for repost detection.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import combinations
+from typing import NamedTuple
+
+
+class IndexedImage(NamedTuple):
+    attachment_id: int
+    message_id: int
+    channel_id: int
+
+
+@lru_cache(maxsize=8)
+def _flip_masks(width: int, radius: int) -> tuple[int, ...]:
+    """All masks of `width` bits with at most `radius` bits set."""
+    masks = []
+    for bits in range(radius + 1):
+        for positions in combinations(range(width), bits):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            masks.append(mask)
+    return tuple(masks)
+
+
+class HashIndex:
+    """Multi-index hashing over dhashes of all stored images.
+
+    Every hash is split into `chunks` substrings and each substring is indexed
+    in its own table. If two hashes differ in at most `r` bits, at least one of
+    the substrings differs in at most `r // chunks` bits (pigeonhole principle),
+    so only the buckets near the query substrings have to be compared
+    instead of every image ever posted.
+    """
+
+    def __init__(self, hash_bits: int = 128, chunks: int = 8):
+        if hash_bits % chunks:
+            raise ValueError("hash_bits must be divisible by chunks")
+        self.chunks = chunks
+        self.chunk_bits = hash_bits // chunks
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+
+        self._hashes: list[int | None] = []
+        self._images: list[IndexedImage | None] = []
+        self._tables: list[dict[int, list[int]]] = [{} for _ in range(chunks)]
+        self._messages: dict[int, list[int]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _split(self, img_hash: int) -> list[int]:
+        return [(img_hash >> (i * self.chunk_bits)) & self.chunk_mask for i in range(self.chunks)]
+
+    def add(self, img_hash: int, image: IndexedImage) -> None:
+        entry_id = len(self._hashes)
+        self._hashes.append(img_hash)
+        self._images.append(image)
+        for table, chunk in zip(self._tables, self._split(img_hash)):
+            table.setdefault(chunk, []).append(entry_id)
+        self._messages.setdefault(image.message_id, []).append(entry_id)
+        self._size += 1
+
+    def remove_message(self, message_id: int) -> int:
+        """Remove all hashes of the message, returns number of removed hashes."""
+        entry_ids = self._messages.pop(message_id, [])
+        for entry_id in entry_ids:
+            for table, chunk in zip(self._tables, self._split(self._hashes[entry_id])):
+                bucket = table[chunk]
+                bucket.remove(entry_id)
+                if not bucket:
+                    del table[chunk]
+            self._hashes[entry_id] = None
+            self._images[entry_id] = None
+        self._size -= len(entry_ids)
+        return len(entry_ids)
+
+    def search(self, img_hash: int, max_distance: int) -> list[tuple[IndexedImage, int]]:
+        """Return all images within `max_distance` bits sorted by the distance."""
+        masks = _flip_masks(self.chunk_bits, max_distance // self.chunks)
+        candidates = set()
+        for table, chunk in zip(self._tables, self._split(img_hash)):
+            for mask in masks:
+                bucket = table.get(chunk ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        results = []
+        for entry_id in candidates:
+            distance = (img_hash ^ self._hashes[entry_id]).bit_count()
+            if distance <= max_distance:
+                results.append((self._images[entry_id], distance))
+        results.sort(key=lambda result: result[1])
+        return results
+
+    def find_nearest(
+        self, img_hash: int, max_distance: int, exclude_message_id: int = None
+    ) -> tuple[IndexedImage, int] | None:
+        """Return the closest image within `max_distance` bits or None."""
+        for image, distance in self.search(img_hash, max_distance):
+            if image.message_id != exclude_message_id:
+                return image, distance
+        return None
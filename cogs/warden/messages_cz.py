@@ -3,6 +3,13 @@ from config.messages import Messages as GlobalMessages
 
 class MessagesCZ(GlobalMessages):
     scan_brief = "Prohledá obrázky v aktuálním kanále a uloží je jako hash pro detekci repostu.\nlimit: [all | <int>]"
+    scan_message_brief = "Znovu zaindexuje obrázky ve zprávě."
+    scan_started = "**SKENOVÁNÍ ZAHÁJENO**"
+    scan_progress = "**SKENOVÁNÍ PROBÍHÁ**\n\nZpracováno **{processed}** zpráv\nSpočítáno **{hashes}** hashů"
+    scan_complete = "**SKENOVÁNÍ DOKONČENO**\n\nZpracováno **{processed}** zpráv.\n" \
+                    "Spočítáno **{hashes}** hashů za {time} s.\n" \
+                    "Chyba u **{failed}** zpráv, další skenování je zpracuje znovu."
+    scan_message_done = "Zpráva {link} zaindexována, spočítáno **{hashes}** hashů."
     repost_title = "Nápověda"
     repost_description = "{user}, shoda **{value}**!"
     repost_content = "_Pokud je obrázek repost, dej mu ♻️.\nJestli není, klikni tady na ❎ "\
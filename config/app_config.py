@@ -54,6 +54,8 @@ class Config:
 
     # Database
     db_string: str = get_attr(toml_dict, "database", "db_string")
+    db_pool_size: int = get_attr(toml_dict, "database", "pool_size")
+    db_pool_max_overflow: int = get_attr(toml_dict, "database", "pool_max_overflow")
 
     # Base bot behavior
     command_prefix: tuple = tuple(get_attr(toml_dict, "base", "command_prefix"))
@@ -78,6 +80,12 @@ class Config:
     db_pull_merlin_key_path: str = get_attr(toml_dict, "verification", "db_pull_merlin_key_path")
     vut_api_key: str = get_attr(toml_dict, "verification", "vut_api_key")
     new_student_year: int = get_attr(toml_dict, "verification", "new_student_year")
+    vut_api_url: str = get_attr(toml_dict, "verification", "vut_api_url")
+    vut_api_rate_limit: int = get_attr(toml_dict, "verification", "vut_api_rate_limit")
+    vut_api_rate_period: int = get_attr(toml_dict, "verification", "vut_api_rate_period")
+    vut_api_concurrency: int = get_attr(toml_dict, "verification", "vut_api_concurrency")
+    vut_api_cache_ttl: int = get_attr(toml_dict, "verification", "vut_api_cache_ttl")
+    vut_api_cache_missing_ttl: int = get_attr(toml_dict, "verification", "vut_api_cache_missing_ttl")
 
     # Verification email sender settings
     email_name: str = get_attr(toml_dict, "email", "name")
@@ -85,6 +93,11 @@ class Config:
     email_smtp_server: str = get_attr(toml_dict, "email", "smtp_server")
     email_smtp_port: int = get_attr(toml_dict, "email", "smtp_port")
     email_pass: str = get_attr(toml_dict, "email", "pass")
+    email_use_ssl: bool = get_attr(toml_dict, "email", "use_ssl")
+    email_timeout: int = get_attr(toml_dict, "email", "timeout")
+    email_max_attempts: int = get_attr(toml_dict, "email", "max_attempts")
+    email_retry_base: int = get_attr(toml_dict, "email", "retry_base")
+    email_retry_max: int = get_attr(toml_dict, "email", "retry_max")
 
     # Extensions loaded on bot start
     extensions: List[str] = get_attr(toml_dict, "cogs", "extensions")
@@ -98,6 +111,7 @@ class Config:
     karma_grillbot_leaderboard_size: int = get_attr(toml_dict, "karma", "grillbot_leaderboard_size")
     karma_vote_minimum: int = get_attr(toml_dict, "karma", "vote_minimum")
     karma_vote_minutes: int = get_attr(toml_dict, "karma", "vote_minutes")
+    karma_flush_interval: float = get_attr(toml_dict, "karma", "flush_interval")
 
     # ContestVote
     contest_vote_channel: int = get_attr(toml_dict, "contestvote", "channel")
@@ -172,6 +186,10 @@ class Config:
     duplicate_limit: int = get_attr(toml_dict, "warden", "duplicate_limit")
     deduplication_channels: List[int] = get_attr(toml_dict, "warden", "deduplication_channels")
     repost_ignore_users: List[int] = get_attr(toml_dict, "warden", "repost_ignore_users")
+    image_workers: int = get_attr(toml_dict, "warden", "image_workers")
+    image_timeout: float = get_attr(toml_dict, "warden", "image_timeout")
+    image_max_bytes: int = get_attr(toml_dict, "warden", "image_max_bytes")
+    image_max_pixels: int = get_attr(toml_dict, "warden", "image_max_pixels")
 
     # week command
     starting_week: int = get_attr(toml_dict, "week", "starting_week")
@@ -224,6 +242,39 @@ class Config:
 
     # message
     message_log_content_preview_limit: int = get_attr(toml_dict, "message", "log_content_preview_limit")
+    message_cache_size: int = get_attr(toml_dict, "message", "cache_size")
+    message_cache_ttl: int = get_attr(toml_dict, "message", "cache_ttl")
+
+    # leaderboard
+    leaderboard_cache_ttl: int = get_attr(toml_dict, "leaderboard", "cache_ttl")
+
+    # error
+    error_image_time_budget: float = get_attr(toml_dict, "error", "image_time_budget")
+    error_window: float = get_attr(toml_dict, "error", "window")
+    error_report_threshold: int = get_attr(toml_dict, "error", "report_threshold")
+
+    # bulk changes of roles and permissions
+    bulk_concurrency: int = get_attr(toml_dict, "bulk", "concurrency")
+    bulk_route_concurrency: int = get_attr(toml_dict, "bulk", "route_concurrency")
+
+    # subscriptions
+    subscriptions_dm_rate_limit: int = get_attr(toml_dict, "subscriptions", "dm_rate_limit")
+    subscriptions_dm_rate_period: int = get_attr(toml_dict, "subscriptions", "dm_rate_period")
+    subscriptions_dm_concurrency: int = get_attr(toml_dict, "subscriptions", "dm_concurrency")
+
+    # gif
+    gif_workers: int = get_attr(toml_dict, "gif", "workers")
+    gif_render_time_budget: float = get_attr(toml_dict, "gif", "render_time_budget")
+    gif_avatar_cache_size: int = get_attr(toml_dict, "gif", "avatar_cache_size")
+    gif_cache_size: int = get_attr(toml_dict, "gif", "cache_size")
+
+    # persistent cooldowns
+    cooldown_flush_interval: float = get_attr(toml_dict, "cooldown", "flush_interval")
+    cooldown_prune_interval: float = get_attr(toml_dict, "cooldown", "prune_interval")
+
+    # command usage telemetry
+    stats_usage_flush_interval: float = get_attr(toml_dict, "stats", "usage_flush_interval")
+    stats_usage_buffer_size: int = get_attr(toml_dict, "stats", "usage_buffer_size")
 
 
 config = Config()
@@ -31,6 +31,12 @@ class Messages(metaclass=Formatable):
     spamming = "{user} Nespamuj tolik <:sadcat:576171980118687754>, příkaz můžeš použít až za {time}."
     member_not_found = "{member} Nikoho takového jsem na serveru nenašel."
     user_not_found = "{user} Nikoho takového jsem nenašel."
+    errors_suppressed_title = "Potlačené opakované chyby za posledních {minutes} min"
+    errors_suppressed_row = "`{command}` **{exception}** – {suppressed}× navíc (celkem {count}×, ID: {error_id})"
+    bulk_job_progress = (
+        "**{job.name}** (#{job.id}) • {processed}/{job.total}\n{progress_bar}\n"
+        "změněno: {done}, beze změny: {skipped}, chyby: {failed}"
+    )
 
     # PERMISSIONS
     missing_perms = "{user}, na použití tohoto příkazu nemáš právo."
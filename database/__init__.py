@@ -1,14 +1,70 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import URL, create_engine, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from config.app_config import config
 
+# async drivers used for the same database as the sync engine
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# INSERT constructs supporting `on_conflict_do_*` (upserts)
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def get_async_url(db_string: str) -> URL:
+    """Convert sync connection string to the async driver of the same backend"""
+    url = make_url(db_string)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
 
 class Database:
     def __init__(self):
         self.base = declarative_base()
         self.db = create_engine(config.db_string, echo=False)
+        self.async_db = create_async_engine(
+            get_async_url(config.db_string),
+            echo=False,
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_pool_max_overflow,
+            pool_pre_ping=True,
+        )
 
 
 database = Database()
 session = sessionmaker(database.db)()
+async_session = async_sessionmaker(database.async_db, expire_on_commit=False)
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Session scoped to one event or command.
+
+    Transaction is committed at the end of the block and rolled back on error,
+    so failed query never affects other handlers.
+
+    Usage:
+        async with session_scope() as db_session:
+            db_session.add(...)
+    """
+    async with async_session.begin() as db_session:
+        yield db_session
+
+
+def upsert(model):
+    """INSERT statement of the async engine dialect with `on_conflict_do_update` support
+
+    Usage:
+        stmt = upsert(KarmaDB).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=[KarmaDB.member_ID], set_={...})
+    """
+    return DIALECT_INSERTS[database.async_db.dialect.name](model)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Iterable
+
+from sqlalchemy import BIGINT, Boolean, Column, DateTime, ForeignKey, Integer, String, update
+from sqlalchemy.orm import Mapped, relationship
+
+from database import database, session
+
+
+class BulkJobStatus(Enum):
+    running = "running"
+    finished = "finished"
+    cancelled = "cancelled"
+
+
+class BulkJobDB(database.base):  # type: ignore
+    """Bulk change of roles or channel permissions, items are kept until the job is finished
+    so the job can be resumed after restart."""
+
+    __tablename__ = "bot_bulk_jobs"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    guild_id = Column(BIGINT, nullable=False)
+    # progress message
+    channel_id = Column(BIGINT, nullable=True)
+    message_id = Column(BIGINT, nullable=True)
+    status = Column(String, default=BulkJobStatus.running.value, nullable=False, index=True)
+    total = Column(Integer, default=0, nullable=False)
+    done = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    items: Mapped[list[BulkJobItemDB]] = relationship(
+        "BulkJobItemDB", back_populates="job", cascade="all, delete-orphan"
+    )
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        guild_id: int,
+        items: Iterable[BulkJobItemDB],
+        channel_id: int = None,
+        message_id: int = None,
+    ) -> BulkJobDB:
+        now = datetime.now()
+        job = cls(
+            name=name,
+            guild_id=guild_id,
+            channel_id=channel_id,
+            message_id=message_id,
+            status=BulkJobStatus.running.value,
+            done=0,
+            skipped=0,
+            failed=0,
+            created_at=now,
+            updated_at=now,
+        )
+        job.items = list(items)
+        job.total = len(job.items)
+        session.add(job)
+        session.commit()
+        return job
+
+    @classmethod
+    def get(cls, id: int) -> BulkJobDB | None:
+        return session.get(cls, id)
+
+    @classmethod
+    def get_unfinished(cls) -> list[BulkJobDB]:
+        return session.query(cls).filter(cls.status == BulkJobStatus.running.value).order_by(cls.id).all()
+
+    @property
+    def processed_count(self) -> int:
+        return self.done + self.skipped + self.failed
+
+    def pending_items(self) -> list[BulkJobItemDB]:
+        return (
+            session.query(BulkJobItemDB)
+            .filter(BulkJobItemDB.job_id == self.id, BulkJobItemDB.processed.is_(False))
+            .order_by(BulkJobItemDB.id)
+            .all()
+        )
+
+    def checkpoint(self, item_ids: list[int], done: int, skipped: int, failed: int) -> None:
+        """Mark items as processed and update counters in one transaction"""
+        if item_ids:
+            session.execute(
+                update(BulkJobItemDB).where(BulkJobItemDB.id.in_(item_ids)).values(processed=True)
+            )
+        self.done += done
+        self.skipped += skipped
+        self.failed += failed
+        self.updated_at = datetime.now()
+        session.commit()
+
+    def finish(self, status: BulkJobStatus = BulkJobStatus.finished) -> None:
+        """Items are not needed anymore, only the counters are kept"""
+        session.query(BulkJobItemDB).filter(BulkJobItemDB.job_id == self.id).delete()
+        self.status = status.value
+        self.updated_at = datetime.now()
+        session.commit()
+
+
+class BulkJobItemDB(database.base):  # type: ignore
+    """One REST call of the bulk job.
+
+    `kind` is `add_role`/`remove_role` (target is member, subject is role)
+    or `set_permissions` (target is channel, subject is role or member of the overwrite).
+    Overwrite with both `allow` and `deny` None is removed.
+    """
+
+    __tablename__ = "bot_bulk_job_items"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("bot_bulk_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    target_id = Column(BIGINT, nullable=False)
+    subject_id = Column(BIGINT, nullable=False)
+    allow = Column(BIGINT, nullable=True)
+    deny = Column(BIGINT, nullable=True)
+    overwrite_type = Column(Integer, nullable=True)
+    processed = Column(Boolean, default=False, nullable=False)
+
+    job: Mapped[BulkJobDB] = relationship("BulkJobDB", back_populates="items")
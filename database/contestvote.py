@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from sqlalchemy import BigInteger, Column, String
+from typing import Iterable
+
+from sqlalchemy import BigInteger, Column, Integer, String, insert
 
 from database import database, session
 
@@ -38,3 +40,91 @@ class ContestVoteDB(database.base):  # type: ignore
         if contribution:
             return contribution.user_id
         return None
+
+
+class ContestVoteTallyDB(database.base):  # type: ignore
+    """Reactions of users on contest messages, kept current from reaction events.
+
+    Primary key starts with message and user, so votes of a user on a message are an index lookup.
+    """
+
+    __tablename__ = "contest_vote_tally"
+
+    message_id = Column(BigInteger, primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    emoji = Column(String, primary_key=True)
+    channel_id = Column(BigInteger, nullable=False, index=True)
+
+    @classmethod
+    def get_user_reactions(cls, message_id: int, user_id: int) -> list[str]:
+        rows = session.query(cls.emoji).filter_by(message_id=message_id, user_id=user_id).all()
+        return [row[0] for row in rows]
+
+    @classmethod
+    def add(cls, channel_id: int, message_id: int, user_id: int, emoji: str) -> None:
+        if session.get(cls, (message_id, user_id, emoji)) is None:
+            session.add(cls(channel_id=channel_id, message_id=message_id, user_id=user_id, emoji=emoji))
+            session.commit()
+
+    @classmethod
+    def remove(cls, message_id: int, user_id: int, emoji: str) -> None:
+        session.query(cls).filter_by(message_id=message_id, user_id=user_id, emoji=emoji).delete()
+        session.commit()
+
+    @classmethod
+    def clear_message(cls, message_ids: Iterable[int], emoji: str | None = None) -> None:
+        query = session.query(cls).filter(cls.message_id.in_(list(message_ids)))
+        if emoji is not None:
+            query = query.filter(cls.emoji == emoji)
+        query.delete()
+        session.commit()
+
+    @classmethod
+    def clear_channel(cls, channel_id: int) -> None:
+        session.query(cls).filter_by(channel_id=channel_id).delete()
+        session.commit()
+
+    @classmethod
+    def replace_message(cls, channel_id: int, message_id: int, reactions: dict[str, Iterable[int]]) -> None:
+        """Replace all reactions of the message, changes are committed by the caller"""
+        session.query(cls).filter_by(message_id=message_id).delete()
+        rows = [
+            {"channel_id": channel_id, "message_id": message_id, "user_id": user_id, "emoji": emoji}
+            for emoji, users in reactions.items()
+            for user_id in users
+        ]
+        if rows:
+            session.execute(insert(cls), rows)
+
+    @classmethod
+    def get_reactions(cls, channel_id: int, message_id: int | None = None) -> list[tuple[int, int, str]]:
+        """(message_id, user_id, emoji) of the channel or one message"""
+        query = session.query(cls.message_id, cls.user_id, cls.emoji).filter(cls.channel_id == channel_id)
+        if message_id is not None:
+            query = query.filter(cls.message_id == message_id)
+        return [tuple(row) for row in query.all()]
+
+
+class ContestVoteRebuildDB(database.base):  # type: ignore
+    """Checkpoint of the tally rebuild from channel history"""
+
+    __tablename__ = "contest_vote_rebuild"
+
+    channel_id = Column(BigInteger, primary_key=True)
+    last_message_id = Column(BigInteger, nullable=False)
+    processed = Column(Integer, default=0, nullable=False)
+
+    @classmethod
+    def get(cls, channel_id: int) -> ContestVoteRebuildDB | None:
+        return session.get(cls, channel_id)
+
+    @classmethod
+    def save(cls, channel_id: int, last_message_id: int, processed: int) -> None:
+        """Commit processed messages together with the checkpoint"""
+        session.merge(cls(channel_id=channel_id, last_message_id=last_message_id, processed=processed))
+        session.commit()
+
+    @classmethod
+    def finish(cls, channel_id: int) -> None:
+        session.query(cls).filter_by(channel_id=channel_id).delete()
+        session.commit()
@@ -1,6 +1,14 @@
-from sqlalchemy import BigInteger, Column, String
+from __future__ import annotations
 
-from database import database
+import asyncio
+import time
+
+from sqlalchemy import BigInteger, Column, String, delete, select
+
+from database import database, session_scope, upsert
+
+# rows in one upsert, keeps the statement under the bind parameter limits
+FLUSH_CHUNK_SIZE = 1000
 
 
 class CooldownDB(database.base):  # type: ignore
@@ -9,3 +17,97 @@ class CooldownDB(database.base):  # type: ignore
     command_name = Column(String, primary_key=True, nullable=False)
     user_id = Column(String, primary_key=True, nullable=False)
     timestamp = Column(BigInteger, nullable=False)
+
+
+class CooldownStore:
+    """Cooldown windows of `PersistentCooldown` kept in memory.
+
+    Start times of the windows are loaded from the DB on start, so checks are only dict lookups.
+    New windows are written by `flush` with one batched upsert and expired windows are removed
+    from memory and the DB by `prune`. Both are called periodically by the System cog.
+    """
+
+    def __init__(self):
+        # start of the window in ms by (command name, user id)
+        self.windows: dict[tuple[str, str], int] = {}
+        # length of the window in ms by command name
+        self.limits: dict[str, float] = {}
+        self.loaded = False
+        self._pending: dict[tuple[str, str], int] = {}
+        self._load_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+
+    def register(self, command_name: str, limit: float) -> None:
+        self.limits[command_name] = limit
+
+    async def load(self) -> None:
+        async with self._load_lock:
+            if self.loaded:
+                return
+            query = select(CooldownDB.command_name, CooldownDB.user_id, CooldownDB.timestamp)
+            async with session_scope() as db_session:
+                rows = (await db_session.execute(query)).all()
+            for command_name, user_id, timestamp in rows:
+                # windows started while loading are newer
+                self.windows.setdefault((command_name, user_id), timestamp)
+            self.loaded = True
+
+    def start(self, command_name: str, user_id: int | str, now: int) -> float | None:
+        """Start a new window unless the user is on cooldown.
+        Returns remaining ms of the running window, None if a new window was started."""
+        key = (command_name, str(user_id))
+        started = self.windows.get(key)
+        limit = self.limits[command_name]
+        if started is not None and (time_passed := now - started) < limit:
+            return limit - time_passed
+        self.windows[key] = now
+        self._pending[key] = now
+        return None
+
+    async def flush(self) -> int:
+        """Write new windows to the DB, returns number of written windows"""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            rows = [
+                {"command_name": command_name, "user_id": user_id, "timestamp": timestamp}
+                for (command_name, user_id), timestamp in pending.items()
+            ]
+            try:
+                async with session_scope() as db_session:
+                    for start in range(0, len(rows), FLUSH_CHUNK_SIZE):
+                        stmt = upsert(CooldownDB).values(rows[start : start + FLUSH_CHUNK_SIZE])
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=[CooldownDB.command_name, CooldownDB.user_id],
+                            set_={"timestamp": stmt.excluded.timestamp},
+                        )
+                        await db_session.execute(stmt)
+            except Exception:
+                # keep windows for the next flush unless newer ones were started
+                for key, timestamp in pending.items():
+                    self._pending.setdefault(key, timestamp)
+                raise
+            return len(rows)
+
+    async def prune(self) -> int:
+        """Remove expired windows of registered commands, returns number of windows removed from memory"""
+        now = int(time.time() * 1000)
+        expired = [
+            key
+            for key, started in self.windows.items()
+            if key[0] in self.limits and now - started >= self.limits[key[0]] and key not in self._pending
+        ]
+        for key in expired:
+            del self.windows[key]
+        async with session_scope() as db_session:
+            for command_name, limit in self.limits.items():
+                await db_session.execute(
+                    delete(CooldownDB).where(
+                        CooldownDB.command_name == command_name, CooldownDB.timestamp < now - limit
+                    )
+                )
+        return len(expired)
+
+
+cooldown_store = CooldownStore()
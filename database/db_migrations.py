@@ -1,36 +1,103 @@
 import logging
 
+from sqlalchemy import inspect
+
 from database import database, session
 from database.better_meme import BetterMemeDB  # noqa: F401
-from database.contestvote import ContestVoteDB  # noqa: F401
+from database.bulk_job import BulkJobDB, BulkJobItemDB  # noqa: F401
+from database.contestvote import ContestVoteDB, ContestVoteRebuildDB, ContestVoteTallyDB  # noqa: F401
 from database.cooldown import CooldownDB  # noqa: F401
 from database.error import ErrorLogDB  # noqa: F401
-from database.exams import ExamsTermsMessageDB  # noqa: F401
+from database.exams import ExamsTermsMessageDB, ExamsTermsSnapshotDB  # noqa: F401
 from database.hugs import HugsTableDB  # noqa: F401
-from database.image import ImageDB  # noqa: F401
+from database.image import ImageDB, WardenScanDB  # noqa: F401
 from database.karma import KarmaDB, KarmaEmojiDB  # noqa: F401
+from database.mail import MailOutboxDB  # noqa: F401
 from database.meme_repost import MemeRepostDB  # noqa: F401
+from database.migrations import Migration, Operations, SchemaVersionDB, load_migrations
 from database.moderation import ModerationDB  # noqa: F401
 from database.pin_map import PinMapDB  # noqa: F401
 from database.report import AnswerDB, ReportDB, UserDB  # noqa: F401
 from database.review import ReviewDB, ReviewRelevanceDB, SubjectDB, SubjectDetailsDB  # noqa: F401
+from database.stats import ErrorCount, ErrorEvent, Event, UsageEvent  # noqa: F401
 from database.streamlinks import StreamLinkDB  # noqa: F401
 from database.subscription import AlreadyNotifiedDB, SubscriptionDB  # noqa: F401
 from database.timeout import TimeoutDB, TimeoutUserDB  # noqa: F401
 from database.verification import PermitDB, ValidPersonDB  # noqa: F401
 from database.vote import VoteDB  # noqa: F401
+from database.vutapi import VutApiCacheDB, VutApiJobDB  # noqa: F401
 
 rubbergod_logger = logging.getLogger("rubbergod")
 
 
 def init_db(commit: bool = True):
     # database.base.metadata.drop_all(database.db)
+    existing_tables = set(inspect(database.db).get_table_names()) - {SchemaVersionDB.__tablename__}
     rubbergod_logger.info("Creating missing tables")
     database.base.metadata.create_all(database.db)
     rubbergod_logger.info("Tables created")
 
+    if existing_tables:
+        upgrade()
+    else:
+        # new database was created from the current models
+        stamp()
+
     # Initialize default values
     ErrorLogDB.init()
 
     if commit:
         session.commit()
+
+
+def pending_migrations() -> list[Migration]:
+    applied = SchemaVersionDB.get_versions()
+    # CREATE INDEX CONCURRENTLY waits for all open transactions, including this session
+    session.commit()
+    return [migration for migration in load_migrations() if migration.version not in applied]
+
+
+def stamp() -> None:
+    """Mark all migrations as applied"""
+    for migration in pending_migrations():
+        SchemaVersionDB.add(migration.version, migration.name)
+
+
+def upgrade() -> list[Migration]:
+    """Apply pending migrations in order, returns applied migrations"""
+    pending = pending_migrations()
+    for migration in pending:
+        rubbergod_logger.info(f"Applying migration {migration.version} ({migration.name})")
+        with database.db.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            migration.upgrade(Operations(connection))
+        SchemaVersionDB.add(migration.version, migration.name)
+    return pending
+
+
+def check_db() -> list[str]:
+    """Differences between the declared models and the live database"""
+    inspector = inspect(database.db)
+    live_tables = set(inspector.get_table_names())
+    problems = []
+    for table in database.base.metadata.sorted_tables:
+        if table.name not in live_tables:
+            problems.append(f"missing table {table.name}")
+            continue
+
+        live_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in live_columns:
+                problems.append(f"missing column {table.name}.{column.name}")
+        for column in live_columns - {column.name for column in table.columns}:
+            problems.append(f"undeclared column {table.name}.{column}")
+
+        live_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in live_indexes:
+                columns = ", ".join(column.name for column in index.columns)
+                problems.append(f"missing index {index.name} on {table.name} ({columns})")
+
+    if SchemaVersionDB.__tablename__ in live_tables:
+        for migration in pending_migrations():
+            problems.append(f"pending migration {migration.version} ({migration.name})")
+    return problems
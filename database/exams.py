@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import json
+from datetime import datetime
 from typing import List
 
-from sqlalchemy import Column, String
+from sqlalchemy import Column, DateTime, String, Text
 
 from database import database, session
 
@@ -39,3 +41,35 @@ class ExamsTermsMessageDB(database.base):  # type: ignore
             session.commit()
 
         return message_ids
+
+
+class ExamsTermsSnapshotDB(database.base):  # type: ignore
+    """Last parsed exams page with validators for conditional requests"""
+
+    __tablename__ = "exams_terms_snapshot"
+
+    url = Column(String, primary_key=True)
+    terms = Column(Text, nullable=False)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
+
+    @classmethod
+    def get(cls, url: str) -> ExamsTermsSnapshotDB | None:
+        return session.get(cls, url)
+
+    @classmethod
+    def save(cls, url: str, terms: list[dict], etag: str | None, last_modified: str | None) -> None:
+        snapshot = cls(
+            url=url,
+            terms=json.dumps(terms, ensure_ascii=False),
+            etag=etag,
+            last_modified=last_modified,
+            updated_at=datetime.now(),
+        )
+        session.merge(snapshot)
+        session.commit()
+
+    @property
+    def data(self) -> list[dict]:
+        return json.loads(self.terms)
@@ -8,6 +8,7 @@ from sqlalchemy import BIGINT, Column, Integer
 from sqlalchemy.orm import Query
 
 from database import database, session
+from database.rank import LeaderboardRanks
 
 Member = Union[disnake.Member, disnake.User]
 UserHugStats = namedtuple("UserHugStats", ("given", "received"))
@@ -32,24 +33,24 @@ class HugsTableDB(database.base):  # type: ignore
         return UserHugStats(hugs.given, hugs.received) if hugs else UserHugStats(0, 0)
 
     def get_member_position(self, member_stats: UserHugStats) -> Tuple[int, int]:
+        if not hug_ranks.loaded:
+            hug_ranks.load(session.query(HugsTableDB.member_id, HugsTableDB.given, HugsTableDB.received))
+
         if member_stats.given > 0:
-            give_position = (
-                1 + session.query(HugsTableDB).filter(HugsTableDB.given > member_stats.given).count()
-            )
+            give_position = hug_ranks.position("given", member_stats.given)
         else:
             # zero means you are last
-            give_position = self._get_count(order_by=HugsTableDB.given)
+            give_position = len(hug_ranks)
 
         if member_stats.received > 0:
-            recv_position = (
-                1 + session.query(HugsTableDB).filter(HugsTableDB.received > member_stats.received).count()
-            )
+            recv_position = hug_ranks.position("received", member_stats.received)
         else:
-            recv_position = self._get_count(order_by=HugsTableDB.received)
+            recv_position = len(hug_ranks)
 
         return give_position, recv_position
 
     def do_hug(self, giver_id: int = None, receiver_id: int = None) -> None:
+        updated = []
         if giver_id:
             giver = self._get_member(giver_id)
             if not giver:
@@ -57,6 +58,7 @@ class HugsTableDB(database.base):  # type: ignore
 
             giver.given += 1
             session.add(giver)
+            updated.append(giver)
 
         if receiver_id:
             receiver = self._get_member(receiver_id)
@@ -65,18 +67,17 @@ class HugsTableDB(database.base):  # type: ignore
 
             receiver.received += 1
             session.add(receiver)
+            updated.append(receiver)
 
         if giver_id is not None or receiver_id is not None:
             session.commit()
+            for member in updated:
+                hug_ranks.update(member.member_id, given=member.given, received=member.received)
 
     @classmethod
     def _get_member(cls, member_id: int) -> Optional[HugsTableDB]:
         return session.query(cls).filter(cls.member_id == int(member_id)).one_or_none()
 
-    @classmethod
-    def _get_count(cls, order_by: Column = None) -> int:
-        return session.query(cls).order_by(order_by).count()
-
     @classmethod
     def get_top_all_query(cls) -> Query:
         return session.query(cls).order_by(cls.given.desc(), cls.received.desc())
@@ -88,3 +89,7 @@ class HugsTableDB(database.base):  # type: ignore
     @classmethod
     def get_top_receivers_query(cls) -> Query:
         return session.query(cls).order_by(cls.received.desc())
+
+
+# positions in the hug leaderboards
+hug_ranks = LeaderboardRanks(("given", "received"))
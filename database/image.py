@@ -2,40 +2,62 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import AsyncIterator
 
-from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy import BigInteger, Column, DateTime, Integer, Row, String, insert, select
 from sqlalchemy.orm import Query
 
-from database import database, session
+from database import database, session, session_scope
 
 
 class ImageDB(database.base):  # type: ignore
     __tablename__ = "images"
 
     attachment_id = Column(BigInteger, primary_key=True)
-    message_id = Column(BigInteger)
+    message_id = Column(BigInteger, index=True)
     channel_id = Column(BigInteger)
     timestamp = Column(DateTime)
     dhash = Column(String)
 
     @classmethod
-    def add_image(cls, channel_id: int, message_id: int, attachment_id: int, dhash: str) -> None:
-        """Add new image hash"""
+    def add_image(cls, channel_id: int, message_id: int, attachment_id: int, dhash: str) -> ImageDB | None:
+        """Add new image hash, returns None if the message is already indexed"""
 
         if cls.getByMessage(message_id) is not None:
             # message already indexed
-            return
-
-        session.add(
-            cls(
-                channel_id=channel_id,
-                message_id=message_id,
-                attachment_id=attachment_id,
-                dhash=dhash,
-                timestamp=datetime.now().replace(microsecond=0),
-            )
+            return None
+
+        image = cls(
+            channel_id=channel_id,
+            message_id=message_id,
+            attachment_id=attachment_id,
+            dhash=dhash,
+            timestamp=datetime.now().replace(microsecond=0),
         )
+        session.add(image)
         session.commit()
+        return image
+
+    @classmethod
+    def get_indexed_messages(cls, message_ids: list[int]) -> set[int]:
+        rows = session.query(cls.message_id).filter(cls.message_id.in_(message_ids)).all()
+        return {row[0] for row in rows}
+
+    @classmethod
+    def add_images(cls, images: list[dict]) -> list[dict]:
+        """Insert image hashes with one statement, the same rules as `add_image` apply
+        (first image of a message only). Returns inserted rows, changes are committed by the caller."""
+        indexed = cls.get_indexed_messages([image["message_id"] for image in images])
+        timestamp = datetime.now().replace(microsecond=0)
+        rows = []
+        for image in images:
+            if image["message_id"] in indexed:
+                continue
+            indexed.add(image["message_id"])
+            rows.append({**image, "timestamp": timestamp})
+        if rows:
+            session.execute(insert(cls), rows)
+        return rows
 
     @classmethod
     def getHash(cls, dhash: str) -> list[ImageDB]:
@@ -49,6 +71,15 @@ class ImageDB(database.base):  # type: ignore
     def getAll(cls) -> list[ImageDB]:
         return session.query(cls)
 
+    @classmethod
+    async def stream_hashes(cls) -> AsyncIterator[Row]:
+        """Stream (attachment_id, message_id, channel_id, dhash) of all images"""
+        query = select(cls.attachment_id, cls.message_id, cls.channel_id, cls.dhash)
+        async with session_scope() as db_session:
+            result = await db_session.stream(query.execution_options(yield_per=1000))
+            async for row in result:
+                yield row
+
     @classmethod
     def getLast(cls, num: int) -> Query:
         return session.query(cls)[:num]
@@ -58,3 +89,35 @@ class ImageDB(database.base):  # type: ignore
         i = session.query(cls).filter(cls.message_id == message_id).delete()
         session.commit()
         return i
+
+
+class WardenScanDB(database.base):  # type: ignore
+    """Progress of the history scan of a channel, messages up to `last_message_id` are scanned"""
+
+    __tablename__ = "warden_scan"
+
+    channel_id = Column(BigInteger, primary_key=True)
+    last_message_id = Column(BigInteger, nullable=False)
+    processed = Column(Integer, default=0, nullable=False)
+    hashes = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    @classmethod
+    def get(cls, channel_id: int) -> WardenScanDB | None:
+        return session.get(cls, channel_id)
+
+    @classmethod
+    def checkpoint(cls, channel_id: int, last_message_id: int | None, processed: int, hashes: int) -> None:
+        """Save progress and commit it together with the images of the scanned messages.
+        `last_message_id` None keeps the previous position."""
+        scan = cls.get(channel_id)
+        if scan is None and last_message_id is not None:
+            scan = cls(channel_id=channel_id, processed=0, hashes=0)
+            session.add(scan)
+        if scan is not None:
+            if last_message_id is not None:
+                scan.last_message_id = last_message_id
+            scan.processed = (scan.processed or 0) + processed
+            scan.hashes = (scan.hashes or 0) + hashes
+            scan.updated_at = datetime.now()
+        session.commit()
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import asyncio
+from typing import ClassVar, Optional
 
-from sqlalchemy import Column, Integer, String, func
+from sqlalchemy import Column, Insert, Integer, Row, String, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Query
 from sqlalchemy.sql.operators import ColumnOperators
 
 import utils
-from database import database, session
+from database import database, session, session_scope, upsert
+from database.rank import LeaderboardRanks
 
 
 class KarmaRowData:
@@ -23,6 +26,18 @@ class KarmaData:
         self.negative: KarmaRowData = negative
 
 
+def giver_column(emoji_value: int, remove: bool) -> tuple[str, int]:
+    """Returns column of the giver that changes and by how much"""
+    if emoji_value > 0:
+        column = "negative" if remove else "positive"
+    else:
+        column = "positive" if remove else "negative"
+
+    if column == "negative":
+        emoji_value *= -1
+    return column, emoji_value
+
+
 class KarmaDB(database.base):  # type: ignore
     __tablename__ = "bot_karma"
 
@@ -32,120 +47,132 @@ class KarmaDB(database.base):  # type: ignore
     negative = Column(Integer, default=0)
 
     @classmethod
-    def get_karma_object(cls, member_id: str) -> Optional[KarmaDB]:
-        return session.query(cls).filter(cls.member_ID == str(member_id)).one_or_none()
+    async def get_karma_object(cls, db_session: AsyncSession, member_id: str) -> Optional[KarmaDB]:
+        return await db_session.get(cls, str(member_id))
 
     @classmethod
-    def update_karma(
-        cls, member_id: str, giver_id: str, emoji_value: int, remove: bool = False
-    ) -> List[KarmaDB]:
-        member_getter = cls.update_karma_get(member_id, emoji_value)
-        member_giver = cls.update_karma_give(giver_id, emoji_value, remove)
-
-        session.commit()
-        return [member_getter, member_giver]
+    def add_karma_statement(cls, rows: list[dict]) -> Insert:
+        """Upsert adding the deltas to the stored values in the DB,
+        so concurrent writers of the same member don't lose increments"""
+        stmt = upsert(cls).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[cls.member_ID],
+            set_={
+                "karma": cls.karma + stmt.excluded.karma,
+                "positive": cls.positive + stmt.excluded.positive,
+                "negative": cls.negative + stmt.excluded.negative,
+            },
+        ).returning(cls.member_ID, cls.karma, cls.positive, cls.negative)
 
     @classmethod
-    def update_karma_get(cls, member_id: str, emoji_value: int) -> KarmaDB:
-        member_karma = cls.get_karma_object(member_id)
-        if member_karma is not None:
-            member_karma.karma += emoji_value
-        else:
-            member_karma = cls(member_ID=str(member_id), karma=emoji_value)
-            session.add(member_karma)
-        return member_karma
+    async def add_karma(
+        cls, db_session: AsyncSession, member_id: str, karma: int = 0, positive: int = 0, negative: int = 0
+    ) -> Row:
+        row = {"member_ID": str(member_id), "karma": karma, "positive": positive, "negative": negative}
+        return (await db_session.execute(cls.add_karma_statement([row]))).one()
 
     @classmethod
-    def update_karma_give(cls, giver_id: str, emoji_value: int, remove: bool) -> KarmaDB:
-        if emoji_value > 0:
-            column = "negative" if remove else "positive"
-        else:
-            column = "positive" if remove else "negative"
+    async def update_karma(
+        cls, member_id: str, giver_id: str, emoji_value: int, remove: bool = False
+    ) -> list[Row]:
+        async with session_scope() as db_session:
+            member_getter = await cls.update_karma_get(db_session, member_id, emoji_value)
+            member_giver = await cls.update_karma_give(db_session, giver_id, emoji_value, remove)
+        cls.update_ranks(member_getter, member_giver)
+        return [member_getter, member_giver]
 
-        if column == "negative":
-            emoji_value *= -1
+    @classmethod
+    async def update_karma_get(cls, db_session: AsyncSession, member_id: str, emoji_value: int) -> Row:
+        return await cls.add_karma(db_session, member_id, karma=emoji_value)
 
-        giver_karma = cls.get_karma_object(giver_id)
-        if giver_karma is not None:
-            setattr(giver_karma, column, getattr(giver_karma, column) + emoji_value)
-        else:
-            # new giver
-            giver_karma = cls(member_ID=str(giver_id))
-            setattr(giver_karma, column, emoji_value)
-            session.add(giver_karma)
-        return giver_karma
+    @classmethod
+    async def update_karma_give(
+        cls, db_session: AsyncSession, giver_id: str, emoji_value: int, remove: bool
+    ) -> Row:
+        column, emoji_value = giver_column(emoji_value, remove)
+        return await cls.add_karma(db_session, giver_id, **{column: emoji_value})
 
     @classmethod
-    def karma_emoji(cls, member_id: str, giver_id: str, emoji_id: str) -> list[KarmaDB] | None:
+    def karma_emoji(cls, member_id: str, giver_id: str, emoji_id: str) -> None:
+        """Karma for the reaction is written to the DB later by `karma_ledger.flush`"""
         emoji_value = KarmaEmojiDB.emoji_value(str(emoji_id))
         if emoji_value:
-            members_update = cls.update_karma(member_id, giver_id, emoji_value)
-            return members_update
-        return None
+            karma_ledger.record(member_id, giver_id, emoji_value)
 
     @classmethod
-    def karma_emoji_remove(cls, member_id: str, giver_id: str, emoji_id: str) -> list[KarmaDB] | None:
+    def karma_emoji_remove(cls, member_id: str, giver_id: str, emoji_id: str) -> None:
+        """Karma for the reaction is written to the DB later by `karma_ledger.flush`"""
         emoji_value = KarmaEmojiDB.emoji_value(str(emoji_id))
         if emoji_value:
-            members_update = cls.update_karma(member_id, giver_id, emoji_value * (-1), True)
-            return members_update
-        return None
+            karma_ledger.record(member_id, giver_id, emoji_value * (-1), True)
 
     @classmethod
-    def get_karma_position(cls, column: str, karma: int) -> int:
-        value = session.query(func.count(cls.member_ID)).filter(getattr(cls, column) > karma).one()
-        return value[0] + 1
+    async def load_ranks(cls) -> list:
+        async with session_scope() as db_session:
+            result = await db_session.execute(select(cls.member_ID, cls.karma, cls.positive, cls.negative))
+            return result.all()
 
     @classmethod
-    def get_karma(cls, member_id: str) -> KarmaData:
-        karma_object = cls.get_karma_object(member_id)
-
-        if karma_object is None:
-            karma_object = cls(karma=0, positive=0, negative=0)
-
-        order = cls.get_karma_position("karma", karma_object.karma)
-        pos_order = cls.get_karma_position("positive", karma_object.positive)
-        neg_order = cls.get_karma_position("negative", karma_object.negative)
+    def update_ranks(cls, *rows: KarmaDB | Row) -> None:
+        """Propagate committed values to the rank index"""
+        for row in rows:
+            karma_ranks.update(row.member_ID, karma=row.karma, positive=row.positive, negative=row.negative)
 
-        karma = KarmaRowData(karma_object.karma, order)
-        positive = KarmaRowData(karma_object.positive, pos_order)
-        negative = KarmaRowData(karma_object.negative, neg_order)
+    @classmethod
+    async def get_karma(cls, member_id: str) -> KarmaData:
+        await karma_ranks.ensure_loaded(cls.load_ranks)
+        # no flush runs meanwhile, so every pending delta is either in the DB or in the ledger
+        async with karma_ledger.lock, session_scope() as db_session:
+            karma_object = await cls.get_karma_object(db_session, member_id)
+
+            if karma_object is None:
+                karma_object = cls(karma=0, positive=0, negative=0)
+
+            # include reactions that are not flushed yet
+            delta = karma_ledger.pending(member_id)
+            karma_value = karma_object.karma + delta[0]
+            positive_value = karma_object.positive + delta[1]
+            negative_value = karma_object.negative + delta[2]
+
+            # ranks hold the committed value of the member, which differs by the pending delta
+            member_id = str(member_id)
+            order = karma_ranks.position("karma", karma_value, member_id)
+            pos_order = karma_ranks.position("positive", positive_value, member_id)
+            neg_order = karma_ranks.position("negative", negative_value, member_id)
+
+        karma = KarmaRowData(karma_value, order)
+        positive = KarmaRowData(positive_value, pos_order)
+        negative = KarmaRowData(negative_value, neg_order)
 
         result = KarmaData(karma, positive, negative)
         return result
 
     @classmethod
-    def leaderboard_query(cls, attribute: ColumnOperators) -> Query:
-        return session.query(cls).order_by(attribute)
+    def leaderboard_query(cls, *attributes: ColumnOperators) -> Query:
+        # karma is written through the async engine, refresh already loaded rows
+        return session.query(cls).order_by(*attributes).populate_existing()
 
     @classmethod
-    def transfer_karma(cls, from_user: str, to_user: str) -> KarmaData | None:
-        from_user_karma = cls.get_karma_object(from_user)
-        to_user_karma = cls.get_karma_object(to_user)
-
-        # transferring from user that is not in the database
-        if from_user_karma is None:
-            return None
-
-        # transferring to user that is not in the database
-        if to_user_karma is None:
-            to_user_karma = cls(member_ID=to_user)
-            session.add(to_user_karma)
-
-        log_karma = KarmaData(from_user_karma.karma, from_user_karma.positive, from_user_karma.negative)
-
-        # Move karma
-        cls.update_karma_get(to_user, from_user_karma.karma)
-        cls.update_karma_get(from_user, -from_user_karma.karma)
-
-        # Move positive and negative reactions
-        to_user_karma.positive += from_user_karma.positive
-        to_user_karma.negative += from_user_karma.negative
-
-        from_user_karma.positive = 0
-        from_user_karma.negative = 0
-
-        session.commit()
+    async def transfer_karma(cls, from_user: str, to_user: str) -> KarmaData | None:
+        # move also karma from pending reactions
+        await karma_ledger.flush()
+        async with session_scope() as db_session:
+            # lock the row, so karma given meanwhile waits for the transfer
+            query = select(cls.karma, cls.positive, cls.negative).where(cls.member_ID == str(from_user))
+            from_user_karma = (await db_session.execute(query.with_for_update())).one_or_none()
+
+            # transferring from user that is not in the database
+            if from_user_karma is None:
+                return None
+
+            karma, positive, negative = from_user_karma
+            log_karma = KarmaData(karma, positive, negative)
+
+            # move karma and reactions, user that is not in the database is created
+            to_user_karma = await cls.add_karma(db_session, to_user, karma, positive, negative)
+            from_user_karma = await cls.add_karma(db_session, from_user, -karma, -positive, -negative)
+
+        cls.update_ranks(from_user_karma, to_user_karma)
         return log_karma
 
 
@@ -154,6 +181,24 @@ class KarmaEmojiDB(database.base):  # type: ignore
     emoji_ID = Column(String, primary_key=True)
     value = Column(Integer, default=0)
 
+    # emoji id -> value, values change only by votes so the whole table is kept in memory
+    _cache: ClassVar[dict[str, int] | None] = None
+    # lookups of emojis with a value (hits) and without one (misses)
+    cache_hits: ClassVar[int] = 0
+    cache_misses: ClassVar[int] = 0
+
+    @classmethod
+    def get_cache(cls) -> dict[str, int]:
+        """Returns cached emoji values, loads them from the DB if the cache is empty."""
+        if cls._cache is None:
+            cls._cache = {emoji.emoji_ID: emoji.value for emoji in session.query(cls).all()}
+        return cls._cache
+
+    @classmethod
+    def cache_info(cls) -> dict[str, int]:
+        size = len(cls._cache) if cls._cache is not None else 0
+        return {"hits": cls.cache_hits, "misses": cls.cache_misses, "size": size}
+
     @classmethod
     def get_ids_of_emojis_valued(cls, val: int) -> list[str]:
         """Returns a list of emoji ids with specified value"""
@@ -176,16 +221,84 @@ class KarmaEmojiDB(database.base):  # type: ignore
     def emoji_value_raw(cls, emoji_id: str) -> Optional[int]:
         """Returns the value of an emoji.
         If the emoji has not been voted for, returns None."""
-        emoji = session.query(cls).filter(cls.emoji_ID == utils.general.str_emoji_id(emoji_id)).one_or_none()
-        return emoji.value if emoji else None
+        value = cls.get_cache().get(utils.general.str_emoji_id(emoji_id))
+        if value is None:
+            cls.cache_misses += 1
+        else:
+            cls.cache_hits += 1
+        return value
 
     @classmethod
     def set_emoji_value(cls, emoji_id: str, value: int) -> None:
         emoji = cls(emoji_ID=utils.general.str_emoji_id(emoji_id), value=str(value))
         session.merge(emoji)
         session.commit()
+        if cls._cache is not None:
+            cls._cache[emoji.emoji_ID] = int(value)
 
     @classmethod
     def remove_emoji(cls, emoji_id: str) -> None:
-        session.query(cls).filter(cls.emoji_ID == utils.general.str_emoji_id(emoji_id)).delete()
+        emoji_id = utils.general.str_emoji_id(emoji_id)
+        session.query(cls).filter(cls.emoji_ID == emoji_id).delete()
         session.commit()
+        if cls._cache is not None:
+            cls._cache.pop(emoji_id, None)
+
+
+class KarmaLedger:
+    """Write-behind buffer of karma changes from reactions.
+
+    Deltas of (karma, positive, negative) are accumulated per member in memory,
+    so add/remove pairs cancel out, and written to the DB with one batched upsert
+    by `flush`, which is called periodically by the Karma cog and on shutdown.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, list[int]] = {}
+        # held by `flush` until the deltas are committed and removed from the ledger
+        self.lock = asyncio.Lock()
+
+    def _add(self, member_id: str, karma: int = 0, positive: int = 0, negative: int = 0) -> None:
+        delta = self._pending.setdefault(str(member_id), [0, 0, 0])
+        delta[0] += karma
+        delta[1] += positive
+        delta[2] += negative
+
+    def record(self, member_id: str, giver_id: str, emoji_value: int, remove: bool = False) -> None:
+        self._add(member_id, karma=emoji_value)
+        column, value = giver_column(emoji_value, remove)
+        self._add(giver_id, **{column: value})
+
+    def pending(self, member_id: str) -> tuple[int, int, int]:
+        """Sum of deltas that are not written to the DB yet,
+        together with the DB values it has to be read while holding `lock`"""
+        return tuple(self._pending.get(str(member_id), (0, 0, 0)))
+
+    async def flush(self) -> int:
+        """Write pending deltas to the DB, returns number of updated members"""
+        async with self.lock:
+            flushing, self._pending = self._pending, {}
+            rows = [
+                {"member_ID": member_id, "karma": delta[0], "positive": delta[1], "negative": delta[2]}
+                for member_id, delta in flushing.items()
+                if any(delta)  # add and remove of the same reaction
+            ]
+            updated = []
+            try:
+                if rows:
+                    async with session_scope() as db_session:
+                        for chunk in utils.general.split_to_parts(rows, 1000):
+                            stmt = KarmaDB.add_karma_statement(chunk)
+                            updated += (await db_session.execute(stmt)).all()
+            except Exception:
+                # keep deltas for the next flush
+                for member_id, delta in flushing.items():
+                    self._add(member_id, *delta)
+                raise
+            KarmaDB.update_ranks(*updated)
+            return len(rows)
+
+
+karma_ledger = KarmaLedger()
+# positions in the karma leaderboards
+karma_ranks = LeaderboardRanks(("karma", "positive", "negative"))
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from enum import Enum
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from database import database, session
+
+
+class MailStatus(Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+
+class MailOutboxDB(database.base):  # type: ignore
+    """Outgoing mails waiting for delivery by the mail worker.
+
+    Only one pending mail of each `kind` is kept per recipient,
+    newer mail replaces the content of the waiting one.
+    """
+
+    __tablename__ = "bot_mail_outbox"
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String, default=MailStatus.pending.value, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    @classmethod
+    def enqueue(cls, recipient: str, subject: str, body: str, kind: str) -> MailOutboxDB:
+        now = datetime.now()
+        mail = (
+            session.query(cls)
+            .filter_by(recipient=recipient, kind=kind, status=MailStatus.pending.value)
+            .one_or_none()
+        )
+        if mail is None:
+            mail = cls(recipient=recipient, kind=kind, attempts=0, status=MailStatus.pending.value)
+            session.add(mail)
+        mail.subject = subject
+        mail.body = body
+        mail.created_at = now
+        mail.next_attempt_at = now
+        session.commit()
+        return mail
+
+    @classmethod
+    def get_due(cls, limit: int) -> list[MailOutboxDB]:
+        return (
+            session.query(cls)
+            .filter(cls.status == MailStatus.pending.value, cls.next_attempt_at <= datetime.now())
+            .order_by(cls.next_attempt_at)
+            .limit(limit)
+            .all()
+        )
+
+    @classmethod
+    def next_attempt(cls) -> datetime | None:
+        """Time of the earliest pending delivery"""
+        mail = (
+            session.query(cls)
+            .filter(cls.status == MailStatus.pending.value)
+            .order_by(cls.next_attempt_at)
+            .first()
+        )
+        return mail.next_attempt_at if mail else None
+
+    def mark_sent(self) -> None:
+        self.status = MailStatus.sent.value
+        self.attempts += 1
+        self.sent_at = datetime.now()
+        self.last_error = None
+        session.commit()
+
+    def mark_failed(self, error: str, retry_in: timedelta | None) -> None:
+        """Schedule next attempt or give up if `retry_in` is None"""
+        self.attempts += 1
+        self.last_error = error[:500]
+        if retry_in is None:
+            self.status = MailStatus.failed.value
+        else:
+            self.next_attempt_at = datetime.now() + retry_in
+        session.commit()
+
+    @classmethod
+    def prune(cls, older_than: timedelta) -> int:
+        """Remove delivered mails, they contain verification codes"""
+        count = (
+            session.query(cls)
+            .filter(cls.status == MailStatus.sent.value, cls.sent_at < datetime.now() - older_than)
+            .delete()
+        )
+        session.commit()
+        return count
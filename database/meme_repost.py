@@ -10,8 +10,8 @@ class MemeRepostDB(database.base):  # type: ignore
 
     original_message_id = Column(String, primary_key=True, nullable=False, unique=True)
     author_id = Column(String, nullable=False)
-    reposted_message_id = Column(String, nullable=False)
-    secondary_repost_message_id = Column(String, nullable=True)
+    reposted_message_id = Column(String, nullable=False, index=True)
+    secondary_repost_message_id = Column(String, nullable=True, index=True)
 
     @classmethod
     def find_repost_by_original_message_id(cls, message_id: str) -> MemeRepostDB | None:
@@ -0,0 +1,129 @@
+"""
+Versioned schema migrations.
+
+`create_all` only creates missing tables, changes of existing tables (indexes, columns)
+ship as numbered scripts in this package. Every script is a module `v<version>_<name>.py`
+with function `upgrade(op: Operations)`.
+
+Statements run in autocommit mode, so indexes can be built concurrently on PostgreSQL.
+Scripts have to be idempotent, a script interrupted halfway is run again on the next start.
+"""
+
+from __future__ import annotations
+
+import importlib
+import pkgutil
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Column, Connection, DateTime, Integer, String, inspect, text
+
+from database import database, session
+
+MIGRATION_MODULE = re.compile(r"v(\d+)_(\w+)")
+
+
+class SchemaVersionDB(database.base):  # type: ignore
+    """Applied migrations, version of the schema is the highest one"""
+
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False)
+
+    @classmethod
+    def get_versions(cls) -> set[int]:
+        return {row[0] for row in session.query(cls.version).all()}
+
+    @classmethod
+    def add(cls, version: int, name: str) -> None:
+        session.merge(cls(version=version, name=name, applied_at=datetime.now()))
+        session.commit()
+
+
+class Operations:
+    """Schema changes available to migration scripts"""
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.quote = connection.dialect.identifier_preparer.quote
+
+    def execute(self, statement: str, **params) -> None:
+        self.connection.execute(text(statement), params)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in {column["name"] for column in inspect(self.connection).get_columns(table)}
+
+    def _invalid_index(self, name: str) -> bool:
+        """Failed concurrent build leaves an invalid index behind, `IF NOT EXISTS` would keep it"""
+        if self.dialect != "postgresql":
+            return False
+        query = text(
+            "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name"
+        )
+        return bool(self.connection.execute(query, {"name": name}).scalar())
+
+    def create_index(self, model: type, *columns: str) -> None:
+        """Build the index declared by the model on the columns.
+        PostgreSQL builds it concurrently, so writes to the table aren't blocked."""
+        table = model.__table__
+        index = next(
+            (index for index in table.indexes if [column.name for column in index.columns] == list(columns)),
+            None,
+        )
+        if index is None:
+            raise ValueError(f"{table.name} doesn't declare index on {columns}")
+
+        concurrently = "CONCURRENTLY " if self.dialect == "postgresql" else ""
+        if self._invalid_index(index.name):
+            self.execute(f"DROP INDEX {concurrently}{self.quote(index.name)}")
+        unique = "UNIQUE " if index.unique else ""
+        column_list = ", ".join(self.quote(column) for column in columns)
+        self.execute(
+            f"CREATE {unique}INDEX {concurrently}IF NOT EXISTS {self.quote(index.name)} "
+            f"ON {self.quote(table.name)} ({column_list})"
+        )
+
+    def drop_index(self, name: str) -> None:
+        concurrently = "CONCURRENTLY " if self.dialect == "postgresql" else ""
+        self.execute(f"DROP INDEX {concurrently}IF EXISTS {self.quote(name)}")
+
+    def add_column(self, model: type, column: str) -> None:
+        """Add the column declared by the model, server default is used for existing rows"""
+        table = model.__table__
+        if self.has_column(table.name, column):
+            return
+        declared = table.c[column]
+        definition = f"{self.quote(column)} {declared.type.compile(self.connection.dialect)}"
+        if declared.server_default is not None:
+            definition += f" DEFAULT {declared.server_default.arg}"
+        if not declared.nullable and declared.server_default is not None:
+            definition += " NOT NULL"
+        self.execute(f"ALTER TABLE {self.quote(table.name)} ADD COLUMN {definition}")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Operations], None]
+
+
+def load_migrations() -> list[Migration]:
+    """All migration scripts ordered by version"""
+    migrations: dict[int, Migration] = {}
+    for module in pkgutil.iter_modules(__path__):
+        match = MIGRATION_MODULE.fullmatch(module.name)
+        if match is None:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {module.name}")
+        script = importlib.import_module(f"{__name__}.{module.name}")
+        migrations[version] = Migration(version, match.group(2), script.upgrade)
+    return [migrations[version] for version in sorted(migrations)]
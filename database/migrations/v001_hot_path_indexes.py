@@ -0,0 +1,17 @@
+"""
+Indexes of columns looked up on every message, reaction or command.
+"""
+
+from database.image import ImageDB
+from database.meme_repost import MemeRepostDB
+from database.migrations import Operations
+from database.timeout import TimeoutDB
+from database.verification import PermitDB
+
+
+def upgrade(op: Operations) -> None:
+    op.create_index(PermitDB, "discord_ID")
+    op.create_index(ImageDB, "message_id")
+    op.create_index(MemeRepostDB, "reposted_message_id")
+    op.create_index(MemeRepostDB, "secondary_repost_message_id")
+    op.create_index(TimeoutDB, "user_id")
@@ -0,0 +1,108 @@
+"""
+In-memory rank index of leaderboard columns, so position of the member
+doesn't need COUNT over the whole table.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Sequence
+
+
+class RankIndex:
+    """Order statistics of one integer column.
+
+    Counts of the values are stored in sparse Fenwick tree over the whole range
+    of 32-bit integers, so update and "how many values are greater" take
+    O(log range) regardless of the number of rows.
+    """
+
+    def __init__(self, bits: int = 32):
+        self.offset = 1 << (bits - 1)
+        self.size = 1 << bits
+        self._tree: dict[int, int] = {}
+        self._values: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _update(self, value: int, count: int) -> None:
+        i = value + self.offset + 1
+        while i <= self.size:
+            self._tree[i] = self._tree.get(i, 0) + count
+            i += i & -i
+
+    def _count_le(self, value: int) -> int:
+        """Number of values lower or equal to `value`"""
+        i = min(max(value + self.offset + 1, 0), self.size)
+        count = 0
+        while i > 0:
+            count += self._tree.get(i, 0)
+            i -= i & -i
+        return count
+
+    def set(self, key: Hashable, value: int) -> None:
+        old = self._values.get(key)
+        if old == value:
+            return
+        if old is not None:
+            self._update(old, -1)
+        self._update(value, 1)
+        self._values[key] = value
+
+    def count_greater(self, value: int, exclude: Hashable = None) -> int:
+        """Number of values greater than `value`, value of the key `exclude` is not counted"""
+        count = len(self._values) - self._count_le(value)
+        excluded = self._values.get(exclude) if exclude is not None else None
+        if excluded is not None and excluded > value:
+            count -= 1
+        return count
+
+    def clear(self) -> None:
+        self._tree.clear()
+        self._values.clear()
+
+
+class LeaderboardRanks:
+    """Rank indexes of all leaderboard columns of one table.
+
+    Index is loaded from the DB on the first use and then kept current by the write path,
+    which calls `update` with the new values after the transaction is committed.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = tuple(columns)
+        self.indexes = {column: RankIndex() for column in columns}
+        self.loaded = False
+        # changed by every write, loading is repeated if the table changed meanwhile
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self.indexes[self.columns[0]])
+
+    def load(self, rows: Iterable[Sequence]) -> None:
+        """Fill the index from rows of (key, *columns)"""
+        for index in self.indexes.values():
+            index.clear()
+        for key, *values in rows:
+            for column, value in zip(self.columns, values):
+                self.indexes[column].set(key, value or 0)
+        self.loaded = True
+
+    async def ensure_loaded(self, loader: Callable[[], Awaitable[Iterable[Sequence]]]) -> None:
+        while not self.loaded:
+            version = self._version
+            rows = await loader()
+            if version == self._version:
+                self.load(rows)
+
+    def update(self, key: Hashable, **values: int) -> None:
+        self._version += 1
+        if not self.loaded:
+            return
+        for column, value in values.items():
+            self.indexes[column].set(key, value)
+
+    def position(self, column: str, value: int, key: Hashable = None) -> int:
+        """Position of the value in the leaderboard ordered by the column descending.
+        Indexed value of the `key` is left out, so a member isn't ranked behind their own older value."""
+        return self.indexes[column].count_greater(value, exclude=key) + 1
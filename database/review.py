@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import datetime
-import math
 from typing import List, Optional
 
 from sqlalchemy import (
@@ -12,11 +11,9 @@ from sqlalchemy import (
     Integer,
     PrimaryKeyConstraint,
     String,
-    asc,
     desc,
     func,
 )
-from sqlalchemy.engine import Row
 from sqlalchemy.orm import Query, relationship
 
 from database import database, session
@@ -177,28 +174,11 @@ class SubjectDetailsDB(database.base):  # type: ignore
         )
 
     @classmethod
-    def get_tierboard(cls, type: str, sem: str, degree: str, year: str, offset: int = 0) -> List[Row]:
+    def get_tierboard_query(cls, type: str, sem: str, degree: str, year: str) -> Query:
+        """Rows of (shortcut, avg_tier) of reviewed subjects"""
         subquery = cls.gen_tierboard_subquery(type, sem, degree, year)
-        return (
-            session.query(subquery.c.shortcut, subquery.c.avg_tier)
-            .filter(subquery.c.avg_tier != None)  # noqa: E711
-            .order_by(asc("avg_tier"))
-            .offset(offset)
-            .limit(10)
-            .all()
-        )
-
-    @classmethod
-    def get_tierboard_page_count(cls, type: str, sem: str, degree: str, year: str) -> int:
-        subquery = cls.gen_tierboard_subquery(type, sem, degree, year)
-        return math.ceil(
-            (
-                session.query(subquery.c.shortcut, subquery.c.avg_tier)
-                .filter(subquery.c.avg_tier != None)  # noqa: E711
-                .order_by(asc("avg_tier"))
-                .count()
-            )
-            / 10
+        return session.query(subquery.c.shortcut, subquery.c.avg_tier).filter(
+            subquery.c.avg_tier != None  # noqa: E711
         )
 
 
@@ -1,10 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import math
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import groupby
 from typing import Optional
 
-from sqlalchemy import Column, DateTime, ForeignKeyConstraint, Integer, PrimaryKeyConstraint, String, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKeyConstraint,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    func,
+    insert,
+    select,
+)
 
-from database import database, session
+import utils
+from config.app_config import config
+from database import database, session, session_scope, upsert
 
 
 class Event(database.base):  # type: ignore
@@ -79,6 +98,169 @@ class ErrorEvent(database.base):  # type: ignore
         return session.query(cls).filter(cls.id == id).one_or_none()
 
 
-# TODO: add new table that will log command usage
-# class UsageEvent(database.base):
-#     __tablename__ = 'stats_usage_event'
+class ErrorCount(database.base):  # type: ignore
+    """Number of errors of one group in a window, traceback is in the ErrorEvent `error_id`"""
+
+    __tablename__ = "stats_error_count"
+
+    window_start = Column(DateTime, primary_key=True)
+    cog = Column(String, primary_key=True)
+    command = Column(String, primary_key=True)
+    exception = Column(String, primary_key=True)
+    fingerprint = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+    error_id = Column(Integer)  # last logged error of the group
+
+    @classmethod
+    async def add_counts(cls, rows: list[dict]) -> None:
+        async with session_scope() as db_session:
+            for chunk in utils.general.split_to_parts(rows, 1000):
+                stmt = upsert(cls).values(chunk)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[cls.window_start, cls.cog, cls.command, cls.exception, cls.fingerprint],
+                    set_={
+                        "count": cls.count + stmt.excluded.count,
+                        "error_id": func.coalesce(stmt.excluded.error_id, cls.error_id),
+                    },
+                )
+                await db_session.execute(stmt)
+
+
+class UsageEvent(database.base):  # type: ignore
+    """One invocation of a slash, user, message or prefix command"""
+
+    __tablename__ = "stats_usage_event"
+
+    id = Column(Integer, primary_key=True)
+    datetime = Column(DateTime, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # slash, user, message or prefix
+    command = Column(String, nullable=False)  # qualified name
+    cog = Column(String)
+    guild_id = Column(String)
+    duration = Column(Float, nullable=False)  # seconds
+    outcome = Column(String, nullable=False)  # ok, check, cooldown, user_input or error
+
+    @classmethod
+    async def rollup(cls, since: datetime) -> list[UsageRollup]:
+        """Number of invocations, failures and p50/p95 duration per command and day"""
+        day = func.date(cls.datetime)
+        async with session_scope() as db_session:
+            if database.async_db.dialect.name == "postgresql":
+                count = func.count()
+                query = (
+                    select(
+                        day,
+                        cls.kind,
+                        cls.command,
+                        count,
+                        func.count().filter(cls.outcome != "ok"),
+                        func.percentile_cont(0.5).within_group(cls.duration),
+                        func.percentile_cont(0.95).within_group(cls.duration),
+                    )
+                    .where(cls.datetime >= since)
+                    .group_by(day, cls.kind, cls.command)
+                    .order_by(day.desc(), count.desc())
+                )
+                rows = (await db_session.execute(query)).all()
+                return [UsageRollup(*row) for row in rows]
+
+            # other databases don't have percentile functions, durations are aggregated here
+            query = (
+                select(day, cls.kind, cls.command, cls.outcome, cls.duration)
+                .where(cls.datetime >= since)
+                .order_by(day, cls.kind, cls.command, cls.duration)
+            )
+            rows = (await db_session.execute(query)).all()
+
+        rollups = []
+        for (day_value, kind, command), group in groupby(rows, key=lambda row: row[:3]):
+            group = list(group)
+            durations = [row.duration for row in group]
+            rollups.append(
+                UsageRollup(
+                    day=date.fromisoformat(day_value) if isinstance(day_value, str) else day_value,
+                    kind=kind,
+                    command=command,
+                    count=len(group),
+                    failed=sum(row.outcome != "ok" for row in group),
+                    p50=percentile(durations, 0.5),
+                    p95=percentile(durations, 0.95),
+                )
+            )
+        rollups.sort(key=lambda rollup: (rollup.day, rollup.count), reverse=True)
+        return rollups
+
+
+@dataclass
+class UsageRollup:
+    day: date
+    kind: str
+    command: str
+    count: int
+    failed: int
+    p50: float
+    p95: float
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Percentile of sorted values with linear interpolation, same as `percentile_cont`"""
+    position = fraction * (len(values) - 1)
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class UsageLog:
+    """Write-behind buffer of command usage.
+
+    Recording an invocation only appends to memory, events are written by `flush`
+    with batched inserts, which is called periodically by the System cog and on shutdown.
+    When the DB is unavailable, only the newest `usage_buffer_size` events are kept.
+    """
+
+    def __init__(self):
+        self._pending: list[dict] = []
+        self._lock = asyncio.Lock()
+        self.dropped = 0
+
+    def _trim(self) -> None:
+        overflow = len(self._pending) - config.stats_usage_buffer_size
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+    def record(
+        self, kind: str, command: str, cog: str | None, guild_id: int | None, duration: float, outcome: str
+    ) -> None:
+        self._pending.append(
+            {
+                "datetime": datetime.now(),
+                "kind": kind,
+                "command": command,
+                "cog": cog,
+                "guild_id": str(guild_id) if guild_id is not None else None,
+                "duration": duration,
+                "outcome": outcome,
+            }
+        )
+        self._trim()
+
+    async def flush(self) -> int:
+        """Write pending events to the DB, returns number of written events"""
+        async with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                async with session_scope() as db_session:
+                    for chunk in utils.general.split_to_parts(rows, 1000):
+                        await db_session.execute(insert(UsageEvent), chunk)
+            except Exception:
+                # keep events for the next flush
+                self._pending[:0] = rows
+                self._trim()
+                raise
+            return len(rows)
+
+
+usage_log = UsageLog()
@@ -68,3 +68,8 @@ class StreamLinkDB(database.base):  # type: ignore
     @classmethod
     def get_subjects_with_stream(cls) -> List[tuple[str]]:
         return session.query(StreamLinkDB.subject).distinct().all()
+
+    @classmethod
+    def get_all_subjects(cls) -> List[str]:
+        """Subject of every streamlink, including duplicates"""
+        return list(session.scalars(session.query(StreamLinkDB.subject)))
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, insert
 
 from database import database, session
 
@@ -47,6 +47,17 @@ class SubscriptionDB(database.base):  # type: ignore
     def get_channel(cls, forum_id: str) -> List[SubscriptionDB]:
         return session.query(cls).filter(cls.forum_id == forum_id).all()
 
+    @classmethod
+    def get_subscribers(cls, forum_id: str, tags: Iterable[str]) -> List[str]:
+        """IDs of users subscribed to any of the tags in the forum"""
+        users = (
+            session.query(cls.user_id)
+            .filter((cls.forum_id == forum_id) & (cls.tag.in_(list(tags))))
+            .distinct()
+            .all()
+        )
+        return [user[0] for user in users]
+
     def remove(self) -> None:
         session.delete(self)
         session.commit()
@@ -70,3 +81,11 @@ class AlreadyNotifiedDB(database.base):  # type: ignore
         new = cls(user_id=user_id, thread_id=thread_id)
         session.add(new)
         session.commit()
+
+    @classmethod
+    def add_many(cls, user_ids: Iterable[str], thread_id: str) -> None:
+        rows = [{"user_id": user_id, "thread_id": thread_id} for user_id in user_ids]
+        if not rows:
+            return
+        session.execute(insert(cls), rows)
+        session.commit()
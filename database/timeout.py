@@ -21,7 +21,7 @@ class TimeoutDB(database.base):  # type: ignore
     guild_id = Column(String)
     isself = Column(Boolean, default=False)
     user: Mapped[TimeoutUserDB] = relationship(back_populates="timeouts")
-    user_id: Mapped[String] = mapped_column(ForeignKey("timeout_user.id"))
+    user_id: Mapped[String] = mapped_column(ForeignKey("timeout_user.id"), index=True)
 
     @hybrid_property
     def is_active(self) -> bool:
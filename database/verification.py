@@ -22,7 +22,7 @@ class PermitDB(database.base):  # type: ignore
     __tablename__ = "bot_permit"
 
     login = Column(String, primary_key=True)
-    discord_ID = Column(String)
+    discord_ID = Column(String, index=True)
 
     @classmethod
     def get_user_by_id(cls, discord_ID: str) -> Optional[PermitDB]:
@@ -53,6 +53,18 @@ class PermitDB(database.base):  # type: ignore
         users = session.query(PermitDB.login).all()
         return users
 
+    @classmethod
+    def get_all_with_person(cls) -> list[tuple[str, str, str | None, str | None, int | None]]:
+        """Returns (login, discord_ID, person login, year, status) of all permits,
+        person login is None if the login is not in valid persons"""
+        return (
+            session.query(
+                cls.login, cls.discord_ID, ValidPersonDB.login, ValidPersonDB.year, ValidPersonDB.status
+            )
+            .outerjoin(ValidPersonDB, ValidPersonDB.login == cls.login)
+            .all()
+        )
+
     @classmethod
     def delete_user_by_login(cls, login: str) -> None:
         user = cls.get_user_by_login(login)
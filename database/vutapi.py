@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+
+from database import database, session
+
+
+class VutApiCacheDB(database.base):  # type: ignore
+    """Responses of the VUT API person endpoint, `response` is None for unknown logins."""
+
+    __tablename__ = "bot_vutapi_cache"
+
+    login = Column(String, primary_key=True)
+    response = Column(Text, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    @classmethod
+    def get(cls, login: str) -> VutApiCacheDB | None:
+        """Returns cached response if it is not expired"""
+        entry = session.get(cls, login)
+        if entry is None or entry.expires_at < datetime.now():
+            return None
+        return entry
+
+    @classmethod
+    def set(cls, login: str, response: dict | None, ttl: timedelta) -> None:
+        entry = cls(
+            login=login,
+            response=json.dumps(response, ensure_ascii=False) if response is not None else None,
+            expires_at=datetime.now() + ttl,
+        )
+        session.merge(entry)
+        session.commit()
+
+    @classmethod
+    def invalidate(cls, login: str) -> None:
+        session.query(cls).filter(cls.login == login).delete()
+        session.commit()
+
+    @property
+    def data(self) -> dict | None:
+        return json.loads(self.response) if self.response is not None else None
+
+
+class VutApiJobDB(database.base):  # type: ignore
+    """Progress of bulk refresh of persons, persons are processed ordered by login."""
+
+    __tablename__ = "bot_vutapi_jobs"
+
+    name = Column(String, primary_key=True)
+    last_login = Column(String, nullable=True)
+    processed = Column(Integer, default=0, nullable=False)
+    exstudents = Column(Integer, default=0, nullable=False)
+    finished = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    @classmethod
+    def get(cls, name: str) -> VutApiJobDB | None:
+        return session.get(cls, name)
+
+    @classmethod
+    def start(cls, name: str, last_login: str | None = None) -> VutApiJobDB:
+        """Start the job again, processing starts after `last_login`"""
+        job = cls(
+            name=name,
+            last_login=last_login,
+            processed=0,
+            exstudents=0,
+            finished=False,
+            updated_at=datetime.now(),
+        )
+        job = session.merge(job)
+        session.commit()
+        return job
+
+    def checkpoint(self, last_login: str, processed: int, exstudents: int) -> None:
+        self.last_login = last_login
+        self.processed += processed
+        self.exstudents += exstudents
+        self.updated_at = datetime.now()
+        session.commit()
+
+    def finish(self) -> None:
+        self.finished = True
+        self.updated_at = datetime.now()
+        session.commit()
@@ -0,0 +1,251 @@
+"""
+In-memory indexes for slash command autocompletes, so typing never queries the DB.
+
+Every data source has its own index, sources backed by a table are loaded once
+and then kept current by ORM changes of the watched columns. Changes are collected
+when the session flushes and applied to the index only after the transaction is committed,
+bulk statements (`query().update()`, `insert()` etc.) don't say what changed and load the source again.
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections import defaultdict
+from typing import Callable, Iterable
+
+import disnake
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from database.review import ProgrammeDB, SubjectDB
+from database.streamlinks import StreamLinkDB
+from database.verification import PermitDB, ValidPersonDB
+
+# maximum number of choices Discord shows
+MAX_CHOICES = 25
+# `session.info` key of the changes waiting for commit
+CHANGES_KEY = "autocomplete_changes"
+
+
+def ngrams(key: str, size: int) -> set[str]:
+    return {key[i : i + size] for i in range(len(key) - size + 1)}
+
+
+class AutocompleteIndex:
+    """Case insensitive prefix and substring search over a set of strings.
+
+    Keys are kept sorted for the prefix search, substrings are found through
+    1-, 2- and 3-gram posting sets. Every string is counted, so the same value
+    coming from more rows is removed with the last of them.
+    """
+
+    def __init__(self, items: Iterable[str] = ()):
+        self.rebuild(items)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, item: str) -> bool:
+        return item.casefold() in self._values
+
+    def rebuild(self, items: Iterable[str]) -> None:
+        self._counts: dict[str, int] = defaultdict(int)
+        self._values: dict[str, str] = {}
+        self._grams: dict[str, set[str]] = defaultdict(set)
+        for item in items:
+            if item is None:
+                continue
+            key = item.casefold()
+            self._counts[key] += 1
+            self._values[key] = item
+        for key in self._values:
+            self._add_grams(key)
+        self._keys = sorted(self._values)
+
+    def _add_grams(self, key: str) -> None:
+        for size in (1, 2, 3):
+            for gram in ngrams(key, size):
+                self._grams[gram].add(key)
+
+    def add(self, item: str | None) -> None:
+        if item is None:
+            return
+        key = item.casefold()
+        self._counts[key] += 1
+        if key in self._values:
+            return
+        self._values[key] = item
+        self._add_grams(key)
+        bisect.insort(self._keys, key)
+
+    def remove(self, item: str | None) -> None:
+        if item is None:
+            return
+        key = item.casefold()
+        if key not in self._values:
+            return
+        self._counts[key] -= 1
+        if self._counts[key] > 0:
+            return
+        del self._counts[key]
+        del self._values[key]
+        for size in (1, 2, 3):
+            for gram in ngrams(key, size):
+                self._grams[gram].discard(key)
+                if not self._grams[gram]:
+                    del self._grams[gram]
+        self._keys.pop(bisect.bisect_left(self._keys, key))
+
+    def _prefixed(self, query: str, limit: int) -> list[str]:
+        start = bisect.bisect_left(self._keys, query)
+        result = []
+        for key in self._keys[start : start + limit]:
+            if not key.startswith(query):
+                break
+            result.append(key)
+        return result
+
+    def _containing(self, query: str) -> set[str]:
+        if len(query) <= 3:
+            return self._grams.get(query, set())
+        postings = sorted((self._grams.get(gram, set()) for gram in ngrams(query, 3)), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+        return {key for key in candidates if query in key}
+
+    def search(self, query: str, limit: int = MAX_CHOICES, prefix_only: bool = False) -> list[str]:
+        """Exact match first, then prefix matches and then other matches by position of the query"""
+        query = query.casefold().strip()
+        if not query:
+            return [self._values[key] for key in self._keys[:limit]]
+
+        keys = self._prefixed(query, limit)
+        if not prefix_only and len(keys) < limit:
+            prefixed = set(keys)
+            rest = (key for key in self._containing(query) if key not in prefixed)
+            keys += sorted(rest, key=lambda key: (key.find(query), key))[: limit - len(keys)]
+        return [self._values[key] for key in keys]
+
+
+class AutocompleteSource:
+    """Index of one data source, loaded by `loader` on the first search"""
+
+    def __init__(self, loader: Callable[[], Iterable[str]]):
+        self.loader = loader
+        self.index = AutocompleteIndex()
+        self.loaded = False
+
+    def refresh(self) -> None:
+        self.index.rebuild(self.loader())
+        self.loaded = True
+
+    def invalidate(self) -> None:
+        """Load the source again on the next search"""
+        self.loaded = False
+
+    def search(self, query: str, limit: int = MAX_CHOICES, prefix_only: bool = False) -> list[str]:
+        if not self.loaded:
+            self.refresh()
+        return self.index.search(query, limit, prefix_only)
+
+    def watch(self, model: type, column: str) -> AutocompleteSource:
+        """Keep the index current with committed inserts, updates and deletes of the column"""
+        watched.append((model, column, self))
+        return self
+
+    def apply(self, action: str, value: str | None) -> None:
+        if action == "invalidate":
+            self.invalidate()
+        elif self.loaded:
+            getattr(self.index, action)(value)
+
+
+# (model, column, source) of all watched columns
+watched: list[tuple[type, str, AutocompleteSource]] = []
+
+
+def pending_changes(session: Session) -> list[tuple[AutocompleteSource, str, str | None]]:
+    return session.info.setdefault(CHANGES_KEY, [])
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changes(session: Session, flush_context) -> None:
+    """Flushed changes of the watched columns, history of the objects is still the pre-flush one"""
+    changes = pending_changes(session)
+    for model, column, source in watched:
+        for target in session.new:
+            if isinstance(target, model):
+                changes += [(source, "add", value) for value in inspect(target).attrs[column].history.added]
+        for target in session.dirty:
+            if isinstance(target, model):
+                history = inspect(target).attrs[column].history
+                changes += [(source, "remove", value) for value in history.deleted]
+                changes += [(source, "add", value) for value in history.added]
+        for target in session.deleted:
+            if not isinstance(target, model):
+                continue
+            history = inspect(target).attrs[column].history
+            values = [value for value in (*history.unchanged, *history.deleted) if value is not NO_VALUE]
+            if values:
+                changes += [(source, "remove", value) for value in values]
+            else:
+                # column was not loaded, the removed value is unknown
+                changes.append((source, "invalidate", None))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_bulk_changes(state: ORMExecuteState) -> None:
+    """Bulk statements bypass the flush, sources of the table are loaded again after commit"""
+    if not (state.is_insert or state.is_update or state.is_delete) or state.bind_mapper is None:
+        return
+    for model, column, source in watched:
+        if issubclass(state.bind_mapper.class_, model):
+            pending_changes(state.session).append((source, "invalidate", None))
+
+
+@event.listens_for(Session, "after_commit")
+def apply_changes(session: Session) -> None:
+    for source, action, value in session.info.pop(CHANGES_KEY, []):
+        source.apply(action, value)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changes(session: Session) -> None:
+    session.info.pop(CHANGES_KEY, None)
+
+
+class GuildAutocompleteSource:
+    """Sources built from guild cache (e.g. roles), one index per guild.
+
+    There are no DB events for the guild cache, owner invalidates the guild from listeners.
+    """
+
+    def __init__(self, loader: Callable[[disnake.Guild], Iterable[str]]):
+        self.loader = loader
+        self.sources: dict[int, AutocompleteSource] = {}
+
+    def get(self, guild: disnake.Guild) -> AutocompleteSource:
+        if guild.id not in self.sources:
+            self.sources[guild.id] = AutocompleteSource(lambda: self.loader(guild))
+        return self.sources[guild.id]
+
+    def invalidate(self, guild_id: int) -> None:
+        if guild_id in self.sources:
+            self.sources[guild_id].invalidate()
+
+
+def load_logins() -> list[str]:
+    # counted from both tables, same as the watchers below
+    return [row[0] for row in PermitDB.get_all_logins() + ValidPersonDB.get_all_logins()]
+
+
+login_autocomplete = AutocompleteSource(load_logins).watch(PermitDB, "login").watch(ValidPersonDB, "login")
+subject_autocomplete = AutocompleteSource(lambda: [row[0] for row in SubjectDB.get_all()]).watch(
+    SubjectDB, "shortcut"
+)
+programme_autocomplete = AutocompleteSource(lambda: [row[0] for row in ProgrammeDB.get_all()]).watch(
+    ProgrammeDB, "shortcut"
+)
+streamlink_subject_autocomplete = AutocompleteSource(StreamLinkDB.get_all_subjects).watch(
+    StreamLinkDB, "subject"
+)
@@ -0,0 +1,316 @@
+"""
+Bulk changes of member roles and channel permissions.
+
+Callers describe the desired state as a list of mutations, the executor skips mutations
+which are already applied according to the guild cache and runs the rest concurrently.
+Progress is saved in the DB so an interrupted job can be resumed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterable
+
+import disnake
+
+import utils
+from config.app_config import config
+from config.messages import Messages
+from database.bulk_job import BulkJobDB, BulkJobItemDB, BulkJobStatus
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+ADD_ROLE = "add_role"
+REMOVE_ROLE = "remove_role"
+SET_PERMISSIONS = "set_permissions"
+
+# seconds between saving progress to the DB
+CHECKPOINT_INTERVAL = 2
+
+
+@dataclass(frozen=True)
+class Mutation:
+    kind: str
+    target_id: int
+    subject_id: int
+    allow: int | None = None
+    deny: int | None = None
+    overwrite_type: int | None = None
+
+    @classmethod
+    def add_role(cls, member: disnake.abc.Snowflake, role: disnake.abc.Snowflake) -> Mutation:
+        return cls(ADD_ROLE, member.id, role.id)
+
+    @classmethod
+    def remove_role(cls, member: disnake.abc.Snowflake, role: disnake.abc.Snowflake) -> Mutation:
+        return cls(REMOVE_ROLE, member.id, role.id)
+
+    @classmethod
+    def set_permissions(
+        cls,
+        channel: disnake.abc.GuildChannel,
+        target: disnake.Role | disnake.Member | disnake.User,
+        overwrite: disnake.PermissionOverwrite | None = None,
+        **permissions: bool | None,
+    ) -> Mutation:
+        """Same semantics as `GuildChannel.set_permissions`, overwrite None removes it"""
+        if permissions:
+            overwrite = disnake.PermissionOverwrite(**permissions)
+        overwrite_type = 0 if isinstance(target, disnake.Role) else 1
+        if overwrite is None:
+            return cls(SET_PERMISSIONS, channel.id, target.id, overwrite_type=overwrite_type)
+        allow, deny = overwrite.pair()
+        return cls(SET_PERMISSIONS, channel.id, target.id, allow.value, deny.value, overwrite_type)
+
+    @classmethod
+    def from_db(cls, item: BulkJobItemDB) -> Mutation:
+        return cls(item.kind, item.target_id, item.subject_id, item.allow, item.deny, item.overwrite_type)
+
+    def to_db(self) -> BulkJobItemDB:
+        return BulkJobItemDB(
+            kind=self.kind,
+            target_id=self.target_id,
+            subject_id=self.subject_id,
+            allow=self.allow,
+            deny=self.deny,
+            overwrite_type=self.overwrite_type,
+            processed=False,
+        )
+
+    @property
+    def key(self) -> tuple:
+        """Mutations with the same key change the same thing"""
+        kind = SET_PERMISSIONS if self.kind == SET_PERMISSIONS else "role"
+        return (kind, self.target_id, self.subject_id)
+
+    def route(self, guild_id: int) -> Hashable:
+        """Discord rate limit bucket of the request, roles share one bucket per guild"""
+        if self.kind == SET_PERMISSIONS:
+            return (SET_PERMISSIONS, self.target_id)
+        return ("member_roles", guild_id)
+
+
+class BulkMutationExecutor:
+    """Runs mutations with at most `concurrency` requests in flight
+    and `route_concurrency` requests per rate limit bucket.
+
+    Waiting for the bucket reset is left to the disnake HTTP client,
+    the executor only keeps enough requests queued in every bucket.
+    """
+
+    def __init__(
+        self,
+        guild: disnake.Guild,
+        http: disnake.http.HTTPClient = None,
+        concurrency: int = None,
+        route_concurrency: int = None,
+    ):
+        self.guild = guild
+        self.http = http or guild._state.http
+        self.concurrency = concurrency or config.bulk_concurrency
+        self.route_concurrency = route_concurrency or config.bulk_route_concurrency
+
+    def is_noop(self, mutation: Mutation) -> bool:
+        """True if the guild cache already matches the mutation.
+
+        Unknown members, roles and channels (e.g. just created ones) are never no-op,
+        the request decides whether they exist.
+        """
+        if mutation.kind in (ADD_ROLE, REMOVE_ROLE):
+            member = self.guild.get_member(mutation.target_id)
+            # `get_role` of the member returns None for roles which are not cached yet
+            if member is None or self.guild.get_role(mutation.subject_id) is None:
+                return False
+            has_role = member.get_role(mutation.subject_id) is not None
+            return has_role == (mutation.kind == ADD_ROLE)
+
+        channel = self.guild.get_channel(mutation.target_id)
+        if channel is None:
+            return False
+        current = channel.overwrites_for(disnake.Object(mutation.subject_id))
+        if mutation.allow is None:
+            return current.is_empty()
+        allow, deny = current.pair()
+        return (allow.value, deny.value) == (mutation.allow, mutation.deny)
+
+    async def apply(self, mutation: Mutation, reason: str = None) -> None:
+        if mutation.kind == ADD_ROLE:
+            await self.http.add_role(self.guild.id, mutation.target_id, mutation.subject_id, reason=reason)
+        elif mutation.kind == REMOVE_ROLE:
+            await self.http.remove_role(self.guild.id, mutation.target_id, mutation.subject_id, reason=reason)
+        elif mutation.allow is None:
+            await self.http.delete_channel_permissions(mutation.target_id, mutation.subject_id, reason=reason)
+        else:
+            await self.http.edit_channel_permissions(
+                mutation.target_id,
+                mutation.subject_id,
+                mutation.allow,
+                mutation.deny,
+                mutation.overwrite_type,
+                reason=reason,
+            )
+
+    async def run(
+        self,
+        mutations: Iterable[tuple[Mutation, int | None]],
+        on_result: Callable[[int | None, str], None],
+        reason: str = None,
+    ) -> None:
+        """Apply mutations, `on_result` is called with the item id and `done`/`skipped`/`failed`"""
+        queues: dict[Hashable, deque] = defaultdict(deque)
+        for mutation, item_id in mutations:
+            if self.is_noop(mutation):
+                on_result(item_id, "skipped")
+                continue
+            queues[mutation.route(self.guild.id)].append((mutation, item_id))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(queue: deque) -> None:
+            while queue:
+                mutation, item_id = queue.popleft()
+                async with semaphore:
+                    try:
+                        await self.apply(mutation, reason)
+                    except disnake.HTTPException as error:
+                        rubbergod_logger.warning(f"Bulk mutation {mutation} failed: {error}")
+                        on_result(item_id, "failed")
+                        continue
+                on_result(item_id, "done")
+
+        workers = [
+            worker(queue) for queue in queues.values() for _ in range(min(self.route_concurrency, len(queue)))
+        ]
+        await asyncio.gather(*workers)
+
+
+class BulkJob:
+    """Persistent bulk job with a progress message"""
+
+    def __init__(self, bot: disnake.Client, job: BulkJobDB):
+        self.bot = bot
+        self.job = job
+        self._processed: list[int] = []
+        self._counts = {"done": 0, "skipped": 0, "failed": 0}
+        self._last_checkpoint = time.monotonic()
+
+    @classmethod
+    def create(
+        cls, bot: disnake.Client, name: str, guild: disnake.Guild, mutations: Iterable[Mutation], message=None
+    ) -> BulkJob:
+        # the last mutation of the same role or overwrite wins, order within the job is not kept
+        unique: dict[tuple, Mutation] = {}
+        for mutation in mutations:
+            unique.pop(mutation.key, None)
+            unique[mutation.key] = mutation
+        job = BulkJobDB.create(
+            name,
+            guild.id,
+            [mutation.to_db() for mutation in unique.values()],
+            channel_id=message.channel.id if message else None,
+            message_id=message.id if message else None,
+        )
+        return cls(bot, job)
+
+    @property
+    def processed(self) -> int:
+        return self.job.processed_count + sum(self._counts.values())
+
+    def progress_text(self) -> str:
+        job = self.job
+        done = job.done + self._counts["done"]
+        skipped = job.skipped + self._counts["skipped"]
+        failed = job.failed + self._counts["failed"]
+        progress_bar = utils.general.create_bar(self.processed, job.total)
+        return Messages.bulk_job_progress(
+            job=job,
+            processed=self.processed,
+            progress_bar=progress_bar,
+            done=done,
+            skipped=skipped,
+            failed=failed,
+        )
+
+    def _checkpoint(self) -> None:
+        self.job.checkpoint(self._processed, **self._counts)
+        self._processed = []
+        self._counts = {"done": 0, "skipped": 0, "failed": 0}
+        self._last_checkpoint = time.monotonic()
+
+    def _get_message(self) -> disnake.PartialMessage | None:
+        if self.job.message_id is None:
+            return None
+        channel = self.bot.get_channel(self.job.channel_id)
+        if channel is None:
+            return None
+        return channel.get_partial_message(self.job.message_id)
+
+    async def run(self, progress_every: int = 50) -> BulkJobDB:
+        """Apply all pending items of the job, progress message is edited every `progress_every` items"""
+        if self.job.id in running_jobs:
+            raise ValueError(f"Bulk job {self.job.id} is already running")
+        running_jobs[self.job.id] = self
+        try:
+            return await self._run(progress_every)
+        finally:
+            running_jobs.pop(self.job.id, None)
+
+    async def _run(self, progress_every: int) -> BulkJobDB:
+        guild = self.bot.get_guild(self.job.guild_id)
+        message = self._get_message()
+        items = self.job.pending_items()
+        last_report = self.processed
+        edits: set[asyncio.Task] = set()
+
+        def on_result(item_id: int | None, result: str) -> None:
+            nonlocal last_report
+            self._processed.append(item_id)
+            self._counts[result] += 1
+            if time.monotonic() - self._last_checkpoint > CHECKPOINT_INTERVAL:
+                self._checkpoint()
+            if message is not None and self.processed - last_report >= progress_every and not edits:
+                # progress is edited in background, slow edit doesn't stop the job
+                last_report = self.processed
+                task = asyncio.create_task(self._edit(message))
+                edits.add(task)
+                task.add_done_callback(edits.discard)
+
+        executor = BulkMutationExecutor(guild)
+        await executor.run(((Mutation.from_db(item), item.id) for item in items), on_result, self.job.name)
+        self._checkpoint()
+        if edits:
+            await asyncio.gather(*edits, return_exceptions=True)
+        if message is not None:
+            await self._edit(message)
+        self.job.finish()
+        return self.job
+
+    async def _edit(self, message: disnake.PartialMessage) -> None:
+        try:
+            await message.edit(self.progress_text())
+        except disnake.HTTPException:
+            rubbergod_logger.warning(f"Progress of bulk job {self.job.id} could not be edited", exc_info=True)
+
+    def cancel(self) -> None:
+        self.job.finish(BulkJobStatus.cancelled)
+
+
+async def run_bulk_job(
+    bot: disnake.Client,
+    name: str,
+    guild: disnake.Guild,
+    mutations: Iterable[Mutation],
+    message: disnake.Message = None,
+    progress_every: int = 50,
+) -> BulkJobDB:
+    """Save mutations as a resumable job and run it"""
+    job = BulkJob.create(bot, name, guild, mutations, message)
+    return await job.run(progress_every)
+
+
+# bulk jobs running in this process by job id
+running_jobs: dict[int, BulkJob] = {}
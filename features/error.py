@@ -3,23 +3,20 @@ import logging
 import sys
 import traceback
 from functools import cached_property
-from io import BytesIO
-from pathlib import Path
 
 import disnake
-import requests
 import sqlalchemy
 from disnake.ext import commands
-from PIL import Image, ImageDraw, ImageFont
 
 import utils
 from buttons.error import ErrorView
-from cogs.gif.features import ImageHandler
 from config.app_config import config
 from config.messages import Messages
 from database import session
 from database.error import ErrorLogDB
 from database.stats import ErrorEvent
+from features.error_aggregator import ErrorGroup, ErrorKey, error_aggregator
+from features.error_image import accident_renderer
 from rubbergod import Rubbergod
 from utils import errors
 
@@ -64,54 +61,13 @@ class ErrorLogger:
     def log_channel(self) -> disnake.TextChannel:
         return self.bot.get_channel(config.log_channel)
 
-    def set_image(self, embed: disnake.Embed, user: disnake.User, count: int):
-        try:
-            image_path = Path(__file__).parent.parent / "images/accident"
-            background = Image.open(image_path / "xDaysBackground.png")
-            head = Image.open(image_path / "xDaysHead.png")
-            pliers = Image.open(image_path / "xDaysPliers.png")
-
-            # add avatar
-            url = user.display_avatar.replace(size=256, format="png")
-            response = requests.get(url, timeout=10)
-            avatar = Image.open(BytesIO(response.content))
-
-            if not user.avatar:
-                avatar = avatar.convert("RGB")
-
-            avatar = ImageHandler.square_to_circle(avatar)
-            avatar = avatar.resize((230, 230))
-            avatar = avatar.crop((0, 0, 230, 200))
-            background.paste(avatar, (560, 270), avatar)
-
-            # set number
-            font_size = 80 if count >= 10 else 90
-            W, H = (150, 150)
-            font = ImageFont.truetype(str(image_path / "OpenSans-Regular.ttf"), font_size)
-            img_txt = Image.new("RGBA", (W, H), color=(255, 255, 255, 0))
-            draw_txt = ImageDraw.Draw(img_txt)
-            bbox = draw_txt.textbbox(xy=(0, 0), text=str(count), font=font)
-            width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
-            draw_txt.text(((W - width) / 2, (H - height) / 2), str(count), font=font, fill="#000")
-            img_txt = img_txt.rotate(10, expand=True, fillcolor=255)
-            background.paste(img_txt, (1000, 130), img_txt)
-
-            # add upper layers
-            background.paste(head, (0, 0), head)
-            background.paste(pliers, (0, 0), pliers)
-
-            # add image to embed
-            with BytesIO() as image_binary:
-                background.save(image_binary, format="png")
-                image_binary.seek(0)
-                file = disnake.File(fp=image_binary, filename="accident.png")
-
+    async def set_image(self, embed: disnake.Embed, user: disnake.User, count: int):
+        """Add the accident image, the embed stays text-only if the image is not rendered in time"""
+        file = await accident_renderer.render(self.bot.rubbergod_session, user, count)
+        if file is not None:
             embed.set_image(file=file)
-        except Exception as error:
-            output = "".join(traceback.format_exception(type(error), error, error.__traceback__))
-            rubbegod_logger.warning(output)
 
-    def create_embed(
+    async def create_embed(
         self,
         command: str,
         args: str,
@@ -133,7 +89,7 @@ class ErrorLogger:
             embed.add_field(name="Guild", value=getattr(guild, "name", guild))
         if jump_url:
             embed.add_field(name="Link", value=jump_url, inline=False)
-        self.set_image(embed, author, count)
+        await self.set_image(embed, author, count)
         if extra_fields:
             for name, value in extra_fields.items():
                 embed.add_field(name=name, value=value)
@@ -181,7 +137,11 @@ class ErrorLogger:
             # error was handled
             return
         parsed_ctx = await self._parse_context(ctx)
-        embed = self.create_embed(
+        error_key = error_aggregator.record(parsed_ctx["cog"], parsed_ctx["command"], error)
+        if error_key is None:
+            # repeated error, only counted
+            return
+        embed = await self.create_embed(
             parsed_ctx["command"], parsed_ctx["args"][:1000], ctx.author, ctx.guild, parsed_ctx["url"]
         )
         error_log = ErrorEvent.log(
@@ -193,6 +153,7 @@ class ErrorLogger:
             exception=type(error).__name__,
             traceback="\n".join(traceback.format_exception(type(error), error, error.__traceback__)),
         )
+        error_aggregator.logged(error_key, error_log.id)
         utils.embed.add_author_footer(embed, author=ctx.author, additional_text=[f"ID: {error_log.id}"])
 
         # send context of command with personal information to logging channel
@@ -218,6 +179,10 @@ class ErrorLogger:
         if await self.ignore_errors(ContextMock(self.bot, arg), error):
             # error was handled
             return
+        error_key = error_aggregator.record("System", event, error)
+        if error_key is None:
+            # repeated error, only counted
+            return
         if event == "on_message":
             message_id = arg.id
             if hasattr(arg, "guild") and arg.guild:
@@ -226,7 +191,7 @@ class ErrorLogger:
             else:
                 event_guild = url = "DM"
             embeds = [
-                self.create_embed(
+                await self.create_embed(
                     command="on_message",
                     args=arg.content,
                     author=author,
@@ -238,7 +203,7 @@ class ErrorLogger:
             embeds = await self.handle_reaction_error(arg)
         else:
             embeds = [
-                self.create_embed(
+                await self.create_embed(
                     command=event,
                     args=args,
                     author=author,
@@ -257,9 +222,36 @@ class ErrorLogger:
                 traceback.format_exception(type(error) if error else None, error, error.__traceback__)
             ),
         )
+        error_aggregator.logged(error_key, error_log.id)
         utils.embed.add_author_footer(embeds[-1], author=author, additional_text=[f"ID: {error_log.id}"])
         await self.bot_dev_channel.send(embeds=embeds, view=ErrorView())
 
+    async def send_suppressed_errors(self, groups: dict[ErrorKey, ErrorGroup]) -> None:
+        """Summary of the errors which were only counted in the last window"""
+        if not groups:
+            return
+        rows = [
+            Messages.errors_suppressed_row(
+                command=key.command,
+                exception=key.exception,
+                suppressed=group.suppressed,
+                count=group.count,
+                error_id=group.error_id,
+            )
+            for key, group in sorted(groups.items(), key=lambda item: item[1].suppressed, reverse=True)
+        ]
+        description = ""
+        for row in rows:
+            if len(description) + len(row) > 4000:
+                break
+            description += row + "\n"
+        embed = disnake.Embed(
+            title=Messages.errors_suppressed_title(minutes=round(config.error_window / 60)),
+            description=description,
+            color=0xFF0000,
+        )
+        await self.bot_dev_channel.send(embed=embed)
+
     async def handle_reaction_error(self, arg: disnake.RawReactionActionEvent):
         """Handle error in on_raw_reaction_add/remove events"""
         embeds = []
@@ -308,7 +300,7 @@ class ErrorLogger:
             else f"https://discord.com/channels/{guild.id}/{channel_id}/{message_id}"
         )
         embeds.append(
-            self.create_embed(
+            await self.create_embed(
                 command=arg.event_type,
                 args=message,
                 author=user,
@@ -319,11 +311,11 @@ class ErrorLogger:
         )
         return embeds
 
-    def create_error_embed(
+    async def create_error_embed(
         self, inter: disnake.ApplicationCommandInteraction, prefix: str, filled_options=None
     ):
         filled_options = filled_options or inter.filled_options
-        embed = self.create_embed(
+        embed = await self.create_embed(
             f"{prefix}{inter.application_command.qualified_name}",
             filled_options,
             inter.author,
@@ -395,7 +387,7 @@ class ErrorLogger:
         inter = ctx
         if hasattr(error, "original"):
             if isinstance(error.original, disnake.errors.InteractionTimedOut):
-                embed = self.create_error_embed(inter, "/", "Interaction timed out")
+                embed = await self.create_error_embed(inter, "/", "Interaction timed out")
                 await self.bot_dev_channel.send(embed=embed)
                 return True
 
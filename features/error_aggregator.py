@@ -0,0 +1,112 @@
+"""
+Aggregation of repeated errors, so an error storm doesn't flood the DB and the log channels.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from config.app_config import config
+from database.stats import ErrorCount
+
+
+@dataclass(frozen=True)
+class ErrorKey:
+    cog: str
+    command: str
+    exception: str
+    fingerprint: str
+
+
+@dataclass
+class ErrorGroup:
+    count: int = 0
+    reported: int = 0
+    error_id: int | None = None
+    last_seen: datetime = field(default_factory=datetime.now)
+
+    @property
+    def suppressed(self) -> int:
+        return self.count - self.reported
+
+
+def fingerprint(error: BaseException) -> str:
+    """Hash of the traceback frames, errors raised from the same place have the same fingerprint.
+    Exception message is left out, it often contains IDs or URLs."""
+    # command errors wrap the original exception
+    error = getattr(error, "original", error)
+    digest = hashlib.sha1(type(error).__qualname__.encode())
+    for frame in traceback.extract_tb(error.__traceback__):
+        digest.update(f"{frame.filename}:{frame.name}:{frame.lineno}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+class ErrorAggregator:
+    """In-memory counts of errors grouped by cog, command, exception type and traceback fingerprint.
+
+    Only the first `error_report_threshold` errors of a group in a window are logged to DB
+    and sent to Discord, the rest is only counted. Counts of the window are written
+    with one batched upsert by `flush`, which is called by the System cog every `error_window` seconds.
+    """
+
+    def __init__(self):
+        self.window_start = datetime.now()
+        self.groups: dict[ErrorKey, ErrorGroup] = {}
+        self._lock = asyncio.Lock()
+
+    def record(self, cog: str | None, command: str, error: BaseException) -> ErrorKey | None:
+        """Count the error, returns key of its group if the error should be reported, None otherwise"""
+        root = getattr(error, "original", error)
+        key = ErrorKey(str(cog), command, type(root).__name__, fingerprint(error))
+        group = self.groups.setdefault(key, ErrorGroup())
+        group.count += 1
+        group.last_seen = datetime.now()
+        if group.reported >= config.error_report_threshold:
+            return None
+        group.reported += 1
+        return key
+
+    def logged(self, key: ErrorKey, error_id: int) -> None:
+        """Link the group to the logged error, so suppressed errors can be found by its traceback"""
+        if key in self.groups:
+            self.groups[key].error_id = error_id
+
+    async def flush(self) -> dict[ErrorKey, ErrorGroup]:
+        """Write counts of the current window and start a new one.
+        Returns groups with suppressed errors."""
+        async with self._lock:
+            groups, window_start = self.groups, self.window_start
+            self.groups, self.window_start = {}, datetime.now()
+            if not groups:
+                return {}
+            rows = [
+                {
+                    "window_start": window_start.replace(microsecond=0),
+                    "cog": key.cog,
+                    "command": key.command,
+                    "exception": key.exception,
+                    "fingerprint": key.fingerprint,
+                    "count": group.count,
+                    "error_id": group.error_id,
+                }
+                for key, group in groups.items()
+            ]
+            try:
+                await ErrorCount.add_counts(rows)
+            except Exception:
+                # counted in the next window together with the reported errors,
+                # so errors which were already logged aren't listed as suppressed
+                for key, group in groups.items():
+                    current = self.groups.setdefault(key, ErrorGroup())
+                    current.count += group.count
+                    current.reported += group.reported
+                    current.error_id = current.error_id or group.error_id
+                raise
+            return {key: group for key, group in groups.items() if group.suppressed}
+
+
+error_aggregator = ErrorAggregator()
@@ -0,0 +1,129 @@
+"""
+Rendering of the "x days without an accident" image used by error logs and /uptime.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from io import BytesIO
+from pathlib import Path
+
+import aiohttp
+import disnake
+from PIL import Image, ImageDraw, ImageFont
+
+from cogs.gif.features import ImageHandler
+from config.app_config import config
+
+IMAGE_PATH = Path(__file__).parent.parent / "images/accident"
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+
+class AccidentImageRenderer:
+    """Renders the image in a worker thread so errors never block the event loop.
+
+    Template layers and fonts are loaded once, avatars are kept in a small LRU cache.
+    If the image is not ready within `config.error_image_time_budget` seconds,
+    `render` returns None and the embed is sent without the image.
+    """
+
+    def __init__(self, avatar_cache_size: int = 32):
+        # one worker, PIL fonts are not thread-safe and bursts of errors are queued
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="accident-image")
+        self._avatars: OrderedDict[str, bytes] = OrderedDict()
+        self._avatar_cache_size = avatar_cache_size
+
+    @cached_property
+    def _layers(self) -> tuple[Image.Image, Image.Image, Image.Image]:
+        layers = []
+        for name in ("xDaysBackground.png", "xDaysHead.png", "xDaysPliers.png"):
+            with Image.open(IMAGE_PATH / name) as image:
+                layers.append(image.convert("RGBA"))
+        return tuple(layers)
+
+    @cached_property
+    def _fonts(self) -> dict[int, ImageFont.FreeTypeFont]:
+        font_path = str(IMAGE_PATH / "OpenSans-Regular.ttf")
+        return {size: ImageFont.truetype(font_path, size) for size in (80, 90)}
+
+    def preload(self) -> None:
+        """Load template layers and fonts in the worker thread"""
+        self._executor.submit(lambda: (self._layers, self._fonts))
+
+    async def get_avatar(self, session: aiohttp.ClientSession, user: disnake.abc.User) -> bytes:
+        url = str(user.display_avatar.replace(size=256, format="png"))
+        avatar = self._avatars.get(url)
+        if avatar is not None:
+            self._avatars.move_to_end(url)
+            return avatar
+
+        async with session.get(url) as response:
+            response.raise_for_status()
+            avatar = await response.read()
+        self._avatars[url] = avatar
+        while len(self._avatars) > self._avatar_cache_size:
+            self._avatars.popitem(last=False)
+        return avatar
+
+    def _render(self, avatar_bytes: bytes, default_avatar: bool, count: int) -> bytes:
+        background, head, pliers = self._layers
+        image = background.copy()
+
+        # add avatar
+        avatar = Image.open(BytesIO(avatar_bytes))
+        if default_avatar:
+            avatar = avatar.convert("RGB")
+        avatar = ImageHandler.square_to_circle(avatar.convert("RGBA"))
+        avatar = avatar.resize((230, 230))
+        avatar = avatar.crop((0, 0, 230, 200))
+        image.paste(avatar, (560, 270), avatar)
+
+        # set number
+        font = self._fonts[80 if count >= 10 else 90]
+        W, H = (150, 150)
+        img_txt = Image.new("RGBA", (W, H), color=(255, 255, 255, 0))
+        draw_txt = ImageDraw.Draw(img_txt)
+        bbox = draw_txt.textbbox(xy=(0, 0), text=str(count), font=font)
+        width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        draw_txt.text(((W - width) / 2, (H - height) / 2), str(count), font=font, fill="#000")
+        img_txt = img_txt.rotate(10, expand=True, fillcolor=255)
+        image.paste(img_txt, (1000, 130), img_txt)
+
+        # add upper layers
+        image.paste(head, (0, 0), head)
+        image.paste(pliers, (0, 0), pliers)
+
+        with BytesIO() as image_binary:
+            # encoding takes most of the time, size is not important here
+            image.save(image_binary, format="png", compress_level=1)
+            return image_binary.getvalue()
+
+    async def _render_file(
+        self, session: aiohttp.ClientSession, user: disnake.abc.User, count: int
+    ) -> disnake.File:
+        avatar = await self.get_avatar(session, user)
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(self._executor, self._render, avatar, not user.avatar, count)
+        return disnake.File(fp=BytesIO(image), filename="accident.png")
+
+    async def render(
+        self, session: aiohttp.ClientSession, user: disnake.abc.User, count: int
+    ) -> disnake.File | None:
+        """Returns the image or None if it couldn't be rendered within the time budget"""
+        try:
+            return await asyncio.wait_for(
+                self._render_file(session, user, count), timeout=config.error_image_time_budget
+            )
+        except asyncio.TimeoutError:
+            rubbergod_logger.warning("Accident image was not rendered within the time budget")
+        except Exception:
+            rubbergod_logger.warning("Accident image could not be rendered", exc_info=True)
+        return None
+
+
+accident_renderer = AccidentImageRenderer()
@@ -0,0 +1,150 @@
+"""
+Decoding and hashing of attached images in worker processes, so big images don't block the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import aiohttp
+import dhash
+import disnake
+from PIL import Image
+
+from config.app_config import config
+from features.worker_pool import WorkerPool
+
+if TYPE_CHECKING:
+    from rubbergod import Rubbergod
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class ImageAnalysisError(Exception):
+    """Attachment could not be downloaded or hashed, another attempt may succeed"""
+
+
+def init_worker(max_pixels: int) -> None:
+    dhash.force_pil()
+    # PIL raises DecompressionBombError above twice this limit, the worker checks the exact limit itself
+    Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def hash_image(data: bytes, max_pixels: int) -> tuple[int | None, float, float]:
+    """Runs in the worker process. Returns dhash (None if not an image or too large)
+    and seconds spent by decoding and hashing."""
+    start = time.perf_counter()
+    try:
+        image = Image.open(BytesIO(data))
+        # size is read from the header, pixels are decoded by `load`
+        width, height = image.size
+        if width * height > max_pixels:
+            return None, time.perf_counter() - start, 0
+        image.load()
+    except (OSError, Image.DecompressionBombError):
+        # not an image
+        return None, time.perf_counter() - start, 0
+    decoded = time.perf_counter()
+    img_hash = dhash.dhash_int(image)
+    return img_hash, decoded - start, time.perf_counter() - decoded
+
+
+class ImageAnalyzer:
+    """Pool of worker processes hashing images of attachments.
+
+    Attachments are streamed through the shared CDN session up to `image_max_bytes`,
+    images with more than `image_max_pixels` pixels are skipped.
+    Image which isn't hashed within `image_timeout` restarts the workers (see `WorkerPool`).
+    Each analysed image dispatches `on_image_analysis(stage, result, duration)`
+    for stages `download`, `decode` and `hash`.
+    """
+
+    def __init__(self):
+        self.workers = WorkerPool(
+            "Image analysis",
+            config.image_workers,
+            initializer=init_worker,
+            initargs=(config.image_max_pixels,),
+        )
+        self.bot: Rubbergod | None = None
+
+    def start(self, bot: Rubbergod) -> None:
+        self.bot = bot
+
+    def stop(self) -> None:
+        self.workers.stop()
+
+    def _report(self, stage: str, result: str, duration: float) -> None:
+        if self.bot is not None:
+            self.bot.dispatch("image_analysis", stage, result, duration)
+
+    async def download(self, attachment: disnake.Attachment) -> bytes:
+        if attachment.size > config.image_max_bytes:
+            raise ImageTooLarge(f"{attachment.size} B")
+
+        session = self.bot.cdn_session if self.bot is not None else None
+        if session is None:
+            return await attachment.read()
+
+        data = bytearray()
+        async with session.get(attachment.url) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                data += chunk
+                if len(data) > config.image_max_bytes:
+                    raise ImageTooLarge(f"more than {config.image_max_bytes} B")
+        return bytes(data)
+
+    async def hash_attachment(self, attachment: disnake.Attachment, raise_errors: bool = False) -> int | None:
+        """dhash of the attached image, None if the attachment is not an image or can't be processed.
+        With `raise_errors` failed download or broken workers raise `ImageAnalysisError` instead."""
+        if attachment.content_type is not None and not attachment.content_type.startswith("image/"):
+            return None
+
+        start = time.perf_counter()
+        try:
+            data = await self.download(attachment)
+        except ImageTooLarge:
+            self._report("download", "too_large", time.perf_counter() - start)
+            return None
+        except (aiohttp.ClientError, disnake.HTTPException, asyncio.TimeoutError) as error:
+            rubbergod_logger.warning(f"Attachment {attachment.url} could not be downloaded: {error!r}")
+            self._report("download", "error", time.perf_counter() - start)
+            if raise_errors:
+                raise ImageAnalysisError(attachment.url) from error
+            return None
+        self._report("download", "ok", time.perf_counter() - start)
+
+        try:
+            img_hash, decode_time, hash_time = await self.workers.run(
+                config.image_timeout, hash_image, data, config.image_max_pixels
+            )
+        except asyncio.TimeoutError:
+            rubbergod_logger.warning(f"Hashing of {attachment.url} timed out")
+            self._report("decode", "timeout", config.image_timeout)
+            return None
+        except BrokenProcessPool as error:
+            rubbergod_logger.exception("Image worker pool broke, starting a new one")
+            if raise_errors:
+                raise ImageAnalysisError(attachment.url) from error
+            return None
+
+        result = "ok" if img_hash is not None else "skipped"
+        self._report("decode", result, decode_time)
+        if img_hash is not None:
+            self._report("hash", result, hash_time)
+        return img_hash
+
+
+image_analyzer = ImageAnalyzer()
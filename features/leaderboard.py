@@ -1,8 +1,10 @@
 import math
-from functools import cached_property, lru_cache
-from typing import Callable, Iterable, Union
+import time
+from functools import lru_cache
+from typing import Callable, Iterable, Sequence, Union
 
 import disnake
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm.query import Query
 from sqlalchemy.schema import Table
 
@@ -12,14 +14,51 @@ from config.app_config import config
 DatabasePage = Iterable[Table]
 
 
+class BoardState:
+    """Pages, page cursors and row count of one leaderboard valid for a short time"""
+
+    max_pages = 50
+
+    def __init__(self, ttl: float):
+        self.expires = time.monotonic() + ttl
+        self.count: int | None = None
+        # page number -> sort key of the last row on the page
+        self.cursors: dict[int, tuple] = {}
+        self.pages: dict[int, list] = {}
+
+    @property
+    def expired(self) -> bool:
+        return self.expires < time.monotonic()
+
+    def add_page(self, page_number: int, page: list) -> None:
+        if len(self.pages) >= self.max_pages:
+            del self.pages[next(iter(self.pages))]
+        self.pages[page_number] = page
+
+
+# states of boards shared by all page sources with the same `cache_key`
+board_states: dict[str, BoardState] = {}
+
+
 class DatabaseIteratorPageSource:
     """A data source from sqlalchemy database query.
 
     This page source does not handle any sort of formatting, leaving it up
     to the user. To do so, implement the :meth:`format_page` method.
+
+    If `order_by` is given, pages are polled with keyset pagination, i.e. by seeking
+    after the sort key of the last row on the previous page instead of OFFSET.
+    Fetched pages are cached for `config.leaderboard_cache_ttl` seconds.
     """
 
-    def __init__(self, query: Query, per_page=10):
+    def __init__(
+        self,
+        query: Query,
+        per_page=10,
+        order_by: Sequence = (),
+        descending: bool = True,
+        cache_key: str = None,
+    ):
         """
         query: :class:`Query`
             The query which will be realized to poll for database items.
@@ -30,24 +69,102 @@ class DatabaseIteratorPageSource:
         per_page: :class:`int`
             How many rows to return per one page.
             Will be used on database query to poll for that amount.
+
+        order_by: Sequence of columns
+            Sort key of the board, last column has to be unique (e.g. member id).
+            Replaces ordering of the query. All columns are sorted in the same direction,
+            NULL values are sorted as 0.
+
+            Example: ``(KarmaTable.count, KarmaTable.member_id)``
+
+        cache_key: :class:`str`
+            Identifies the board (query + ordering), page sources with the same key
+            share cached pages. Without it the pages are cached only by this instance.
         """
         self._query = query
         self.per_page = per_page
+        self.order_by = tuple(order_by)
+        # comparison with NULL is never true, so the seek would skip rows with NULL values,
+        # they are sorted as 0 instead (the last column is unique and never NULL)
+        self._sort_key = tuple(func.coalesce(column, 0) for column in self.order_by[:-1]) + self.order_by[-1:]
+        self.descending = descending
+        self.cache_key = cache_key
+        self._state: BoardState | None = None
+
+    @property
+    def state(self) -> BoardState:
+        if self.cache_key is not None:
+            self._state = board_states.get(self.cache_key)
+        if self._state is None or self._state.expired:
+            self._state = BoardState(config.leaderboard_cache_ttl)
+            if self.cache_key is not None:
+                board_states[self.cache_key] = self._state
+        return self._state
 
-    @cached_property
     def _get_max_pages(self):
-        # .count() might be slow
-        # https://stackoverflow.com/q/14754994/5881796
-        count = self._query.count()
-        return math.ceil(count / self.per_page) if count > 0 else 0
+        state = self.state
+        if state.count is None:
+            # .count() might be slow
+            # https://stackoverflow.com/q/14754994/5881796
+            state.count = self._query.count()
+        return math.ceil(state.count / self.per_page) if state.count > 0 else 0
 
     def get_max_pages(self):
-        return self._get_max_pages
+        return self._get_max_pages()
+
+    def _ordered(self, query: Query) -> Query:
+        columns = [column.desc() if self.descending else column.asc() for column in self._sort_key]
+        return query.order_by(None).order_by(*columns)
+
+    def _seek(self, query: Query, cursor: tuple | None) -> Query:
+        """Rows after the cursor in the board order"""
+        if cursor is None:
+            return query
+        key = tuple_(*self._sort_key)
+        return query.filter(key < tuple_(*cursor) if self.descending else key > tuple_(*cursor))
+
+    def _row_key(self, row) -> tuple:
+        *values, unique = (getattr(row, column.key) for column in self.order_by)
+        return tuple(0 if value is None else value for value in values) + (unique,)
+
+    def _get_cursor(self, page_number: int) -> tuple | None:
+        """Sort key of the last row before the page, None for the first page"""
+        if page_number == 0:
+            return None
+        cursors = self.state.cursors
+        if page_number - 1 in cursors:
+            return cursors[page_number - 1]
+
+        # jump over the pages from the closest known cursor, polls only the sort key
+        known = max((page for page in cursors if page < page_number - 1), default=None)
+        start = known + 1 if known is not None else 0
+        skip = (page_number - start) * self.per_page - 1
+        query = self._seek(self._ordered(self._query.with_entities(*self._sort_key)), cursors.get(known))
+        row = query.offset(skip).limit(1).first()
+        if row is None:
+            return None
+        cursors[page_number - 1] = tuple(row)
+        return cursors[page_number - 1]
+
+    def _poll_page(self, page_number: int) -> list:
+        if not self.order_by:
+            return self._query.limit(self.per_page).offset(page_number * self.per_page).all()
+
+        cursor = self._get_cursor(page_number)
+        if page_number > 0 and cursor is None:
+            return []  # out of range
+        page = self._seek(self._ordered(self._query), cursor).limit(self.per_page).all()
+        if page:
+            self.state.cursors[page_number] = self._row_key(page[-1])
+        return page
 
     def get_page(self, page_number) -> DatabasePage:
         # result of this is passed into format_page(..., page) arg
         self.current_page = page_number
-        return self._query.limit(self.per_page).offset(self.current_page * self.per_page).all()
+        state = self.state
+        if page_number not in state.pages:
+            state.add_page(page_number, self._poll_page(page_number))
+        return state.pages[page_number]
 
 
 class LeaderboardPageSource(DatabaseIteratorPageSource):
@@ -75,6 +192,9 @@ class LeaderboardPageSource(DatabaseIteratorPageSource):
         per_page: int = 10,
         base_embed: disnake.Embed = None,
         member_id_col_name: str = "member_id",
+        order_by: Sequence = (),
+        descending: bool = True,
+        cache_key: str = None,
     ):
         """
         Initialize this page source.
@@ -90,6 +210,8 @@ class LeaderboardPageSource(DatabaseIteratorPageSource):
             it's ``.description`` and ``.footer`` will be used
             for the pagination purposes.
 
+        order_by, descending, cache_key: See :class:`DatabaseIteratorPageSource`.
+
         Notice:
             The table entry returned by the underlying ``Query`` has to contain
             ``member_id/_ID`` column.
@@ -107,9 +229,9 @@ class LeaderboardPageSource(DatabaseIteratorPageSource):
         self.base_embed = base_embed if base_embed else disnake.Embed()
         self.base_embed.title = self.set_leaderboard_title(title, emote_name)
         self.member_id_col_name = member_id_col_name
-        self._query = query
-        self.per_page = per_page
-        super().__init__(query=query, per_page=per_page)
+        super().__init__(
+            query=query, per_page=per_page, order_by=order_by, descending=descending, cache_key=cache_key
+        )
 
     @lru_cache(5)
     def get_default_emoji(self, emoji: str):
@@ -122,14 +244,20 @@ class LeaderboardPageSource(DatabaseIteratorPageSource):
             emote = self.get_default_emoji(emote_name) or f":{emote_name}:"
         return f"{emote} {board_name} {emote}"
 
-    def _get_member_name(self, member_id: Union[str, int]) -> str:
+    def _get_member_names(self, page: DatabasePage) -> dict[int, str]:
+        """Resolve names of all members on the page at once"""
         guild = self.bot.get_guild(config.guild_id)
-        member = guild.get_member(int(member_id))
-        if not member:
-            return "_User left_"
-        return disnake.utils.escape_markdown(member.display_name)
+        names = {}
+        for entry in page:
+            member_id = getattr(entry, self.member_id_col_name, None)
+            assert member_id, f"Table {entry} row does not contain '{self.member_id_col_name}'?"
+            member = guild.get_member(int(member_id))
+            names[int(member_id)] = (
+                disnake.utils.escape_markdown(member.display_name) if member else "_User left_"
+            )
+        return names
 
-    def _format_row(self, entry: Table, position: int) -> str:
+    def _format_row(self, entry: Table, position: int, member_names: dict[int, str]) -> str:
         """
         Applies current query results onto self.row_formatter.
         The entry's member id attribute is converted and available
@@ -140,20 +268,23 @@ class LeaderboardPageSource(DatabaseIteratorPageSource):
         :returns: Formatted string, result of calling/applying `self.row_formatter`.
         """
 
-        member_id = getattr(entry, self.member_id_col_name, None)
-        assert member_id, f"Table {entry} row does not contain '{self.member_id_col_name}'?"
-
-        member_name = self._get_member_name(member_id)
+        member_id = getattr(entry, self.member_id_col_name)
+        member_name = member_names[int(member_id)]
 
         kwargs = {"position": position, "member_name": member_name, "entry": entry}
         return self.row_formatter(**kwargs)
 
     def format_page(self, page: DatabasePage) -> Union[str, disnake.Embed, dict]:
         board_lines = []
+        member_names = self._get_member_names(page)
 
         for i, entry in enumerate(page):  # type: int, Table
             board_lines.append(
-                self._format_row(entry=entry, position=(self.current_page * self.per_page) + i + 1)
+                self._format_row(
+                    entry=entry,
+                    position=(self.current_page * self.per_page) + i + 1,
+                    member_names=member_names,
+                )
             )
 
         self.base_embed.description = "\n" + "\n".join(board_lines)
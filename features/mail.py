@@ -0,0 +1,186 @@
+"""
+Delivery of outgoing mails from the outbox table over one long-lived SMTP connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import smtplib
+import ssl
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from typing import TYPE_CHECKING
+
+from config.app_config import config
+from database.mail import MailOutboxDB
+
+if TYPE_CHECKING:
+    from rubbergod import Rubbergod
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+# seconds without mails after which the SMTP connection is closed
+IDLE_TIMEOUT = 60
+# mails sent by one pass of the worker
+BATCH_SIZE = 20
+# delivered mails are kept for this long, they contain verification codes
+SENT_RETENTION = timedelta(days=1)
+
+
+class PermanentMailError(Exception):
+    """Delivery of the mail will never succeed, e.g. the recipient doesn't exist"""
+
+
+class MailOutbox:
+    """Persistent queue of outgoing mails.
+
+    `send` stores the mail in the DB and wakes up the worker, so callers never wait for SMTP.
+    The worker keeps one authenticated connection open while there are mails to send
+    and retries failed deliveries with exponential backoff.
+    Each delivery dispatches `on_mail_delivery(kind, result, latency)`.
+    """
+
+    def __init__(self):
+        # smtplib is blocking, all SMTP calls go through one worker thread with one connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._server: smtplib.SMTP | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.bot: Rubbergod | None = None
+
+    def start(self, bot: Rubbergod) -> None:
+        self.bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="mail-outbox")
+
+    async def stop(self) -> None:
+        """Stop the worker and close the SMTP connection"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        # runs after a delivery which is in progress in the SMTP thread
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._disconnect)
+
+    def prune(self) -> int:
+        """Remove mails delivered more than `SENT_RETENTION` ago"""
+        return MailOutboxDB.prune(SENT_RETENTION)
+
+    def send(self, recipient: str, subject: str, body: str, kind: str = "mail") -> MailOutboxDB:
+        """Queue the mail, pending mail of the same kind for the recipient is replaced"""
+        mail = MailOutboxDB.enqueue(recipient, subject, body, kind)
+        self._wakeup.set()
+        return mail
+
+    def _connect(self) -> smtplib.SMTP:
+        if config.email_use_ssl:
+            server = smtplib.SMTP_SSL(
+                config.email_smtp_server,
+                config.email_smtp_port,
+                context=ssl.create_default_context(),
+                timeout=config.email_timeout,
+            )
+        else:
+            server = smtplib.SMTP(
+                config.email_smtp_server, config.email_smtp_port, timeout=config.email_timeout
+            )
+        if config.email_pass:
+            server.login(config.email_name, config.email_pass)
+        return server
+
+    def _disconnect(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            self._server.close()
+        except OSError:
+            pass
+        self._server = None
+
+    def _deliver(self, recipient: str, subject: str, body: str) -> None:
+        msg = MIMEText(body, "plain", "utf-8")
+        msg["Subject"] = subject
+        msg["To"] = recipient
+        msg["Date"] = datetime.now().isoformat()
+        msg["From"] = config.email_addr
+
+        for reconnect in (False, True):
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.sendmail(config.email_addr, recipient, msg.as_string())
+                return
+            except smtplib.SMTPRecipientsRefused as error:
+                raise PermanentMailError(str(error.recipients)) from error
+            except smtplib.SMTPResponseException as error:
+                if 500 <= error.smtp_code < 600:
+                    raise PermanentMailError(f"{error.smtp_code} {error.smtp_error!r}") from error
+                raise
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # connection was closed by the server while idle, try once more with a new one
+                self._server = None
+                if reconnect:
+                    raise
+
+    def backoff(self, attempts: int) -> timedelta | None:
+        """Delay before the next attempt or None if the mail should not be retried"""
+        if attempts >= config.email_max_attempts:
+            return None
+        return timedelta(seconds=min(config.email_retry_base * 2 ** (attempts - 1), config.email_retry_max))
+
+    async def process(self) -> int:
+        """Send due mails, returns number of delivery attempts"""
+        loop = asyncio.get_running_loop()
+        mails = MailOutboxDB.get_due(BATCH_SIZE)
+        for mail in mails:
+            body = mail.body
+            try:
+                await loop.run_in_executor(self._executor, self._deliver, mail.recipient, mail.subject, body)
+            except PermanentMailError as error:
+                rubbergod_logger.warning(f"Mail to {mail.recipient} can't be delivered: {error}")
+                mail.mark_failed(str(error), None)
+                result = "failed"
+            except (smtplib.SMTPException, OSError) as error:
+                await loop.run_in_executor(self._executor, self._disconnect)
+                retry_in = self.backoff(mail.attempts + 1)
+                rubbergod_logger.warning(f"Mail to {mail.recipient} failed, retry in {retry_in}: {error!r}")
+                mail.mark_failed(repr(error), retry_in)
+                result = "retry" if retry_in is not None else "failed"
+            else:
+                if mail.body != body:
+                    # replaced by a newer mail while sending, deliver that one too
+                    continue
+                mail.mark_sent()
+                result = "sent"
+
+            latency = (datetime.now() - mail.created_at).total_seconds()
+            if self.bot is not None:
+                self.bot.dispatch("mail_delivery", mail.kind, result, latency)
+        return len(mails)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                while await self.process() == BATCH_SIZE:
+                    pass
+            except Exception:
+                rubbergod_logger.exception("Mail outbox worker failed")
+
+            next_attempt = MailOutboxDB.next_attempt()
+            timeout = IDLE_TIMEOUT
+            if next_attempt is not None:
+                timeout = min(max((next_attempt - datetime.now()).total_seconds(), 0), IDLE_TIMEOUT)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if next_attempt is None:
+                    await loop.run_in_executor(self._executor, self._disconnect)
+
+
+mail_outbox = MailOutbox()
@@ -0,0 +1,119 @@
+"""
+Short-lived cache of fetched messages shared by reaction handlers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+
+import disnake
+
+from config.app_config import config
+
+
+class MessageCache:
+    """Bounded LRU cache of messages with time to live.
+
+    Concurrent fetches of the same message share one in-flight request.
+    Cached messages are kept accurate by applying reaction gateway events,
+    every event is applied only once even if it is passed by several listeners.
+    """
+
+    def __init__(self, maxsize: int = 500, ttl: float = 300, applied_events: int = 256):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._messages: OrderedDict[int, tuple[float, disnake.Message]] = OrderedDict()
+        self._in_flight: dict[int, asyncio.Future[disnake.Message]] = {}
+        # events are compared by identity, references keep the ids unique
+        self._applied: OrderedDict[int, disnake.RawReactionActionEvent] = OrderedDict()
+        self._applied_size = applied_events
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def get(self, message_id: int) -> disnake.Message | None:
+        """Return cached message or None if it is missing or expired"""
+        cached = self._messages.get(message_id)
+        if cached is None:
+            return None
+        expires, message = cached
+        if expires < time.monotonic():
+            del self._messages[message_id]
+            return None
+        self._messages.move_to_end(message_id)
+        return message
+
+    def put(self, message: disnake.Message) -> None:
+        self._messages[message.id] = (time.monotonic() + self.ttl, message)
+        self._messages.move_to_end(message.id)
+        while len(self._messages) > self.maxsize:
+            self._messages.popitem(last=False)
+
+    def invalidate(self, message_id: int) -> None:
+        self._messages.pop(message_id, None)
+
+    def clear(self) -> None:
+        self._messages.clear()
+
+    async def fetch(self, channel: disnake.abc.Messageable, message_id: int) -> disnake.Message:
+        """Return message from the cache or fetch it from the API.
+
+        Raises the same exceptions as `channel.fetch_message`.
+        """
+        message = self.get(message_id)
+        if message is not None:
+            self.hits += 1
+            return message
+
+        future = self._in_flight.get(message_id)
+        if future is not None:
+            self.hits += 1
+            # shield so cancelled waiter doesn't cancel the request of the others
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[message_id] = future
+        try:
+            message = await channel.fetch_message(message_id)
+        except BaseException as error:
+            future.set_exception(error)
+            # retrieve the exception so it isn't logged when nobody else waits
+            future.exception()
+            raise
+        else:
+            self.put(message)
+            future.set_result(message)
+            return message
+        finally:
+            del self._in_flight[message_id]
+
+    def apply_reaction(self, bot: disnake.Client, payload: disnake.RawReactionActionEvent) -> None:
+        """Patch reaction counts of the cached message by the gateway event"""
+        message = self.get(payload.message_id)
+        if message is None or self._applied.get(id(payload)) is payload:
+            return
+        self._applied[id(payload)] = payload
+        while len(self._applied) > self._applied_size:
+            self._applied.popitem(last=False)
+
+        if payload.emoji.is_custom_emoji():
+            emoji = bot.get_emoji(payload.emoji.id) or payload.emoji
+        else:
+            emoji = payload.emoji.name
+        data = {"emoji": {"id": payload.emoji.id, "name": payload.emoji.name}}
+        try:
+            if payload.event_type == "REACTION_ADD":
+                message._add_reaction(data, emoji, payload.user_id)
+            else:
+                message._remove_reaction(data, emoji, payload.user_id)
+        except ValueError:
+            # cached message is out of sync, fetch it again next time
+            self.invalidate(payload.message_id)
+
+
+message_cache = MessageCache(config.message_cache_size, config.message_cache_ttl)
@@ -0,0 +1,31 @@
+"""
+Client side rate limiting of outgoing requests.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Allows `rate` requests per `period` seconds with bursts up to `rate`"""
+
+    def __init__(self, rate: int, period: float):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        # waiters are served in order
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+                self._refill()
+            self.tokens -= 1
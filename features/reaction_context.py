@@ -3,6 +3,7 @@ from __future__ import annotations
 import disnake
 
 from config.app_config import config
+from features.message_cache import message_cache
 from rubbergod import Rubbergod
 
 
@@ -39,8 +40,10 @@ class ReactionContext:
         if member is None or member.bot:
             return None
 
+        # cached message must include this event the same way as the freshly fetched one
+        message_cache.apply_reaction(bot, payload)
         try:
-            message: disnake.Message = await channel.fetch_message(payload.message_id)
+            message: disnake.Message = await message_cache.fetch(channel, payload.message_id)
 
             if message is None:
                 return None
@@ -50,7 +53,7 @@ class ReactionContext:
         reply_to = None
         if message is not None and message.reference is not None and message.reference.message_id is not None:
             try:
-                reply_to = await channel.fetch_message(message.reference.message_id)
+                reply_to = await message_cache.fetch(channel, message.reference.message_id)
             except disnake.errors.NotFound:
                 pass  # Reply is there optional.
 
@@ -1,10 +1,6 @@
 import random
 import re
-import smtplib
-import ssl
 import string
-from datetime import datetime
-from email.mime.text import MIMEText
 
 import disnake
 
@@ -13,6 +9,7 @@ from cogs.verify.views_verify import VerifyView, VerifyWithResendButtonView
 from config.app_config import config
 from database.verification import ValidPersonDB, VerifyStatus
 from features.base_feature import BaseFeature
+from features.mail import mail_outbox
 from features.verify_helper import VerifyHelper
 from rubbergod import Rubbergod
 
@@ -31,20 +28,9 @@ class Verification(BaseFeature):
         super().__init__(bot)
         self.helper = VerifyHelper(bot)
 
-    def send_mail(self, receiver_email: str, contents: str, subject: str = "") -> None:
-        msg = MIMEText(contents, "plain", "utf-8")
-        msg["Subject"] = subject
-        msg["To"] = receiver_email
-        msg["Date"] = datetime.now().isoformat()
-        msg["From"] = config.email_addr
-
-        with smtplib.SMTP_SSL(
-            config.email_smtp_server,
-            config.email_smtp_port,
-            context=ssl.create_default_context(),
-        ) as server:
-            server.login(config.email_name, config.email_pass)
-            server.sendmail(config.email_addr, receiver_email, msg.as_string())
+    def send_mail(self, receiver_email: str, contents: str, subject: str = "", kind: str = "mail") -> None:
+        """Queue the mail for delivery by the mail outbox worker"""
+        mail_outbox.send(receiver_email, subject, contents, kind)
 
     def send_mail_verified(self, receiver_email: str, user: str):
         """Send mail with instructions in case of blocked DMs"""
@@ -52,6 +38,7 @@ class Verification(BaseFeature):
             receiver_email,
             MessagesCZ.verify_post_verify_info_mail,
             f"{user} {MessagesCZ.verify_verify_success_mail}",
+            kind="verified_info",
         )
 
     async def gen_code_and_send_mail(
@@ -70,7 +57,7 @@ class Verification(BaseFeature):
             mail_content = MessagesCZ.verify_mail_content(code=code)
             # Save the newly generated code into the database
             user.save_sent_code(code)
-            self.send_mail(mail_address, mail_content, MessagesCZ.verify_subject)
+            self.send_mail(mail_address, mail_content, MessagesCZ.verify_subject, kind="verify_code")
 
         mail_list = await self.helper.get_mails(user.login)
         if not is_resend:
@@ -32,16 +32,8 @@ class VerifyHelper:
             return utils.user.has_role(member, role_name)
 
     async def get_user_details(self, id: str) -> dict | None:
-        url = f"https://www.vut.cz/api/person/v1/{id}/pusobeni-osoby"
-        async with self.bot.vutapi_session.get(url) as res:
-            if res.status != 200:
-                if res.status in [401, 403]:
-                    raise Exception("Invalid API key")
-                elif res.status == 429:
-                    raise Exception("Rate limit exceeded")
-                # Login not found
-                return None
-            return await res.json()
+        # student who has just enrolled can't wait for the expiration of unknown login
+        return await self.bot.vutapi.get_user_details(id, cache_missing=False)
 
     async def _parse_relation(self, user: dict) -> str:
         """Parse user relations and return year, programee and faculty for students,
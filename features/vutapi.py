@@ -0,0 +1,115 @@
+"""
+Client of the VUT API shared by verification and bulk updates of the persons database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+import aiohttp
+
+import utils
+from config.app_config import config
+from database.vutapi import VutApiCacheDB, VutApiJobDB
+from features.rate_limit import TokenBucket
+from utils.errors import ApiError
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+
+class VutApiClient:
+    """Cached and rate limited access to the VUT API.
+
+    Responses are cached in the DB per login, unknown logins only for a few minutes
+    as they can appear in the API any time (e.g. new students).
+    All requests share one token bucket and at most `concurrency` requests run at once.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+        self.url = config.vut_api_url
+        self.ttl = timedelta(hours=config.vut_api_cache_ttl)
+        self.missing_ttl = timedelta(minutes=config.vut_api_cache_missing_ttl)
+        self.rate_limiter = TokenBucket(config.vut_api_rate_limit, config.vut_api_rate_period)
+        self.concurrency = config.vut_api_concurrency
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def _fetch(self, login: str, retries: int = 3) -> tuple[dict | None, bool]:
+        """Returns response and whether it can be cached"""
+        url = f"{self.url}/{login}/pusobeni-osoby"
+        for _ in range(retries):
+            async with self._semaphore:
+                await self.rate_limiter.acquire()
+                async with self.session.get(url) as res:
+                    if res.status == 200:
+                        return await res.json(), True
+                    if res.status in [401, 403]:
+                        raise ApiError("Invalid API key")
+                    if res.status == 429:
+                        retry_after = float(res.headers.get("Retry-After", config.vut_api_rate_period))
+                    elif res.status >= 500:
+                        return None, False
+                    else:
+                        # Login not found
+                        return None, True
+            rubbergod_logger.warning(f"VUT API rate limit exceeded, retrying in {retry_after} s")
+            await asyncio.sleep(retry_after)
+        raise ApiError("Rate limit exceeded")
+
+    async def get_user_details(
+        self, login: str, use_cache: bool = True, cache_missing: bool = True
+    ) -> dict | None:
+        """Returns the person from the API or None if the login doesn't exist.
+        With `cache_missing` False a login cached as unknown is looked up again."""
+        if use_cache:
+            cached = VutApiCacheDB.get(login)
+            if cached is not None and (cache_missing or cached.data is not None):
+                return cached.data
+
+        user, cacheable = await self._fetch(login)
+        if cacheable:
+            VutApiCacheDB.set(login, user, self.ttl if user is not None else self.missing_ttl)
+        return user
+
+    async def bulk_refresh(
+        self,
+        name: str,
+        logins: list[str],
+        handle: Callable[[str, dict | None], Awaitable[bool]],
+        progress: Callable[[int, int], Awaitable[None]] = None,
+        continue_from: str = None,
+    ) -> VutApiJobDB:
+        """Fetch all logins and pass responses to `handle`.
+
+        Progress is saved in the DB after every chunk, unfinished job with the same name
+        continues where it stopped. `progress` is called with the number of processed
+        and all logins of this run. `handle` returns True for responses that should be counted
+        as exstudents.
+        """
+        job = VutApiJobDB.get(name)
+        if continue_from or job is None or job.finished:
+            job = VutApiJobDB.start(name)
+
+        pending = sorted(
+            login
+            for login in set(logins)
+            if (job.last_login is None or login > job.last_login)
+            and (continue_from is None or login >= continue_from)
+        )
+        done = 0
+        for chunk in utils.general.split_to_parts(pending, self.concurrency * 2):
+            # refresh has to see status changes, responses are only stored for later lookups
+            users = await asyncio.gather(*(self.get_user_details(login, use_cache=False) for login in chunk))
+            exstudents = 0
+            for login, user in zip(chunk, users):
+                exstudents += bool(await handle(login, user))
+            job.checkpoint(chunk[-1], len(chunk), exstudents)
+            done += len(chunk)
+            if progress is not None:
+                await progress(done, len(pending))
+
+        job.finish()
+        return job
@@ -0,0 +1,75 @@
+"""
+Process pool enforcing time limits of its jobs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
+
+class WorkerPool:
+    """Pool of worker processes started on the first use.
+
+    A job which is already running can't be cancelled, so a job exceeding its time limit
+    terminates all workers and a new pool is started. Other jobs of the terminated pool
+    are submitted once more to the new pool. Jobs wait for a free worker before they are submitted,
+    so the time limit doesn't include waiting in the queue.
+    """
+
+    def __init__(self, name: str, max_workers: int, initializer: Callable = None, initargs: tuple = ()):
+        self.name = name
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self._pool: ProcessPoolExecutor | None = None
+        self._free_workers = asyncio.Semaphore(max_workers)
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=self.initializer, initargs=self.initargs
+            )
+        return self._pool
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _terminate(self, pool: ProcessPoolExecutor) -> None:
+        """Kill the workers, jobs of the pool fail with BrokenProcessPool"""
+        if self._pool is pool:
+            self._pool = None
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
+
+    async def run(self, timeout: float, function: Callable, *args) -> Any:
+        """Run the function in a worker.
+        Raises `asyncio.TimeoutError` when it takes longer than `timeout` seconds
+        and `BrokenProcessPool` when the pool breaks even on the second attempt."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            async with self._free_workers:
+                pool = self.pool
+                try:
+                    return await asyncio.wait_for(
+                        loop.run_in_executor(pool, function, *args), timeout=timeout
+                    )
+                except asyncio.TimeoutError:
+                    rubbergod_logger.warning(f"{self.name} job timed out, restarting the workers")
+                    self._terminate(pool)
+                    raise
+                except BrokenProcessPool:
+                    if self._pool is pool:
+                        self._pool = None
+                    if attempt:
+                        raise
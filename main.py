@@ -10,12 +10,22 @@ setup_logging()
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--init_db", action="store_true", help="Creates missing DB tables without start bot.")
+parser.add_argument(
+    "--check_db", action="store_true", help="Compares DB schema with the models without start bot."
+)
 args = parser.parse_args()
 
 if args.init_db:
     migrations.init_db()
     exit(0)
 
+if args.check_db:
+    problems = migrations.check_db()
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} differences found")
+    exit(1 if problems else 0)
+
 
 class Bot(Rubbergod):
     def __init__(self):
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime, timezone
+from types import SimpleNamespace
 from typing import TYPE_CHECKING
 
 import aiohttp
@@ -13,6 +15,7 @@ import database.db_migrations as migrations
 from config.app_config import config
 from config.messages import Messages
 from features.git import Git
+from features.vutapi import VutApiClient
 
 if TYPE_CHECKING:
     from features.error import ErrorLogger
@@ -22,6 +25,7 @@ class Rubbergod(commands.Bot):
     is_initialized = False
     logger: logging.Logger
     err_logger: ErrorLogger
+    vutapi: VutApiClient
 
     def __init__(self):
         self.logger = logging.getLogger("rubbergod")
@@ -90,14 +94,60 @@ class Rubbergod(commands.Bot):
         vut_api_headers = {"Authorization": f"Bearer {config.vut_api_key}", "Author": owner_id}
 
         self.rubbergod_session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=10), headers=rubbergod_headers
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers=rubbergod_headers,
+            trace_configs=[self.http_trace_config("rubbergod")],
         )
         self.grillbot_session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=10), headers=grillbot_headers
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers=grillbot_headers,
+            trace_configs=[self.http_trace_config("grillbot")],
         )
         self.vutapi_session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=10), headers=vut_api_headers
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers=vut_api_headers,
+            trace_configs=[self.http_trace_config("vutapi")],
         )
+        self.vutapi = VutApiClient(self.vutapi_session)
+        # attachments from Discord CDN
+        self.cdn_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            trace_configs=[self.http_trace_config("cdn")],
+        )
+        self.exams_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            trace_configs=[self.http_trace_config("exams")],
+        )
+
+    def http_trace_config(self, session_name: str) -> aiohttp.TraceConfig:
+        """Dispatch `on_http_request(session_name, method, status, duration)` after every request"""
+
+        async def on_request_start(
+            session: aiohttp.ClientSession, context: SimpleNamespace, params: aiohttp.TraceRequestStartParams
+        ):
+            context.start = asyncio.get_running_loop().time()
+
+        async def on_request_end(
+            session: aiohttp.ClientSession, context: SimpleNamespace, params: aiohttp.TraceRequestEndParams
+        ):
+            duration = asyncio.get_running_loop().time() - context.start
+            self.dispatch("http_request", session_name, params.method, str(params.response.status), duration)
+
+        async def on_request_exception(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceRequestExceptionParams,
+        ):
+            duration = asyncio.get_running_loop().time() - context.start
+            self.dispatch(
+                "http_request", session_name, params.method, type(params.exception).__name__, duration
+            )
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
 
     async def set_presence(self):
         git = Git()
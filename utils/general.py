@@ -1,7 +1,10 @@
+from __future__ import annotations
+
+import logging
 import math
 import time
 from datetime import datetime, tzinfo
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
 
 import disnake
 from disnake import Emoji, PartialEmoji
@@ -10,10 +13,14 @@ from sqlalchemy.schema import Table
 
 from config.app_config import config
 from config.messages import Messages
-from database import cooldown, session
-from rubbergod import Rubbergod
+from database import cooldown
 from utils.constants import MAX_ATTACHMENT_SIZE
 
+if TYPE_CHECKING:
+    from rubbergod import Rubbergod
+
+rubbergod_logger = logging.getLogger("rubbergod")
+
 
 def id_to_datetime(snowflake_id: int) -> datetime:
     return datetime.fromtimestamp(((snowflake_id >> 22) + 1420070400000) / 1000)
@@ -129,28 +136,24 @@ class PCommandOnCooldown(commands.CommandError):
 
 
 class PersistentCooldown:
+    """Cooldown surviving restarts, windows are checked in memory and persisted by `cooldown_store`"""
+
     def __init__(self, command_name: str, limit: float) -> None:
         self.command_name = command_name
         self.limit = limit * 1000  # convert to ms
+        cooldown.cooldown_store.register(command_name, self.limit)
 
     async def check_cooldown(self, inter: disnake.ApplicationCommandInteraction) -> bool:
-        current_cooldown = session.query(cooldown.CooldownDB).get(
-            dict(command_name=self.command_name, user_id=str(inter.user.id))
-        )
+        if not cooldown.cooldown_store.loaded:
+            try:
+                await cooldown.cooldown_store.load()
+            except Exception:
+                # windows in memory still apply, loading is retried by the next check
+                rubbergod_logger.warning("Cooldowns could not be loaded", exc_info=True)
         now = int(time.time() * 1000)
-        if current_cooldown is None:
-            session.add(
-                cooldown.CooldownDB(
-                    command_name=self.command_name,
-                    user_id=str(inter.user.id),
-                    timestamp=now,
-                )
-            )
-        elif (time_passed := now - current_cooldown.timestamp) < self.limit:
-            raise PCommandOnCooldown(Messages.cooldown(time=(self.limit - time_passed) / 1000))
-        else:
-            current_cooldown.timestamp = now
-        session.commit()
+        remaining = cooldown.cooldown_store.start(self.command_name, inter.user.id, now)
+        if remaining is not None:
+            raise PCommandOnCooldown(Messages.cooldown(time=remaining / 1000))
         return True
 
     def __call__(self, f: commands.InvokableApplicationCommand) -> Callable:
@@ -1,9 +1,13 @@
+from __future__ import annotations
+
 import random
 import re
+from typing import TYPE_CHECKING
 
 import disnake
 
-from rubbergod import Rubbergod
+if TYPE_CHECKING:
+    from rubbergod import Rubbergod
 
 
 def generate_mention(user_id: int) -> str: